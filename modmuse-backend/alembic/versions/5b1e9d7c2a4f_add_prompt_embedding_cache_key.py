@@ -0,0 +1,48 @@
+"""Add prompt embedding cache key columns
+
+Revision ID: 5b1e9d7c2a4f
+Revises: 0c8770d1d7bd
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e9d7c2a4f'
+down_revision: Union[str, Sequence[str], None] = '0c8770d1d7bd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('prompt', sa.Column('normalized_prompt', sa.Text(), nullable=True))
+    op.add_column('prompt', sa.Column('embedding_model', sa.String(), nullable=True))
+    op.create_index(
+        'ix_prompt_normalized_prompt_model',
+        'prompt',
+        ['normalized_prompt', 'embedding_model'],
+        unique=False,
+    )
+
+    # Backfill existing history so it can serve as the persistent cache tier.
+    # Mirrors app.core.cache.normalize_prompt (minus NFKC, which Postgres lacks).
+    op.execute(
+        """
+        UPDATE prompt
+        SET normalized_prompt = btrim(regexp_replace(lower(user_prompt), '\\s+', ' ', 'g')),
+            embedding_model = 'text-embedding-3-small'
+        WHERE embedding IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_prompt_normalized_prompt_model', table_name='prompt')
+    op.drop_column('prompt', 'embedding_model')
+    op.drop_column('prompt', 'normalized_prompt')
@@ -0,0 +1,79 @@
+"""Add mod.embedding vector column and ANN indexes
+
+Revision ID: 8e3f4a61c0d2
+Revises: 5b1e9d7c2a4f
+Create Date: 2026-10-18 10:03:17.522981
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3f4a61c0d2'
+down_revision: Union[str, Sequence[str], None] = '5b1e9d7c2a4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMBEDDING_DIM = 1536
+HNSW_WITH = "WITH (m = 16, ef_construction = 64)"
+# Same sizing rule as app.db.vector_indexes: smaller games are scanned exactly
+GAME_VECTOR_INDEX_MIN_MODS = int(os.getenv("GAME_VECTOR_INDEX_MIN_MODS", "2000"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    # Some databases already have a hand-added (untyped) embedding column that
+    # seed.py wrote into; keep its data and pin the dimension so it can be indexed.
+    op.execute(f"ALTER TABLE mod ADD COLUMN IF NOT EXISTS embedding vector({EMBEDDING_DIM})")
+    op.execute(
+        f"ALTER TABLE mod ALTER COLUMN embedding TYPE vector({EMBEDDING_DIM}) "
+        f"USING embedding::vector({EMBEDDING_DIM})"
+    )
+
+    op.create_index('ix_mod_game_id', 'mod', ['game_id'], unique=False, if_not_exists=True)
+
+    # Global ANN index (cosine distance, matches the `<=>` operator)
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS ix_mod_embedding_hnsw "
+        f"ON mod USING hnsw (embedding vector_cosine_ops) {HNSW_WITH}"
+    )
+
+    # One partial ANN index per existing game with enough embedded mods.
+    # `python -m app.db.vector_indexes` adds or drops them as catalogs change.
+    game_ids = op.get_bind().execute(
+        sa.text("""
+            SELECT game_id
+            FROM mod
+            WHERE embedding IS NOT NULL
+            GROUP BY game_id
+            HAVING count(*) >= :min_mods
+        """),
+        {"min_mods": GAME_VECTOR_INDEX_MIN_MODS},
+    ).scalars().all()
+    for game_id in game_ids:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_mod_embedding_hnsw_game_{int(game_id)} "
+            f"ON mod USING hnsw (embedding vector_cosine_ops) {HNSW_WITH} "
+            f"WHERE game_id = {int(game_id)}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    index_names = op.get_bind().execute(sa.text(
+        "SELECT indexname FROM pg_indexes "
+        "WHERE tablename = 'mod' AND indexname LIKE 'ix_mod_embedding_hnsw_game_%'"
+    )).scalars().all()
+    for name in index_names:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute("DROP INDEX IF EXISTS ix_mod_embedding_hnsw")
+    op.drop_index('ix_mod_game_id', table_name='mod', if_exists=True)
+    # The embedding column itself is kept: dropping it would throw away every
+    # stored mod embedding.
@@ -0,0 +1,69 @@
+"""Store prompt embeddings as halfvec and add a binary quantized mod embedding
+
+Revision ID: a93c5e1f7b24
+Revises: d2b7e9f4a613
+Create Date: 2026-10-18 16:40:09.184377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93c5e1f7b24'
+down_revision: Union[str, Sequence[str], None] = 'd2b7e9f4a613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMBEDDING_DIM = 1536
+HNSW_WITH = "WITH (m = 16, ef_construction = 64)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # halfvec and binary_quantize() need pgvector >= 0.7
+    op.execute("ALTER EXTENSION vector UPDATE")
+
+    # double precision[] (8 bytes/dim) -> halfvec (2 bytes/dim). Rewrites the
+    # table; empty arrays have no halfvec form and become NULL.
+    op.execute(
+        "ALTER TABLE prompt ALTER COLUMN embedding TYPE halfvec "
+        "USING CASE WHEN cardinality(embedding) > 0 THEN embedding::halfvec END"
+    )
+
+    # Generated, so existing rows are filled by this statement and later
+    # writes to mod.embedding keep it in sync.
+    op.execute(
+        f"ALTER TABLE mod ADD COLUMN embedding_bq bit({EMBEDDING_DIM}) "
+        f"GENERATED ALWAYS AS (binary_quantize(embedding)::bit({EMBEDDING_DIM})) STORED"
+    )
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS ix_mod_embedding_bq_hnsw "
+        f"ON mod USING hnsw (embedding_bq bit_hamming_ops) {HNSW_WITH}"
+    )
+
+    # Games that have a partial index on the full vectors get one on the
+    # quantized copy too (app.db.vector_indexes keeps them in step afterwards).
+    index_names = op.get_bind().execute(sa.text(
+        "SELECT indexname FROM pg_indexes "
+        "WHERE tablename = 'mod' AND indexname LIKE 'ix_mod_embedding_hnsw_game_%'"
+    )).scalars().all()
+    for name in index_names:
+        game_id = int(name.rsplit("_", 1)[1])
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_mod_embedding_bq_hnsw_game_{game_id} "
+            f"ON mod USING hnsw (embedding_bq bit_hamming_ops) {HNSW_WITH} "
+            f"WHERE game_id = {game_id}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Dropping the column drops every index on it
+    op.execute("ALTER TABLE mod DROP COLUMN IF EXISTS embedding_bq")
+    op.execute(
+        "ALTER TABLE prompt ALTER COLUMN embedding TYPE double precision[] "
+        "USING embedding::real[]::double precision[]"
+    )
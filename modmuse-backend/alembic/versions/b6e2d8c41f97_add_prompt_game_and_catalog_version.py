@@ -0,0 +1,49 @@
+"""Add prompt.game_id and prompt.catalog_version for prompt reuse
+
+Revision ID: b6e2d8c41f97
+Revises: a93c5e1f7b24
+Create Date: 2026-10-18 18:05:52.640113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d8c41f97'
+down_revision: Union[str, Sequence[str], None] = 'a93c5e1f7b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('prompt', sa.Column('game_id', sa.Integer(), nullable=True))
+    op.add_column('prompt', sa.Column('catalog_version', sa.BigInteger(), nullable=True))
+    op.create_foreign_key('prompt_game_id_fkey', 'prompt', 'game', ['game_id'], ['game_id'])
+    op.create_index(
+        'ix_prompt_game_id_catalog_version', 'prompt', ['game_id', 'catalog_version'], unique=False
+    )
+
+    # Existing prompts: the game of their recommended mods. Their catalog
+    # version is unknown, so they stay NULL and are never reused.
+    op.execute("""
+        UPDATE prompt p
+        SET game_id = (
+            SELECT m.game_id
+            FROM recommendation r
+            JOIN mod m ON m.mod_id = r.mod_id
+            WHERE r.prompt_id = p.prompt_id
+            LIMIT 1
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_prompt_game_id_catalog_version', table_name='prompt')
+    op.drop_constraint('prompt_game_id_fkey', 'prompt', type_='foreignkey')
+    op.drop_column('prompt', 'catalog_version')
+    op.drop_column('prompt', 'game_id')
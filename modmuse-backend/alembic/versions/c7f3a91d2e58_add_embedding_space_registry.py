@@ -0,0 +1,44 @@
+"""Add embedding_space: model and dimension of stored embedding columns
+
+Revision ID: c7f3a91d2e58
+Revises: b6e2d8c41f97
+Create Date: 2026-10-18 19:12:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f3a91d2e58'
+down_revision: Union[str, Sequence[str], None] = 'b6e2d8c41f97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'embedding_space',
+        sa.Column('column_name', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('dimensions', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('column_name'),
+    )
+
+    # Mod vectors written so far came from the backfill/seed with
+    # text-embedding-3-small at its native 1536 dimensions. Later changes of
+    # model or dimension go through app.db.reembed.
+    op.execute("""
+        INSERT INTO embedding_space (column_name, model, dimensions)
+        SELECT 'mod.embedding', 'text-embedding-3-small', 1536
+        WHERE EXISTS (SELECT 1 FROM mod WHERE embedding IS NOT NULL)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('embedding_space')
@@ -0,0 +1,33 @@
+"""Bump catalog_version on game table changes
+
+Revision ID: d2b7e9f4a613
+Revises: c41d7a9e3b58
+Create Date: 2026-10-18 14:12:40.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b7e9f4a613'
+down_revision: Union[str, Sequence[str], None] = 'c41d7a9e3b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Lets the in-process game registry notice added or edited games
+    op.execute(
+        "CREATE TRIGGER trg_catalog_version_game "
+        "AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON game "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_catalog_version_game ON game")
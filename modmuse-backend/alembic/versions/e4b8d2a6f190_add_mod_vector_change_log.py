@@ -0,0 +1,37 @@
+"""Add mod_vector_change: log of mods whose embedding changed
+
+Revision ID: e4b8d2a6f190
+Revises: c7f3a91d2e58
+Create Date: 2026-10-18 21:04:11.692417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8d2a6f190'
+down_revision: Union[str, Sequence[str], None] = 'c7f3a91d2e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'mod_vector_change',
+        sa.Column('change_id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('mod_ids', postgresql.ARRAY(sa.Integer()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('change_id'),
+    )
+    op.create_index('ix_mod_vector_change_created_at', 'mod_vector_change', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mod_vector_change_created_at', table_name='mod_vector_change')
+    op.drop_table('mod_vector_change')
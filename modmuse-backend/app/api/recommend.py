@@ -4,6 +4,7 @@ from sqlalchemy import text
 
 from app.api.schemas import PromptRequest
 from app.db.session import get_async_session
+from app.services.embedding_registry import embedding_registry
 from app.services.embedding_service import embed_text
 
 router = APIRouter()
@@ -13,7 +14,8 @@ async def recommend(
     request: PromptRequest,
     session: AsyncSession = Depends(get_async_session)
 ):
-    # 1. Embed user prompt
+    # 1. Embed user prompt (same provider and space as the stored mod vectors)
+    await embedding_registry.ensure_compatible()
     emb = await embed_text(request.prompt)
 
     # 2. Vector similarity search using pgvector `<=>` operator
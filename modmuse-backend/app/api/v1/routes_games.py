@@ -1,17 +1,36 @@
 # app/api/v1/routes_games.py
-from typing import List
+from email.utils import format_datetime
+from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, Response
 
 from app.models.domain import GameRead
-from app.services.game_service import list_supported_games
+from app.services.game_service import games_snapshot, is_not_modified
 
 router = APIRouter(prefix="/games", tags=["games"])
 
 
 @router.get("/", response_model=List[GameRead])
-def get_games():
+async def get_games(
+    if_none_match: Optional[str] = Header(default=None),
+    if_modified_since: Optional[str] = Header(default=None),
+):
     """
     List all supported games that ModMuse can recommend mods for.
+
+    Served from an in-memory snapshot of the `game` table as pre-serialized
+    bytes. Responses carry ETag / Last-Modified; a matching If-None-Match
+    (or an If-Modified-Since not older than the snapshot) returns 304.
     """
-    return list_supported_games()
\ No newline at end of file
+    snapshot = await games_snapshot()
+    headers = {
+        "ETag": snapshot.etag,
+        "Last-Modified": format_datetime(snapshot.last_modified, usegmt=True),
+        # Cacheable, but revalidate every time (cheap: usually a 304)
+        "Cache-Control": "no-cache",
+    }
+
+    if is_not_modified(snapshot, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
@@ -0,0 +1,88 @@
+# app/api/v1/routes_metrics.py
+from fastapi import APIRouter
+
+from app.db.session import pool_stats
+
+from app.services.ai_services import keyword_cache_stats, keyword_guard
+from app.services.catalog_version import catalog_version
+from app.services.compatibility import compatibility_engine
+from app.services.embedding_cache import prompt_embedding_cache
+from app.services.embedding_registry import embedding_registry
+from app.services.embedding_service import embedding_batcher, embedding_guard, embedding_provider
+from app.services.game_registry import game_registry
+from app.services.history_writer import history_writer
+from app.services.response_cache import response_cache
+from app.services.semantic_cache import semantic_prompt_cache
+from app.services.tag_index import tag_index
+from app.services.vector_index import vector_backend
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/caches")
+def get_cache_metrics():
+    """
+    Hit/miss counters for the in-process caches sitting in front of OpenAI.
+    """
+    return {
+        "prompt_embedding": prompt_embedding_cache.stats(),
+        "keywords": keyword_cache_stats(),
+        "responses": response_cache.stats(),
+        "prompt_reuse": semantic_prompt_cache.stats(),
+        "catalog_version": catalog_version.current,
+    }
+
+
+@router.get("/retrieval")
+def get_retrieval_metrics():
+    """
+    Search counters and sizes for the vector, tag and compatibility indexes,
+    and the embedding space query vectors are checked against.
+    """
+    return {
+        "vector": vector_backend.stats(),
+        "embedding_space": embedding_registry.stats(),
+        "tags": tag_index.stats(),
+        "compatibility": compatibility_engine.stats(),
+        "games": game_registry.stats(),
+    }
+
+
+@router.get("/embeddings")
+def get_embedding_metrics():
+    """
+    Embedding provider and micro-batching: batch-size and wait-time histograms.
+    """
+    return {
+        "provider": embedding_provider.name,
+        "model": embedding_provider.model_id,
+        "dimensions": embedding_provider.dim,
+        "batching": embedding_batcher.stats(),
+    }
+
+
+@router.get("/providers")
+def get_provider_metrics():
+    """
+    Circuit breaker state, retries, rejections and attempt latency per OpenAI call type.
+    """
+    return {
+        "keywords": keyword_guard.stats(),
+        "embeddings": embedding_guard.stats(),
+    }
+
+
+@router.get("/history")
+def get_history_metrics():
+    """
+    Queue depth and write/drop counters for write-behind history persistence.
+    """
+    return history_writer.stats()
+
+
+@router.get("/pool")
+def get_pool_metrics():
+    """
+    Connection pool occupancy, overflow and checkout wait-time histogram.
+    """
+    return pool_stats()
@@ -0,0 +1,36 @@
+# app/api/v1/routes_modlists.py
+
+from fastapi import APIRouter, HTTPException
+
+from app.models.domain import ModListSolveRequest, ModListSolveResponse
+from app.services.game_registry import UnknownGameError
+from app.services.modlist_solver import solve_candidates
+
+router = APIRouter(prefix="/modlists", tags=["modlists"])
+
+
+@router.post("/solve", response_model=ModListSolveResponse)
+async def solve_mod_list(payload: ModListSolveRequest):
+    """
+    Pick the highest-scoring conflict-free subset of candidate mods.
+
+    This endpoint performs:
+      • Drops candidate ids that are not mods of the given game
+      • Expands every candidate with its transitive dependencies
+      • Greedy selection + local improvement within a time budget
+      • Guarantees no incompatible pair and no missing dependency
+
+    Returns:
+        ModListSolveResponse:
+            Selected mod ids, dependencies that had to be added, and the
+            candidates that were dropped or could never be selected.
+    """
+    try:
+        return await solve_candidates(payload)
+
+    except UnknownGameError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    except Exception as e:
+        # Prevent leaking internal details to frontend
+        raise HTTPException(status_code=500, detail=f"Solver error: {str(e)}")
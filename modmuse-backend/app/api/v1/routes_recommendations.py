@@ -1,11 +1,28 @@
 # app/api/v1/routes_recommendations.py
 
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_async_session
-from app.models.domain import PromptCreate, RecommendationResponse
-from app.services.recommendation_service import generate_recommendations
+from app.core.config import settings
+from app.db.session import SessionLocal, get_async_session
+from app.models.domain import (
+    BatchPromptCreate,
+    BatchRecommendationResponse,
+    PromptCreate,
+    RecommendationResponse,
+    StreamErrorEvent,
+)
+from app.services.game_registry import UnknownGameError
+from app.services.recommendation_service import (
+    generate_recommendations,
+    generate_recommendations_batch,
+    resolve_game_id,
+    stream_recommendations,
+)
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
@@ -34,6 +51,91 @@ async def create_recommendations(
     try:
         return await generate_recommendations(payload, session)
 
+    except UnknownGameError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
     except Exception as e:
         # Prevent leaking internal details to frontend
-        raise HTTPException(status_code=500, detail=f"Recommendation error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Recommendation error: {str(e)}")
+
+
+@router.post("/batch", response_model=BatchRecommendationResponse)
+async def create_recommendations_batch(
+    payload: BatchPromptCreate,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Submit many prompts at once (partner integrations) and receive one
+    RecommendationResponse per prompt, in request order.
+
+    Compared with calling POST /recommendations/ per prompt, this performs:
+      • One list-input OpenAI embeddings call for all uncached prompts
+      • One batched similarity search (LATERAL top-k or one matrix product)
+      • One mod hydration query
+      • One bulk insert for all Prompt and Recommendation rows
+    """
+    if not payload.prompts:
+        raise HTTPException(status_code=422, detail="At least one prompt is required")
+    if len(payload.prompts) > settings.batch_max_prompts:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.batch_max_prompts} prompts per batch",
+        )
+
+    try:
+        return await generate_recommendations_batch(payload.prompts, session)
+
+    except UnknownGameError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    except Exception as e:
+        # Prevent leaking internal details to frontend
+        raise HTTPException(status_code=500, detail=f"Recommendation error: {str(e)}")
+
+
+def _frame(event: str, payload: str, sse: bool) -> str:
+    if sse:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({"event": event, "data": json.loads(payload)}) + "\n"
+
+
+@router.post("/stream")
+async def create_recommendations_stream(payload: PromptCreate, request: Request):
+    """
+    Same pipeline as POST /recommendations/, streamed as events while stages finish:
+
+      • keywords  — extracted keywords
+      • semantic  — first vector-search hits
+      • keyword   — tag-channel hits
+      • result    — final ranked, compatibility-checked RecommendationResponse
+      • error     — the pipeline failed after the stream started
+
+    Newline-delimited JSON ({"event": ..., "data": ...}) by default;
+    Server-Sent Events when the client sends `Accept: text/event-stream`.
+    """
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    # Validate before the 200 status line goes out
+    try:
+        payload = payload.model_copy(update={"game_id": await resolve_game_id(payload.game_id)})
+    except UnknownGameError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def body() -> AsyncIterator[str]:
+        # Yield-dependencies are closed before a streaming body runs,
+        # so the stream owns its session.
+        async with SessionLocal() as session:
+            try:
+                async for event, model in stream_recommendations(payload, session):
+                    yield _frame(event, model.model_dump_json(), sse)
+            except Exception as e:
+                # Status is already sent; report the failure in-band
+                error = StreamErrorEvent(detail=f"Recommendation error: {str(e)}")
+                yield _frame("error", error.model_dump_json(), sse)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
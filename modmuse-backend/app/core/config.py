@@ -1,7 +1,11 @@
 # app/core/config.py
+from dotenv import load_dotenv
 from pydantic import BaseModel
 import os
 
+# Settings read the environment at import time, so .env has to be loaded first
+load_dotenv()
+
 
 class Settings(BaseModel):
     api_version: str = "v1"
@@ -10,5 +14,131 @@ class Settings(BaseModel):
     database_url: str | None = os.getenv("DATABASE_URL")
     openai_api_key: str | None = os.getenv("OPENAI_API_KEY")
 
+    # Async engine connection pool
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Connections opened at startup (capped at the pool size); 0 disables warmup
+    db_pool_warmup: int = int(os.getenv("DB_POOL_WARMUP", os.getenv("DB_POOL_SIZE", "10")))
+    # asyncpg statement cache / SQLAlchemy prepared statement cache, per connection
+    db_statement_cache_size: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    db_prepared_statement_cache_size: int = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+
+    # Embedding provider for both mod and prompt vectors: "openai", "hashing"
+    # (deterministic, offline) or "onnx" (local CPU sentence model)
+    embedding_provider: str = os.getenv("EMBEDDING_PROVIDER", "openai")
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    # Dimension of mod.embedding and of every query vector. Below an OpenAI
+    # model's native size it requests shortened embeddings (`dimensions`);
+    # changing it needs a re-embed (python -m app.db.reembed)
+    embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "1536"))
+    # Max texts per provider call (OpenAI allows 2048)
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    # Micro-batching of single-text embeds across concurrent requests: wait
+    # at most this long for more texts (0 disables), flush early at max size
+    embedding_batch_window_ms: float = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+    embedding_batch_max_size: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+    onnx_model_path: str | None = os.getenv("ONNX_MODEL_PATH")
+    onnx_tokenizer_path: str | None = os.getenv("ONNX_TOKENIZER_PATH")
+
+    # Prompt embedding cache (in-process LRU tier + prompt-history tier)
+    embedding_cache_size: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    embedding_cache_ttl_seconds: float = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+    embedding_cache_persistent: bool = os.getenv("EMBEDDING_CACHE_PERSISTENT", "true").lower() == "true"
+
+    # Keyword extraction memoization (parsed keyword lists)
+    keyword_cache_size: int = int(os.getenv("KEYWORD_CACHE_SIZE", "2048"))
+    keyword_cache_ttl_seconds: float = float(os.getenv("KEYWORD_CACHE_TTL_SECONDS", "3600"))
+
+    # Per-stage deadlines for the recommendation pipeline (seconds)
+    keyword_stage_timeout: float = float(os.getenv("KEYWORD_STAGE_TIMEOUT", "6.0"))
+    embedding_stage_timeout: float = float(os.getenv("EMBEDDING_STAGE_TIMEOUT", "4.0"))
+    vector_search_stage_timeout: float = float(os.getenv("VECTOR_SEARCH_STAGE_TIMEOUT", "2.0"))
+    tag_search_stage_timeout: float = float(os.getenv("TAG_SEARCH_STAGE_TIMEOUT", "2.0"))
+
+    # OpenAI calls (keywords, embeddings): in-flight limit per call type, a
+    # per-attempt timeout inside the stage deadline, retries of transient
+    # errors with jittered backoff, and a circuit breaker that fails calls
+    # fast for CIRCUIT_RESET_SECONDS after N consecutive transient failures
+    keyword_max_concurrency: int = int(os.getenv("KEYWORD_MAX_CONCURRENCY", "32"))
+    embedding_max_concurrency: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "8"))
+    openai_attempt_timeout_seconds: float = float(os.getenv("OPENAI_ATTEMPT_TIMEOUT_SECONDS", "3.0"))
+    openai_max_attempts: int = int(os.getenv("OPENAI_MAX_ATTEMPTS", "3"))
+    openai_retry_base_delay_seconds: float = float(os.getenv("OPENAI_RETRY_BASE_DELAY_SECONDS", "0.2"))
+    openai_retry_max_delay_seconds: float = float(os.getenv("OPENAI_RETRY_MAX_DELAY_SECONDS", "2.0"))
+    # The guarded call gives up this long before its stage times out, so the
+    # failure reaches the breaker and the stage's fallback
+    openai_deadline_margin_seconds: float = float(os.getenv("OPENAI_DEADLINE_MARGIN_SECONDS", "0.25"))
+    circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    circuit_reset_seconds: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+    # Games: requests without a game_id use the default; the `game` table is
+    # cached in-process and re-read after the TTL
+    default_game_id: int = int(os.getenv("DEFAULT_GAME_ID", "1"))
+    game_registry_ttl_seconds: float = float(os.getenv("GAME_REGISTRY_TTL_SECONDS", "60"))
+    # Per-game in-memory partitions (numpy vectors, tag index) kept loaded, least recently used evicted
+    max_loaded_games: int = int(os.getenv("MAX_LOADED_GAMES", "32"))
+    # Games with fewer embedded mods get no partial HNSW index (an exact scan is cheaper)
+    game_vector_index_min_mods: int = int(os.getenv("GAME_VECTOR_INDEX_MIN_MODS", "2000"))
+
+    # Semantic search backend: "pgvector" (database) or "numpy" (in-process index)
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "pgvector")
+    # Full reload interval for in-process partitions, a backstop for the mod change log
+    vector_index_max_age_seconds: float = float(os.getenv("VECTOR_INDEX_MAX_AGE_SECONDS", "300"))
+    # Logged mod changes replayed row by row into loaded partitions; more than this reloads them
+    vector_index_max_incremental_mods: int = int(os.getenv("VECTOR_INDEX_MAX_INCREMENTAL_MODS", "5000"))
+
+    # pgvector ANN query-time tuning
+    hnsw_ef_search: int = int(os.getenv("HNSW_EF_SEARCH", "40"))
+    ivfflat_probes: int = int(os.getenv("IVFFLAT_PROBES", "10"))
+    # pgvector >= 0.8: keep walking the HNSW graph until the game_id filter leaves k rows.
+    # "strict_order", "relaxed_order" or "off"; empty for older pgvector, which rejects the setting
+    hnsw_iterative_scan: str = os.getenv("HNSW_ITERATIVE_SCAN", "strict_order")
+
+    # Mods kept from the semantic channel per prompt
+    semantic_top_k: int = int(os.getenv("SEMANTIC_TOP_K", "8"))
+    # pgvector backend: "none" searches the full vectors; "binary" takes
+    # VECTOR_RESCORE_POOL candidates by Hamming distance on mod.embedding_bq,
+    # then rescores them with exact cosine distance
+    vector_quantization: str = os.getenv("VECTOR_QUANTIZATION", "none")
+    vector_rescore_pool: int = int(os.getenv("VECTOR_RESCORE_POOL", "256"))
+
+    # Mod embedding backfill (app/db/backfill.py)
+    backfill_batch_size: int = int(os.getenv("BACKFILL_BATCH_SIZE", "256"))
+    backfill_concurrency: int = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+
+    # Prompt/recommendation history: "sync" (in the request) or "write_behind" (background queue)
+    history_write_mode: str = os.getenv("HISTORY_WRITE_MODE", "sync")
+    history_queue_max_size: int = int(os.getenv("HISTORY_QUEUE_MAX_SIZE", "10000"))
+    history_batch_size: int = int(os.getenv("HISTORY_BATCH_SIZE", "200"))
+    history_flush_interval_seconds: float = float(os.getenv("HISTORY_FLUSH_INTERVAL_SECONDS", "0.5"))
+    history_enqueue_timeout_seconds: float = float(os.getenv("HISTORY_ENQUEUE_TIMEOUT_SECONDS", "0.05"))
+
+    # Keyword channel: in-memory fuzzy tag index
+    tag_match_min_similarity: float = float(os.getenv("TAG_MATCH_MIN_SIMILARITY", "0.4"))
+    keyword_candidate_limit: int = int(os.getenv("KEYWORD_CANDIDATE_LIMIT", "50"))
+
+    # POST /recommendations/batch: max prompts per request
+    batch_max_prompts: int = int(os.getenv("BATCH_MAX_PROMPTS", "100"))
+
+    # POST /modlists/solve: default search budget for local improvement
+    solver_time_budget_ms: int = int(os.getenv("SOLVER_TIME_BUDGET_MS", "200"))
+
+    # Full RecommendationResponse cache: "memory", "redis" (shared) or "off"
+    response_cache_backend: str = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    response_cache_url: str | None = os.getenv("RESPONSE_CACHE_URL")
+    response_cache_size: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    response_cache_ttl_seconds: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "900"))
+    # Near-duplicate prompt reuse: answers for prompts whose embedding is at
+    # least this similar (cosine) to a prior prompt for the same game and
+    # catalog version; the most recent N answered prompts are kept per game
+    semantic_cache_enabled: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    semantic_cache_max_prompts: int = int(os.getenv("SEMANTIC_CACHE_MAX_PROMPTS", "1000"))
+    # How often the catalog_version counter is re-read from the database
+    catalog_version_poll_seconds: float = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "5"))
+
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -0,0 +1,94 @@
+# app/core/metrics.py
+"""
+Small in-process metric primitives for the /metrics endpoints.
+
+Histogram uses fixed, cumulative-style upper bounds (like Prometheus), so
+observing is one bisect and a counter increment, and percentiles are
+estimated from the bucket counts.
+"""
+import bisect
+from typing import Dict, List, Optional, Sequence
+
+# Seconds: 100µs .. 10s, roughly 2.5x apart
+LATENCY_BUCKETS: Sequence[float] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Cosine similarity, finer near 1 where reuse thresholds sit
+SIMILARITY_BUCKETS: Sequence[float] = (
+    0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.92, 0.94, 0.95, 0.96, 0.97, 0.98, 0.99, 1.0,
+)
+
+# Items per batch, powers of two up to the OpenAI list-input limit
+BATCH_SIZE_BUCKETS: Sequence[float] = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds: List[float] = sorted(buckets)
+        # One extra bucket for values above the last bound
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the q-quantile by linear interpolation inside its bucket.
+        Values in the overflow bucket are reported as the observed maximum.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(self.bounds):
+                    return self.max
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = min(self.bounds[i], self.max)
+                return lower + (upper - lower) * max(0.0, (rank - seen) / n)
+            seen += n
+        return self.max
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def snapshot(self, scale: float = 1000.0, unit: str = "ms") -> Dict[str, object]:
+        """
+        Summary plus cumulative bucket counts, values multiplied by `scale`
+        (s -> ms). Unitless values (unit="") get plain "p50", "avg", ... keys.
+        """
+        def scaled(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * scale, 3)
+
+        suffix = f"_{unit}" if unit else ""
+
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, n in zip(self.bounds, self.counts):
+            running += n
+            cumulative[f"le_{bound * scale:g}{unit}"] = running
+        cumulative["le_inf"] = self.count
+
+        return {
+            "count": self.count,
+            f"avg{suffix}": scaled(self.sum / self.count) if self.count else None,
+            f"p50{suffix}": scaled(self.quantile(0.50)),
+            f"p95{suffix}": scaled(self.quantile(0.95)),
+            f"p99{suffix}": scaled(self.quantile(0.99)),
+            f"max{suffix}": scaled(self.max) if self.count else None,
+            "buckets": cumulative,
+        }
+
@@ -0,0 +1,230 @@
+# app/core/resilience.py
+"""
+Admission control, retries and a circuit breaker for provider calls.
+
+`ProviderGuard.call(fn)` runs `fn()` (one provider request) under:
+
+- a deadline for the whole call, retries included. Each attempt gets the
+  smaller of `attempt_timeout` and the time left, and a retry is only made
+  if its backoff ends before the deadline;
+- admission control: at most `max_concurrency` calls in flight. Waiting for
+  a slot counts against the deadline; a caller that does not get one in time
+  is rejected (ProviderOverloaded) instead of queueing behind a slow provider;
+- retries of transient errors (timeouts, plus whatever `is_transient`
+  accepts) with full-jitter exponential backoff: a delay drawn uniformly
+  from [0, min(max_delay, base_delay * 2**(retry - 1))];
+- a CircuitBreaker: consecutive transient failures open it, and calls then
+  fail immediately (CircuitOpenError) until it lets a probe through.
+
+Both rejections are ProviderUnavailable. Callers handle them like any other
+failure; the recommendation pipeline degrades to its other retrieval channel.
+"""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.core.metrics import Histogram
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailable(RuntimeError):
+    pass
+
+
+class CircuitOpenError(ProviderUnavailable):
+    pass
+
+
+class ProviderOverloaded(ProviderUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open after `reset_timeout` seconds, where a single probe call is let
+    through: its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.consecutive_failures = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """The allowed call never reached the provider (cancelled, no slot)."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self._state = CLOSED
+        self._probing = False
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self._state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self.opened += 1
+            self._state = OPEN
+            self._opened_at = self._clock()
+        self._probing = False
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+        }
+
+
+class ProviderGuard:
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        deadline: float,
+        attempt_timeout: float,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        breaker: CircuitBreaker,
+        is_transient: Callable[[BaseException], bool] = lambda error: False,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.is_transient = is_transient
+        self._clock = clock
+        self._rng = rng
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected_open = 0
+        self.rejected_overload = 0
+        # Per attempt, while holding a slot
+        self.latency = Histogram()
+
+    def backoff(self, retry: int) -> float:
+        """Full jitter: spreads the retries of many callers hit by the same incident."""
+        return self._rng() * min(self.max_delay, self.base_delay * 2 ** (retry - 1))
+
+    def _transient(self, error: BaseException) -> bool:
+        return isinstance(error, asyncio.TimeoutError) or self.is_transient(error)
+
+    async def call(self, fn: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> T:
+        self.calls += 1
+        expires = self._clock() + (self.deadline if deadline is None else deadline)
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.rejected_open += 1
+                raise CircuitOpenError(f"{self.name}: circuit open, failing fast")
+
+            attempt += 1
+            try:
+                result = await self._attempt(fn, expires)
+            except ProviderOverloaded:
+                self.breaker.release_probe()
+                raise
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                if not self._transient(e):
+                    # The provider answered: not an outage
+                    self.breaker.record_success()
+                    self.failures += 1
+                    raise
+                self.breaker.record_failure()
+                delay = self.backoff(attempt)
+                if attempt >= self.max_attempts or self._clock() + delay >= expires:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                print(f"⚠️ {self.name} attempt {attempt} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], expires: float) -> T:
+        try:
+            if self._slots.locked():
+                await asyncio.wait_for(self._slots.acquire(), timeout=max(0.0, expires - self._clock()))
+            else:
+                await self._slots.acquire()
+        except asyncio.TimeoutError:
+            self.rejected_overload += 1
+            raise ProviderOverloaded(
+                f"{self.name}: no free slot among {self.max_concurrency} before the deadline"
+            ) from None
+
+        self.in_flight += 1
+        self.attempts += 1
+        started = time.perf_counter()
+        try:
+            timeout = min(self.attempt_timeout, expires - self._clock())
+            if timeout <= 0:
+                raise asyncio.TimeoutError()
+            return await asyncio.wait_for(fn(), timeout=timeout)
+        finally:
+            self.latency.observe(time.perf_counter() - started)
+            self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "breaker": self.breaker.stats(),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected_open": self.rejected_open,
+            "rejected_overload": self.rejected_overload,
+            "attempt_latency": self.latency.snapshot(),
+        }
@@ -7,6 +7,7 @@ from .models_utils.domain import (
     Incompatibility,
     Prompt,
     Recommendation,
+    CatalogVersion,
 )
 
 __all__ = [
@@ -18,4 +19,5 @@ __all__ = [
     "Incompatibility",
     "Prompt",
     "Recommendation",
+    "CatalogVersion",
 ]
\ No newline at end of file
@@ -0,0 +1,170 @@
+# app/db/backfill.py
+"""
+Batched, resumable backfill of mod embeddings.
+
+Mods without an embedding are read in keyset-paginated chunks (by mod_id).
+Each chunk is split into batches, and every batch is one call to the
+configured embedding provider (a single list-input `embeddings.create` for
+OpenAI), with at most `concurrency` calls in flight.
+The chunk is committed before the next one starts, so a crash only loses the
+chunk being processed, and re-running the job continues with the mods that are
+still missing an embedding.
+
+Usage (non-destructive, unlike seed.py):
+
+    python -m app.db.backfill --batch-size 256 --concurrency 4 [--game-id 1]
+    python -m app.db.backfill --reembed --start-after 12000   # resume a re-embed
+"""
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.models_utils.domain import EMBEDDING_DIM, Mod
+from app.db.session import SessionLocal
+from app.db.vector_changes import prune_vector_changes, record_vector_change
+from app.services.embedding_registry import embedding_registry
+from app.services.embedding_service import check_embedding_dimension, embedding_provider
+
+PendingMod = Tuple[int, str]
+
+
+def mod_embedding_text(name: str, description: Optional[str]) -> str:
+    """Text that represents a mod in embedding space (shared with the importer)."""
+    return f"{name}: {description or ''}"
+
+
+@dataclass
+class BackfillReport:
+    embedded: int = 0
+    failed: int = 0
+    requests: int = 0
+    chunks: int = 0
+    last_mod_id: int = 0
+    seconds: float = 0.0
+
+    @property
+    def mods_per_second(self) -> float:
+        return self.embedded / self.seconds if self.seconds else 0.0
+
+
+async def _embed_batch(
+    batch: Sequence[PendingMod], semaphore: asyncio.Semaphore, report: BackfillReport
+) -> List[Tuple[int, List[float]]]:
+    async with semaphore:
+        try:
+            embeddings = await embedding_provider.embed([text for _, text in batch])
+        except Exception as e:
+            print(f"❌ Failed embedding batch {batch[0][0]}..{batch[-1][0]}: {e}")
+            report.failed += len(batch)
+            return []
+        finally:
+            report.requests += 1
+
+    return [(mod_id, embedding) for (mod_id, _), embedding in zip(batch, embeddings)]
+
+
+async def _next_chunk(
+    after_id: int, limit: int, game_id: Optional[int], reembed: bool
+) -> List[PendingMod]:
+    stmt = (
+        select(Mod.mod_id, Mod.name, Mod.description)
+        .where(Mod.mod_id > after_id)
+        .order_by(Mod.mod_id)
+        .limit(limit)
+    )
+    if not reembed:
+        stmt = stmt.where(Mod.embedding.is_(None))
+    if game_id is not None:
+        stmt = stmt.where(Mod.game_id == game_id)
+
+    async with SessionLocal() as session:
+        rows = (await session.execute(stmt)).all()
+    return [(row.mod_id, mod_embedding_text(row.name, row.description)) for row in rows]
+
+
+async def backfill_mod_embeddings(
+    batch_size: int = settings.backfill_batch_size,
+    concurrency: int = settings.backfill_concurrency,
+    game_id: Optional[int] = None,
+    reembed: bool = False,
+    start_after: int = 0,
+) -> BackfillReport:
+    # Vectors of another dimension or model could not be stored or compared
+    check_embedding_dimension(EMBEDDING_DIM)
+    async with SessionLocal() as session:
+        await prune_vector_changes(session)
+        await embedding_registry.claim(session)
+    report = BackfillReport(last_mod_id=start_after)
+    semaphore = asyncio.Semaphore(concurrency)
+    chunk_size = batch_size * concurrency
+    started = time.perf_counter()
+
+    while True:
+        chunk = await _next_chunk(report.last_mod_id, chunk_size, game_id, reembed)
+        if not chunk:
+            break
+
+        batches = [chunk[i:i + batch_size] for i in range(0, len(chunk), batch_size)]
+        results = await asyncio.gather(*(_embed_batch(b, semaphore, report) for b in batches))
+        rows = [
+            {"mod_id": mod_id, "embedding": embedding}
+            for batch_rows in results
+            for mod_id, embedding in batch_rows
+        ]
+
+        # Checkpoint: one bulk UPDATE + commit per chunk, logged for in-process indexes
+        if rows:
+            async with SessionLocal() as session:
+                await session.execute(update(Mod), rows)
+                record_vector_change(session, [row["mod_id"] for row in rows])
+                await session.commit()
+
+        report.embedded += len(rows)
+        report.chunks += 1
+        # Failed mods keep a NULL embedding and are picked up by the next run.
+        report.last_mod_id = chunk[-1][0]
+        report.seconds = time.perf_counter() - started
+
+        print(
+            f"  ➜ Checkpoint at mod_id {report.last_mod_id}: "
+            f"{report.embedded} embedded, {report.failed} failed, "
+            f"{report.mods_per_second:.1f} mods/s"
+        )
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+async def _main(args: argparse.Namespace) -> None:
+    print(f"🧠 Backfilling mod embeddings with {embedding_provider.model_id}...")
+    report = await backfill_mod_embeddings(
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        game_id=args.game_id,
+        reembed=args.reembed,
+        start_after=args.start_after,
+    )
+    print(
+        f"✔️ Done: {report.embedded} embedded, {report.failed} failed in "
+        f"{report.requests} requests, {report.seconds:.1f}s "
+        f"({report.mods_per_second:.1f} mods/s). Last mod_id: {report.last_mod_id}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill mod embeddings.")
+    parser.add_argument("--batch-size", type=int, default=settings.backfill_batch_size)
+    parser.add_argument("--concurrency", type=int, default=settings.backfill_concurrency)
+    parser.add_argument("--game-id", type=int, default=None)
+    parser.add_argument(
+        "--reembed",
+        action="store_true",
+        help="Re-embed mods that already have an embedding (same model; app.db.reembed changes it)",
+    )
+    parser.add_argument("--start-after", type=int, default=0, help="Resume after this mod_id")
+    asyncio.run(_main(parser.parse_args()))
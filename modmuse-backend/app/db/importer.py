@@ -0,0 +1,378 @@
+# app/db/importer.py
+"""
+Streaming bulk importer for community mod catalog dumps.
+
+Input is JSONL (one mod per line) or CSV with the same fields:
+
+    {"mod_id": 11163, "game_id": 1, "name": "Frostfall",
+     "description": "Hypothermia survival mechanics",
+     "source_url": "https://...", "version": "3.4.1",
+     "tags": ["survival", "immersion"],
+     "depends_on": [64798], "incompatible_with": []}
+
+In CSV files the list columns (tags, depends_on, incompatible_with) are
+separated with "|".
+
+Records are streamed through a generator pipeline (read -> parse -> batch),
+so memory use depends on the batch size, not on the file size. Each batch:
+
+  1. resolves tag names to tag_id with two set-based queries (creating missing tags),
+  2. COPYs mods and mod_tag rows into temp staging tables through asyncpg,
+  3. upserts them into the real tables with INSERT ... SELECT ... ON CONFLICT,
+  4. commits (so a failed import keeps every finished batch).
+
+Dependency and incompatibility edges can point at mods later in the file, so
+they accumulate in staging tables and are merged in one pass at the end.
+Edges that point at unknown mods are skipped and counted.
+
+Usage:
+
+    python -m app.db.importer catalog.jsonl
+    python -m app.db.importer catalog.csv --format csv --batch-size 5000
+
+Imported or changed mods have no embedding yet; run `python -m app.db.backfill`
+afterwards, then `python -m app.db.vector_indexes` to give games that grew
+large enough their partial ANN index.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import asyncpg
+
+from app.db.session import engine
+from app.db.vector_changes import PRUNE_VECTOR_CHANGES_SQL
+
+DEFAULT_BATCH_SIZE = 5000
+LIST_SEPARATOR = "|"
+
+
+@dataclass
+class CatalogRecord:
+    mod_id: int
+    game_id: int
+    name: str
+    description: Optional[str] = None
+    source_url: Optional[str] = None
+    version: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    depends_on: List[int] = field(default_factory=list)
+    incompatible_with: List[int] = field(default_factory=list)
+
+
+@dataclass
+class ImportReport:
+    records: int = 0
+    batches: int = 0
+    mods_upserted: int = 0
+    skipped_unknown_game: int = 0
+    tags_created: int = 0
+    mod_tags: int = 0
+    dependencies: int = 0
+    incompatibilities: int = 0
+    dangling_edges: int = 0
+    seconds: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+# ---------------------------------------------------------
+# Generator pipeline: read -> parse -> batch
+# ---------------------------------------------------------
+
+def read_raw_records(path: Path, fmt: str) -> Iterator[Dict[str, Any]]:
+    with path.open(newline="", encoding="utf-8") as f:
+        if fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            raise ValueError(f"Unsupported catalog format: {fmt!r}")
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(LIST_SEPARATOR) if part.strip()]
+    return [str(part).strip() for part in value if str(part).strip()]
+
+
+def _blank_to_none(value: Any) -> Optional[str]:
+    return None if value in (None, "") else str(value)
+
+
+def parse_record(raw: Dict[str, Any]) -> CatalogRecord:
+    return CatalogRecord(
+        mod_id=int(raw["mod_id"]),
+        game_id=int(raw["game_id"]),
+        name=str(raw["name"]),
+        description=_blank_to_none(raw.get("description")),
+        source_url=_blank_to_none(raw.get("source_url")),
+        version=_blank_to_none(raw.get("version")),
+        tags=_as_list(raw.get("tags")),
+        depends_on=[int(x) for x in _as_list(raw.get("depends_on"))],
+        incompatible_with=[int(x) for x in _as_list(raw.get("incompatible_with"))],
+    )
+
+
+def batched(records: Iterable[CatalogRecord], size: int) -> Iterator[List[CatalogRecord]]:
+    it = iter(records)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+# ---------------------------------------------------------
+# Staging + set-based upserts
+# ---------------------------------------------------------
+
+STAGING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS _import_mod (
+        seq bigint, mod_id int, game_id int, name text,
+        description text, source_url text, version text
+    );
+    CREATE TEMP TABLE IF NOT EXISTS _import_mod_tag (mod_id int, tag_id int);
+    CREATE TEMP TABLE IF NOT EXISTS _import_seen (mod_id int);
+    CREATE TEMP TABLE IF NOT EXISTS _import_dependency (mod_id int, depends_on_mod_id int);
+    CREATE TEMP TABLE IF NOT EXISTS _import_incompatibility (mod_id_a int, mod_id_b int);
+"""
+
+# The connection goes back to the pool afterwards, so staging must not outlive the run.
+STAGING_CLEANUP = """
+    DROP TABLE IF EXISTS _import_mod, _import_mod_tag, _import_seen,
+        _import_dependency, _import_incompatibility;
+"""
+
+# Later rows for the same mod_id win; a changed name/description clears the
+# embedding so the backfill job re-embeds it.
+UPSERT_MODS_SQL = """
+    WITH latest AS (
+        SELECT DISTINCT ON (s.mod_id) s.*
+        FROM _import_mod s
+        JOIN game g ON g.game_id = s.game_id
+        ORDER BY s.mod_id, s.seq DESC
+    )
+    INSERT INTO mod (mod_id, game_id, name, description, source_url, version)
+    SELECT mod_id, game_id, name, description, source_url, version FROM latest
+    ON CONFLICT (mod_id) DO UPDATE SET
+        game_id = EXCLUDED.game_id,
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        source_url = EXCLUDED.source_url,
+        version = EXCLUDED.version,
+        embedding = CASE
+            WHEN mod.name IS DISTINCT FROM EXCLUDED.name
+              OR mod.description IS DISTINCT FROM EXCLUDED.description
+            THEN NULL
+            ELSE mod.embedding
+        END
+"""
+
+# Run before UPSERT_MODS_SQL: embedded mods that lose their embedding or move
+# to another game, for in-process vector indexes (app/db/vector_changes.py).
+LOG_VECTOR_CHANGES_SQL = """
+    INSERT INTO mod_vector_change (mod_ids)
+    SELECT array_agg(DISTINCT m.mod_id)
+    FROM _import_mod s
+    JOIN mod m USING (mod_id)
+    WHERE m.embedding IS NOT NULL
+      AND (m.game_id IS DISTINCT FROM s.game_id
+        OR m.name IS DISTINCT FROM s.name
+        OR m.description IS DISTINCT FROM s.description)
+    HAVING count(*) > 0
+"""
+
+REPLACE_MOD_TAGS_SQL = """
+    DELETE FROM mod_tag WHERE mod_id IN (SELECT s.mod_id FROM _import_mod s JOIN mod m USING (mod_id));
+    INSERT INTO mod_tag (mod_id, tag_id)
+    SELECT DISTINCT t.mod_id, t.tag_id
+    FROM _import_mod_tag t
+    JOIN mod m USING (mod_id)
+    ON CONFLICT DO NOTHING;
+"""
+
+
+class CatalogImporter:
+    def __init__(self, conn: asyncpg.Connection, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        # Tag vocabulary is small compared to the catalog, so resolved ids are memoized.
+        self._tag_ids: Dict[str, int] = {}
+        self._seq = 0
+
+    async def prepare(self) -> None:
+        await self.conn.execute(STAGING_DDL)
+        await self.conn.execute(PRUNE_VECTOR_CHANGES_SQL)
+        # seed.py inserts explicit tag ids, which leaves the serial sequence behind.
+        await self.conn.execute(
+            "SELECT setval(pg_get_serial_sequence('tag', 'tag_id'), COALESCE(MAX(tag_id), 0) + 1, false) FROM tag"
+        )
+
+    async def resolve_tags(self, names: Iterable[str]) -> Dict[str, int]:
+        missing = sorted({name for name in names if name not in self._tag_ids})
+        if missing:
+            created = await self.conn.fetch(
+                "INSERT INTO tag (name) SELECT unnest($1::text[]) ON CONFLICT (name) DO NOTHING RETURNING tag_id",
+                missing,
+            )
+            self.report.tags_created += len(created)
+            rows = await self.conn.fetch(
+                "SELECT tag_id, name FROM tag WHERE name = ANY($1::text[])", missing
+            )
+            self._tag_ids.update({row["name"]: row["tag_id"] for row in rows})
+        return self._tag_ids
+
+    async def load_batch(self, batch: List[CatalogRecord]) -> None:
+        tag_ids = await self.resolve_tags(tag for rec in batch for tag in rec.tags)
+
+        mod_rows: List[Tuple[Any, ...]] = []
+        mod_tag_rows: List[Tuple[int, int]] = []
+        dependency_rows: List[Tuple[int, int]] = []
+        incompatibility_rows: List[Tuple[int, int]] = []
+        for rec in batch:
+            self._seq += 1
+            mod_rows.append((
+                self._seq, rec.mod_id, rec.game_id, rec.name,
+                rec.description, rec.source_url, rec.version,
+            ))
+            mod_tag_rows.extend((rec.mod_id, tag_ids[tag]) for tag in rec.tags)
+            dependency_rows.extend((rec.mod_id, dep) for dep in rec.depends_on if dep != rec.mod_id)
+            incompatibility_rows.extend(
+                (min(rec.mod_id, other), max(rec.mod_id, other))
+                for other in rec.incompatible_with if other != rec.mod_id
+            )
+
+        async with self.conn.transaction():
+            await self.conn.execute("TRUNCATE _import_mod, _import_mod_tag")
+            await self.conn.copy_records_to_table(
+                "_import_mod", records=mod_rows,
+                columns=["seq", "mod_id", "game_id", "name", "description", "source_url", "version"],
+            )
+            await self.conn.copy_records_to_table(
+                "_import_mod_tag", records=mod_tag_rows, columns=["mod_id", "tag_id"],
+            )
+
+            await self.conn.execute(LOG_VECTOR_CHANGES_SQL)
+            status = await self.conn.execute(UPSERT_MODS_SQL)
+            upserted = int(status.split()[-1])
+            self.report.mods_upserted += upserted
+            self.report.skipped_unknown_game += await self.conn.fetchval(
+                "SELECT count(DISTINCT s.mod_id) FROM _import_mod s "
+                "WHERE NOT EXISTS (SELECT 1 FROM game g WHERE g.game_id = s.game_id)"
+            )
+            await self.conn.execute(REPLACE_MOD_TAGS_SQL)
+
+            # Edges are merged once every mod in the file exists
+            await self.conn.execute(
+                "INSERT INTO _import_seen SELECT DISTINCT s.mod_id FROM _import_mod s JOIN mod m USING (mod_id)"
+            )
+            await self.conn.copy_records_to_table(
+                "_import_dependency", records=dependency_rows, columns=["mod_id", "depends_on_mod_id"],
+            )
+            await self.conn.copy_records_to_table(
+                "_import_incompatibility", records=incompatibility_rows, columns=["mod_id_a", "mod_id_b"],
+            )
+
+        self.report.records += len(batch)
+        self.report.batches += 1
+        self.report.mod_tags += len(mod_tag_rows)
+
+    async def merge_edges(self) -> None:
+        async with self.conn.transaction():
+            # Imported mods get exactly the edges listed in the dump.
+            await self.conn.execute(
+                "DELETE FROM dependency WHERE mod_id IN (SELECT mod_id FROM _import_seen)"
+            )
+            await self.conn.execute(
+                "DELETE FROM incompatibility WHERE mod_id_a IN (SELECT mod_id FROM _import_seen) "
+                "OR mod_id_b IN (SELECT mod_id FROM _import_seen)"
+            )
+
+            status = await self.conn.execute("""
+                INSERT INTO dependency (mod_id, depends_on_mod_id)
+                SELECT DISTINCT d.mod_id, d.depends_on_mod_id
+                FROM _import_dependency d
+                JOIN mod a ON a.mod_id = d.mod_id
+                JOIN mod b ON b.mod_id = d.depends_on_mod_id
+            """)
+            self.report.dependencies = int(status.split()[-1])
+
+            status = await self.conn.execute("""
+                INSERT INTO incompatibility (mod_id_a, mod_id_b)
+                SELECT DISTINCT i.mod_id_a, i.mod_id_b
+                FROM _import_incompatibility i
+                JOIN mod a ON a.mod_id = i.mod_id_a
+                JOIN mod b ON b.mod_id = i.mod_id_b
+                ON CONFLICT DO NOTHING
+            """)
+            self.report.incompatibilities = int(status.split()[-1])
+
+            self.report.dangling_edges = await self.conn.fetchval("""
+                SELECT
+                    (SELECT count(*) FROM _import_dependency d
+                     WHERE NOT EXISTS (SELECT 1 FROM mod m WHERE m.mod_id = d.depends_on_mod_id))
+                  + (SELECT count(*) FROM _import_incompatibility i
+                     WHERE NOT EXISTS (SELECT 1 FROM mod m WHERE m.mod_id = i.mod_id_a)
+                        OR NOT EXISTS (SELECT 1 FROM mod m WHERE m.mod_id = i.mod_id_b))
+            """)
+
+    async def run(self, records: Iterable[CatalogRecord]) -> ImportReport:
+        started = time.perf_counter()
+        await self.prepare()
+        try:
+            for batch in batched(records, self.batch_size):
+                await self.load_batch(batch)
+                self.report.seconds = time.perf_counter() - started
+                print(
+                    f"  ➜ Batch {self.report.batches}: {self.report.records} records "
+                    f"({self.report.records_per_second:.0f} records/s)"
+                )
+            await self.merge_edges()
+        finally:
+            await self.conn.execute(STAGING_CLEANUP)
+        self.report.seconds = time.perf_counter() - started
+        return self.report
+
+
+async def import_catalog(
+    path: Path, fmt: str = "jsonl", batch_size: int = DEFAULT_BATCH_SIZE
+) -> ImportReport:
+    records = (parse_record(raw) for raw in read_raw_records(path, fmt))
+
+    # Borrow a pooled connection and drive asyncpg directly for COPY support.
+    async with engine.connect() as sa_conn:
+        raw_conn = await sa_conn.get_raw_connection()
+        importer = CatalogImporter(raw_conn.driver_connection, batch_size=batch_size)
+        return await importer.run(records)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    fmt = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "jsonl")
+    print(f"📦 Importing {args.path} ({fmt})...")
+    report = await import_catalog(args.path, fmt=fmt, batch_size=args.batch_size)
+    print(
+        f"✔️ Imported {report.records} records in {report.seconds:.1f}s "
+        f"({report.records_per_second:.0f} records/s): "
+        f"{report.mods_upserted} mods upserted, {report.skipped_unknown_game} skipped (unknown game), "
+        f"{report.tags_created} new tags, {report.dependencies} dependencies, "
+        f"{report.incompatibilities} incompatibilities, {report.dangling_edges} dangling edges skipped."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a mod catalog dump into the database.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    asyncio.run(_main(parser.parse_args()))
@@ -1 +1 @@
-from .domain import Game, Mod, Tag, ModTag, Dependency, Incompatibility, Prompt, Recommendation
\ No newline at end of file
+from .domain import Game, Mod, Tag, ModTag, Dependency, Incompatibility, Prompt, Recommendation, CatalogVersion
\ No newline at end of file
@@ -2,19 +2,31 @@ from __future__ import annotations
 from datetime import datetime
 
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Column,
+    Computed,
     Integer,
     String,
     Text,
     ForeignKey,
     DateTime,
     Float,
+    Index,
+    event,
+    func,
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION
+from sqlalchemy.dialects.postgresql import ARRAY, BIT
+from app.db.vector_codec import BinaryHalfVector, BinaryVector
 
+from app.core.config import settings
 from app.db.session import Base
 
+# Dimension of mod embeddings (EMBEDDING_DIM). Live databases get it from
+# migrations / app.db.reembed; the `embedding_space` table records it.
+EMBEDDING_DIM = settings.embedding_dim
+
 
 # ==============================
 #          GAME
@@ -65,7 +77,18 @@ class Mod(Base):
     source_url: Mapped[str | None] = mapped_column(String, nullable=True)
     version: Mapped[str | None] = mapped_column(String, nullable=True)
 
-    game_id: Mapped[int] = mapped_column(ForeignKey("game.game_id"), nullable=False)
+    game_id: Mapped[int] = mapped_column(ForeignKey("game.game_id"), nullable=False, index=True)
+
+    embedding: Mapped[list[float] | None] = mapped_column(BinaryVector(EMBEDDING_DIM), nullable=True)
+
+    # 1 bit per dimension (sign) copy of `embedding`, kept in sync by Postgres.
+    # Used for a coarse Hamming-distance candidate search that is then rescored
+    # exactly (settings.vector_quantization = "binary").
+    embedding_bq: Mapped[str | None] = mapped_column(
+        BIT(EMBEDDING_DIM),
+        Computed(f"binary_quantize(embedding)::bit({EMBEDDING_DIM})", persisted=True),
+        nullable=True,
+    )
 
     # Relations
     game: Mapped["Game"] = relationship(back_populates="mods")
@@ -93,6 +116,26 @@ class Mod(Base):
         cascade="all, delete-orphan"
     )
 
+    # ANN indexes for `embedding <=> :query` (cosine distance) and
+    # `embedding_bq <~> :bits` (Hamming distance). Per-game partial indexes are
+    # managed separately, see app/db/vector_indexes.py.
+    __table_args__ = (
+        Index(
+            "ix_mod_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+        Index(
+            "ix_mod_embedding_bq_hnsw",
+            "embedding_bq",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding_bq": "bit_hamming_ops"},
+        ),
+    )
+
 
 # ==============================
 #         MOD <-> TAG JOIN
@@ -163,11 +206,28 @@ class Prompt(Base):
     extracted_keywords: Mapped[str] = mapped_column(Text, nullable=False)
     model_version: Mapped[str] = mapped_column(String, nullable=False)
 
+    # Cache key for the prompt-embedding cache (see services/embedding_cache.py)
+    normalized_prompt: Mapped[str | None] = mapped_column(Text, nullable=True)
+    embedding_model: Mapped[str | None] = mapped_column(String, nullable=True)
+
+    # Game the prompt was answered for, and the catalog version its
+    # recommendations were computed under. catalog_version is NULL for partial
+    # (degraded) answers, which are never reused (see services/semantic_cache.py).
+    game_id: Mapped[int | None] = mapped_column(ForeignKey("game.game_id"), nullable=True)
+    catalog_version: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    # Half precision, no fixed dimension: only reused as a query vector
+    # (embedding cache tier 2), where float16 rounding does not change rankings
     embedding: Mapped[list[float] | None] = mapped_column(
-        ARRAY(DOUBLE_PRECISION),
+        BinaryHalfVector(),
         nullable=True
     )
 
+    __table_args__ = (
+        Index("ix_prompt_normalized_prompt_model", "normalized_prompt", "embedding_model"),
+        Index("ix_prompt_game_id_catalog_version", "game_id", "catalog_version"),
+    )
+
     recommendations: Mapped[list["Recommendation"]] = relationship(
         back_populates="prompt",
         cascade="all, delete-orphan"
@@ -190,3 +250,94 @@ class Recommendation(Base):
 
     prompt: Mapped["Prompt"] = relationship(back_populates="recommendations")
     mod: Mapped["Mod"] = relationship()
+
+
+# ==============================
+#      CATALOG VERSION
+# ==============================
+
+# Tables whose changes can change recommendation results or the game list
+CATALOG_TABLES = ("game", "mod", "tag", "mod_tag", "dependency", "incompatibility")
+
+
+class CatalogVersion(Base):
+    """
+    Single-row counter bumped by statement-level triggers on every catalog
+    table, so caches can tell when mods/tags/compatibility data changed.
+    """
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+# ==============================
+#      EMBEDDING SPACE
+# ==============================
+
+class EmbeddingSpace(Base):
+    """
+    Which embedding model and dimension produced the vectors of a stored
+    column ("mod.embedding"). Written by the backfill and re-embed jobs,
+    checked against the configured provider (see services/embedding_registry.py).
+    """
+    __tablename__ = "embedding_space"
+
+    column_name: Mapped[str] = mapped_column(String, primary_key=True)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    dimensions: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+# ==============================
+#      MOD VECTOR CHANGES
+# ==============================
+
+class ModVectorChange(Base):
+    """
+    Append-only log of mods whose stored embedding may have changed, written
+    by the jobs that change them (backfill, importer, re-embed). In-process
+    vector indexes replay it instead of reloading every game
+    (see app/db/vector_changes.py). mod_ids NULL means "every mod".
+    """
+    __tablename__ = "mod_vector_change"
+
+    change_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    mod_ids: Mapped[list[int] | None] = mapped_column(ARRAY(Integer), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+    )
+
+
+# Triggers for databases built with metadata.create_all (seed.py);
+# migrated databases get the same objects from alembic.
+_BUMP_CATALOG_VERSION_FN = DDL("""
+    CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE catalog_version SET version = version + 1, updated_at = now() WHERE id = 1;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+""")
+
+event.listen(Base.metadata, "after_create", _BUMP_CATALOG_VERSION_FN)
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING"),
+)
+for _table in CATALOG_TABLES:
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER trg_catalog_version_{_table} "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {_table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()"
+        ),
+    )
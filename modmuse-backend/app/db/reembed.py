@@ -0,0 +1,191 @@
+# app/db/reembed.py
+"""
+Re-embed the catalog into a new embedding space (model and/or dimension).
+
+The configured provider (EMBEDDING_PROVIDER / EMBEDDING_MODEL / EMBEDDING_DIM)
+is the target, e.g. EMBEDDING_DIM=512 for shortened text-embedding-3-small
+vectors. New vectors go to a shadow column, so searches keep using the old
+ones until the swap:
+
+1. `mod.embedding_next vector(<dim>)` is added.
+2. Every mod that has an embedding is embedded again into it, in committed,
+   keyset-paginated chunks like the backfill. Re-running resumes.
+3. One transaction swaps the columns: `embedding` and `embedding_bq` (and
+   with them all their ANN indexes) are dropped, the shadow column is renamed
+   to `embedding`, `embedding_bq` and the global HNSW indexes are recreated at
+   the new dimension, `embedding_space` records the new space, every mod is
+   logged as changed (app.db.vector_changes) and the catalog version is
+   bumped. Mods added meanwhile are embedded first.
+4. Per-game partial indexes are rebuilt (app.db.vector_indexes).
+
+API processes still configured for the old space refuse the new vectors
+after the swap (their vector search fails and requests fall back to keyword
+results); restart them with the new EMBEDDING_* settings.
+
+Usage:
+
+    EMBEDDING_DIM=512 python -m app.db.reembed --batch-size 256 --concurrency 4
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from sqlalchemy import bindparam, text
+
+from app.core.config import settings
+from app.db.backfill import BackfillReport, PendingMod, _embed_batch, mod_embedding_text
+from app.db.session import SessionLocal, engine
+from app.db.vector_changes import prune_vector_changes, record_vector_change
+from app.db.vector_codec import BinaryVector
+from app.db.vector_indexes import HNSW_EF_CONSTRUCTION, HNSW_M, sync_game_vector_indexes
+from app.services.embedding_registry import embedding_registry
+from app.services.embedding_service import embedding_provider
+
+# pgvector cannot build HNSW indexes on wider `vector` columns
+HNSW_MAX_DIMENSIONS = 2000
+# Swap attempts when mods keep arriving during the last fill
+MAX_SWAP_ATTEMPTS = 3
+
+_HNSW_WITH = f"WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+
+_PENDING = "embedding IS NOT NULL AND embedding_next IS NULL"
+
+_UPDATE_SHADOW = text(
+    "UPDATE mod SET embedding_next = :embedding WHERE mod_id = :mod_id"
+).bindparams(bindparam("embedding", type_=BinaryVector()))
+
+
+async def _next_chunk(after_id: int, limit: int) -> List[PendingMod]:
+    async with SessionLocal() as session:
+        rows = (await session.execute(
+            text(f"""
+                SELECT mod_id, name, description
+                FROM mod
+                WHERE mod_id > :after_id AND {_PENDING}
+                ORDER BY mod_id
+                LIMIT :limit
+            """),
+            {"after_id": after_id, "limit": limit},
+        )).all()
+    return [(row.mod_id, mod_embedding_text(row.name, row.description)) for row in rows]
+
+
+async def fill_shadow_column(batch_size: int, concurrency: int, report: BackfillReport) -> None:
+    """Step 2: embed every pending mod into `embedding_next`."""
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter() - report.seconds
+    after_id = 0
+
+    while True:
+        chunk = await _next_chunk(after_id, batch_size * concurrency)
+        if not chunk:
+            break
+
+        batches = [chunk[i:i + batch_size] for i in range(0, len(chunk), batch_size)]
+        results = await asyncio.gather(*(_embed_batch(b, semaphore, report) for b in batches))
+        rows = [
+            {"mod_id": mod_id, "embedding": embedding}
+            for batch_rows in results
+            for mod_id, embedding in batch_rows
+        ]
+        if rows:
+            async with SessionLocal() as session:
+                await session.execute(_UPDATE_SHADOW, rows)
+                await session.commit()
+
+        report.embedded += len(rows)
+        report.chunks += 1
+        # Failed mods stay pending; the next fill (or run) retries them.
+        after_id = report.last_mod_id = chunk[-1][0]
+        report.seconds = time.perf_counter() - started
+        print(
+            f"  ➜ Checkpoint at mod_id {after_id}: {report.embedded} re-embedded, "
+            f"{report.failed} failed, {report.mods_per_second:.1f} mods/s"
+        )
+
+
+async def swap_columns(dim: int) -> bool:
+    """Step 3. False (nothing changed) if mods are still pending."""
+    async with SessionLocal() as session:
+        # Blocks writes to mod until the swap commits
+        await session.execute(text("LOCK TABLE mod IN SHARE ROW EXCLUSIVE MODE"))
+        pending = (await session.execute(text(f"SELECT count(*) FROM mod WHERE {_PENDING}"))).scalar_one()
+        if pending:
+            await session.rollback()
+            return False
+
+        # Dropping a column drops every index on it (global and per-game)
+        await session.execute(text("ALTER TABLE mod DROP COLUMN IF EXISTS embedding_bq"))
+        await session.execute(text("ALTER TABLE mod DROP COLUMN embedding"))
+        await session.execute(text("ALTER TABLE mod RENAME COLUMN embedding_next TO embedding"))
+        await session.execute(text(
+            f"ALTER TABLE mod ADD COLUMN embedding_bq bit({dim}) "
+            f"GENERATED ALWAYS AS (binary_quantize(embedding)::bit({dim})) STORED"
+        ))
+        await session.execute(text(
+            f"CREATE INDEX ix_mod_embedding_hnsw ON mod USING hnsw (embedding vector_cosine_ops) {_HNSW_WITH}"
+        ))
+        await session.execute(text(
+            f"CREATE INDEX ix_mod_embedding_bq_hnsw ON mod USING hnsw (embedding_bq bit_hamming_ops) {_HNSW_WITH}"
+        ))
+        await embedding_registry.record(session)
+        await prune_vector_changes(session)
+        record_vector_change(session, None)
+        # DDL fires no triggers: tell every process the vectors changed
+        await session.execute(text(
+            "UPDATE catalog_version SET version = version + 1, updated_at = now() WHERE id = 1"
+        ))
+        await session.commit()
+    return True
+
+
+async def reembed_catalog(
+    batch_size: int = settings.backfill_batch_size,
+    concurrency: int = settings.backfill_concurrency,
+) -> BackfillReport:
+    dim = embedding_provider.dim
+    if dim > HNSW_MAX_DIMENSIONS:
+        raise ValueError(
+            f"{embedding_provider.model_id} produces {dim}-dim vectors; HNSW indexes need "
+            f"<= {HNSW_MAX_DIMENSIONS}, set EMBEDDING_DIM lower"
+        )
+
+    async with SessionLocal() as session:
+        await session.execute(text(f"ALTER TABLE mod ADD COLUMN IF NOT EXISTS embedding_next vector({dim})"))
+        await session.commit()
+
+    report = BackfillReport()
+    for attempt in range(1, MAX_SWAP_ATTEMPTS + 1):
+        await fill_shadow_column(batch_size, concurrency, report)
+        if await swap_columns(dim):
+            break
+        print(f"⚠️ Mods still pending at swap attempt {attempt}, embedding them first")
+    else:
+        raise RuntimeError(
+            f"Mods still pending after {MAX_SWAP_ATTEMPTS} swap attempts (embedding failures?); "
+            f"re-run to resume"
+        )
+
+    async with SessionLocal() as session:
+        await sync_game_vector_indexes(session)
+        await session.commit()
+    return report
+
+
+async def _main(args: argparse.Namespace) -> None:
+    print(f"🧠 Re-embedding the catalog with {embedding_provider.model_id} ({embedding_provider.dim} dims)...")
+    report = await reembed_catalog(batch_size=args.batch_size, concurrency=args.concurrency)
+    print(
+        f"✔️ Done: {report.embedded} re-embedded, {report.failed} failed in {report.requests} requests, "
+        f"{report.seconds:.1f}s. mod.embedding is now {embedding_provider.model_id}; "
+        f"restart API processes with the same EMBEDDING_* settings."
+    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed mods into the configured embedding space.")
+    parser.add_argument("--batch-size", type=int, default=settings.backfill_batch_size)
+    parser.add_argument("--concurrency", type=int, default=settings.backfill_concurrency)
+    asyncio.run(_main(parser.parse_args()))
@@ -1,8 +1,165 @@
 # app/db/repositories.py
 """
-Repository classes for accessing GAME, MOD, TAG, etc. tables
-will be added here in Part 3.
+Repository classes for accessing GAME, MOD, TAG, etc. tables.
 
-For now, this file is just a placeholder to show the intended layering:
+Intended layering:
 - services -> repositories -> database
-"""
\ No newline at end of file
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Integer, bindparam, insert, text
+from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models_utils.domain import Prompt, Recommendation
+from app.db.vector_codec import BinaryHalfVector
+
+
+@dataclass
+class RecommendationRow:
+    mod_id: int
+    relevance_score: float
+    rank_order: int
+
+
+@dataclass
+class PromptHistoryEntry:
+    """One prompt plus its ranked recommendations, ready to be persisted."""
+    user_prompt: str
+    created_at: datetime
+    extracted_keywords: List[str]
+    model_version: str
+    normalized_prompt: Optional[str] = None
+    embedding_model: Optional[str] = None
+    embedding: Optional[List[float]] = None
+    game_id: Optional[int] = None
+    # Catalog version of a complete answer; None marks it as not reusable
+    catalog_version: Optional[int] = None
+    recommendations: List[RecommendationRow] = field(default_factory=list)
+
+
+@dataclass
+class SavedHistory:
+    # None when the entry was queued for write-behind instead of saved
+    prompt_id: Optional[int]
+    # rec_id for each recommendation, in the same order as entry.recommendations
+    rec_ids: List[Optional[int]]
+
+
+# Prompt + all of its recommendation rows in one statement / one round-trip,
+# regardless of how many mods were recommended.
+_SAVE_PROMPT_WITH_RECOMMENDATIONS = text("""
+    WITH new_prompt AS (
+        INSERT INTO prompt (
+            user_prompt, created_at, extracted_keywords, model_version,
+            normalized_prompt, embedding_model, embedding, game_id, catalog_version
+        )
+        VALUES (
+            :user_prompt, :created_at, :extracted_keywords, :model_version,
+            :normalized_prompt, :embedding_model, :embedding, :game_id, :catalog_version
+        )
+        RETURNING prompt_id
+    ),
+    new_recs AS (
+        INSERT INTO recommendation (prompt_id, mod_id, relevance_score, rank_order)
+        SELECT new_prompt.prompt_id, r.mod_id, r.relevance_score, r.rank_order
+        FROM new_prompt,
+             unnest(:mod_ids, :scores, :ranks) AS r(mod_id, relevance_score, rank_order)
+        RETURNING rec_id, rank_order
+    )
+    SELECT new_prompt.prompt_id, new_recs.rec_id, new_recs.rank_order
+    FROM new_prompt
+    LEFT JOIN new_recs ON true
+    ORDER BY new_recs.rank_order
+""").bindparams(
+    bindparam("embedding", type_=BinaryHalfVector()),
+    bindparam("mod_ids", type_=ARRAY(Integer)),
+    bindparam("scores", type_=ARRAY(DOUBLE_PRECISION)),
+    bindparam("ranks", type_=ARRAY(Integer)),
+)
+
+
+class PromptHistoryRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def save(self, entry: PromptHistoryEntry) -> SavedHistory:
+        recs = entry.recommendations
+        result = await self.session.execute(
+            _SAVE_PROMPT_WITH_RECOMMENDATIONS,
+            {
+                "user_prompt": entry.user_prompt,
+                "created_at": entry.created_at,
+                "extracted_keywords": ",".join(entry.extracted_keywords),
+                "model_version": entry.model_version,
+                "normalized_prompt": entry.normalized_prompt,
+                "embedding_model": entry.embedding_model,
+                "embedding": entry.embedding,
+                "game_id": entry.game_id,
+                "catalog_version": entry.catalog_version,
+                "mod_ids": [r.mod_id for r in recs],
+                "scores": [float(r.relevance_score) for r in recs],
+                "ranks": [r.rank_order for r in recs],
+            },
+        )
+        rows = result.all()
+
+        rec_id_by_rank = {row.rank_order: row.rec_id for row in rows if row.rec_id is not None}
+        return SavedHistory(
+            prompt_id=rows[0].prompt_id,
+            rec_ids=[rec_id_by_rank[r.rank_order] for r in recs],
+        )
+
+    async def save_many(self, entries: Sequence[PromptHistoryEntry]) -> List[SavedHistory]:
+        """
+        Persist many prompts (e.g. from several requests) in two statements:
+        one multi-row prompt INSERT ... RETURNING, one multi-row recommendation
+        INSERT ... RETURNING. Results are in the order of `entries`.
+        """
+        if not entries:
+            return []
+
+        prompt_ids = (await self.session.scalars(
+            insert(Prompt).returning(Prompt.prompt_id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_prompt": e.user_prompt,
+                    "created_at": e.created_at,
+                    "extracted_keywords": ",".join(e.extracted_keywords),
+                    "model_version": e.model_version,
+                    "normalized_prompt": e.normalized_prompt,
+                    "embedding_model": e.embedding_model,
+                    "embedding": e.embedding,
+                    "game_id": e.game_id,
+                    "catalog_version": e.catalog_version,
+                }
+                for e in entries
+            ],
+        )).all()
+
+        rec_params = [
+            {
+                "prompt_id": prompt_id,
+                "mod_id": r.mod_id,
+                "relevance_score": float(r.relevance_score),
+                "rank_order": r.rank_order,
+            }
+            for prompt_id, e in zip(prompt_ids, entries)
+            for r in e.recommendations
+        ]
+        rec_ids: List[int] = []
+        if rec_params:
+            rec_ids = list((await self.session.scalars(
+                insert(Recommendation).returning(Recommendation.rec_id, sort_by_parameter_order=True),
+                rec_params,
+            )).all())
+
+        saved: List[SavedHistory] = []
+        offset = 0
+        for prompt_id, e in zip(prompt_ids, entries):
+            count = len(e.recommendations)
+            saved.append(SavedHistory(prompt_id=prompt_id, rec_ids=list(rec_ids[offset:offset + count])))
+            offset += count
+        return saved
@@ -1,10 +1,9 @@
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from openai import AsyncOpenAI
+from sqlalchemy import text
 
 from app.db.session import Base, SessionLocal, engine
-from app.db.models import (
+from app.db.models_utils.domain import (
     Game,
     Tag,
     Mod,
@@ -12,9 +11,8 @@ from app.db.models import (
     Dependency,
     Incompatibility,
 )
-from app.db.models import *
-
-client = AsyncOpenAI()
+from app.db.backfill import backfill_mod_embeddings
+from app.db.vector_indexes import sync_game_vector_indexes
 
 # ======================================================
 # MAIN SEED FUNCTION
@@ -25,9 +23,13 @@ async def seed_data():
 
     async with engine.begin() as conn:
         # Wipe ALL tables (development only!)
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
 
+    # Connections opened before the extension existed have no vector codec
+    await engine.dispose()
+
     async with SessionLocal() as session:
         # Creation (games, tags, mods, etc.)
         await create_games(session)
@@ -40,11 +42,15 @@ async def seed_data():
         await session.commit()
         print("✔️ Base data inserted.")
 
-        # Embeddings step
-        await generate_mod_embeddings(session)
+    # Embeddings step (commits in its own checkpointed chunks)
+    await generate_mod_embeddings()
+
+    # Per-game partial ANN indexes, for games large enough to need one
+    async with SessionLocal() as session:
+        await sync_game_vector_indexes(session)
         await session.commit()
 
-        print("🌱 Database fully seeded with embeddings!")
+    print("🌱 Database fully seeded with embeddings!")
 
 
 # ======================================================
@@ -174,34 +180,16 @@ async def create_incompatibilities(session: AsyncSession):
 # 7. GENERATE EMBEDDINGS (OPENAI)
 # ======================================================
 
-async def generate_mod_embeddings(session: AsyncSession):
+async def generate_mod_embeddings():
     print("🧠 Generating embeddings for mods...")
 
-    result = await session.execute(select(Mod))
-    mods = result.scalars().all()
-
-    for mod in mods:
-        if mod.embedding is not None:
-            print(f"  ➜ Skipping {mod.name} (already embedded)")
-            continue
-
-        text = f"{mod.name}: {mod.description or ''}"
-
-        print(f"  ➜ Embedding: {mod.name}")
-
-        try:
-            response = await client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text,
-            )
-            embedding = response.data[0].embedding
-            mod.embedding = embedding # type: ignore[assignment]
-
-        except Exception as e:
-            print(f"❌ Failed embedding {mod.name}: {e}")
-            continue
+    # Batched + checkpointed; also runnable on its own via `python -m app.db.backfill`
+    report = await backfill_mod_embeddings()
 
-    print("✔️ Finished generating embeddings.")
+    print(
+        f"✔️ Finished generating embeddings "
+        f"({report.embedded} embedded, {report.failed} failed, {report.mods_per_second:.1f} mods/s)."
+    )
 
 
 # ======================================================
@@ -1,8 +1,16 @@
+import asyncio
 import os
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Dict
 from dotenv import load_dotenv
+from sqlalchemy import exc, text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+from app.db.vector_codec import install_vector_codec
 
 load_dotenv()
 
@@ -12,12 +20,54 @@ if DATABASE_URL is None:
 
 Base = declarative_base()
 
+
+# -----------------------------------------------------------
+# Pool instrumentation
+#
+# Kept at module level rather than on the pool: SQLAlchemy
+# replaces the pool object on dispose()/recreate().
+# -----------------------------------------------------------
+pool_acquire_histogram = Histogram()
+pool_acquire_timeouts = 0
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    def _do_get(self):
+        global pool_acquire_timeouts
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_acquire_timeouts += 1
+            raise
+        finally:
+            pool_acquire_histogram.observe(time.perf_counter() - started)
+
+
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,
-    future=True
+    future=True,
+    poolclass=TimedQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    connect_args={
+        # asyncpg's own statement cache, and SQLAlchemy's cache of prepared
+        # statements per connection (set both to 0 behind pgbouncer in
+        # transaction mode)
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+    },
 )
 
+# Embeddings travel as binary float32 (see app/db/vector_codec.py)
+install_vector_codec(engine)
+
 SessionLocal = async_sessionmaker(
     bind=engine,
     expire_on_commit=False,
@@ -28,3 +78,44 @@ SessionLocal = async_sessionmaker(
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         yield session
+
+
+async def warm_pool(connections: int) -> int:
+    """
+    Open `connections` pooled connections concurrently, run a trivial query on
+    each (TCP/TLS/auth plus asyncpg type introspection), then return them to
+    the pool, so the first requests after startup do not pay for it.
+    Returns how many connections were warmed.
+    """
+    connections = min(connections, settings.db_pool_size)
+    if connections <= 0:
+        return 0
+
+    conns = [engine.connect() for _ in range(connections)]
+    results = await asyncio.gather(*(conn.start() for conn in conns), return_exceptions=True)
+    opened = [conn for conn, result in zip(conns, results) if not isinstance(result, BaseException)]
+    try:
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in opened))
+    finally:
+        for conn in opened:
+            await conn.close()
+
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if failures:
+        print(f"⚠️ Pool warmup: {len(failures)} of {connections} connections failed: {failures[0]}")
+    return len(opened)
+
+
+def pool_stats() -> Dict[str, object]:
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # Negative while the pool is below `size` (connections are opened lazily)
+        "overflow": pool.overflow(),
+        "max_overflow": settings.db_max_overflow,
+        "timeout_seconds": settings.db_pool_timeout,
+        "acquire_timeouts": pool_acquire_timeouts,
+        "acquire_wait": pool_acquire_histogram.snapshot(),
+    }
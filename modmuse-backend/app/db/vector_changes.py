@@ -0,0 +1,54 @@
+# app/db/vector_changes.py
+"""
+Log of mods whose stored embedding may have changed (`mod_vector_change`).
+
+The jobs that write `mod.embedding` run in their own processes: the backfill
+logs the mod ids of every committed chunk, the importer the mods of every
+batch (a changed name or description clears the embedding, a mod can move to
+another game), and the re-embed swap logs a NULL row, meaning every mod.
+Each entry is inserted in the transaction that makes the change.
+
+API processes with the in-process NumPy index replay the entries after their
+last sync when the catalog version changes: they re-read just those mods and
+upsert or remove them in the loaded partitions instead of reloading every
+game (services/vector_index.py). Replaying an entry twice is harmless, it
+re-reads the current rows.
+
+Entries older than CHANGE_RETENTION_SECONDS are pruned by the writers; an
+index that has not synced for that long reloads instead.
+"""
+from typing import List, Optional, Sequence
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models_utils.domain import ModVectorChange
+
+CHANGE_RETENTION_SECONDS = 24 * 3600
+
+PRUNE_VECTOR_CHANGES_SQL = (
+    f"DELETE FROM mod_vector_change WHERE created_at < now() - interval '{CHANGE_RETENTION_SECONDS} seconds'"
+)
+
+
+def record_vector_change(session: AsyncSession, mod_ids: Optional[Sequence[int]]) -> None:
+    """Log a change of `mod_ids` (None: every mod) in the session's transaction."""
+    session.add(ModVectorChange(mod_ids=None if mod_ids is None else list(mod_ids)))
+
+
+async def prune_vector_changes(session: AsyncSession) -> None:
+    await session.execute(text(PRUNE_VECTOR_CHANGES_SQL))
+
+
+async def latest_change_id(session: AsyncSession) -> int:
+    return (await session.execute(select(func.coalesce(func.max(ModVectorChange.change_id), 0)))).scalar_one()
+
+
+async def read_vector_changes(session: AsyncSession, after_id: int, limit: int) -> List[ModVectorChange]:
+    """Entries after `after_id`, oldest first."""
+    return list((await session.execute(
+        select(ModVectorChange)
+        .where(ModVectorChange.change_id > after_id)
+        .order_by(ModVectorChange.change_id)
+        .limit(limit)
+    )).scalars())
@@ -0,0 +1,159 @@
+# app/db/vector_codec.py
+"""
+Binary wire codecs for pgvector's `vector` and `halfvec` types on asyncpg
+connections.
+
+pgvector's binary format is a `>HH` header (dimensions, unused) followed by
+big-endian float32 (`vector`) or float16 (`halfvec`) values. Registering it with `set_type_codec(format="binary")`
+means query embeddings are sent as 4 bytes per dimension instead of ~20
+characters of formatted decimal text that Postgres then has to parse, and
+stored embeddings come back as float32 arrays without going through text.
+
+- encode: arrays are converted (dtype + byte order) in one pass straight into
+  the wire buffer; lists and tuples go through one float32 `fromiter` first,
+  text is parsed.
+- decode: a zero-copy big-endian view of the payload, converted once to a
+  native float32 ndarray. Arrays (`vector[]`) reuse the element codec; as
+  asyncpg reads nested lists as multi-dimensional arrays, `vector[]`
+  parameters are passed as already-encoded elements (see `encode_vector`).
+
+`halfvec` (pgvector >= 0.7) stores prompt history at 2 bytes per dimension;
+it decodes to float32 like `vector`, so callers never see float16.
+
+`install_vector_codec(engine)` registers the codecs on every new pooled
+connection. `BinaryVector` / `BinaryHalfVector` are the SQLAlchemy column
+types to go with them: they hand values to the codec untouched instead of
+formatting them as text.
+"""
+import struct
+from typing import Any, Optional, Sequence, Union
+
+import numpy as np
+from pgvector.sqlalchemy import HALFVEC, VECTOR
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+_HEADER = struct.Struct(">HH")
+_VECTOR_DTYPE = np.dtype(">f4")
+_HALFVEC_DTYPE = np.dtype(">f2")
+
+VectorLike = Union[np.ndarray, Sequence[float], str, bytes, bytearray]
+
+
+def parse_vector_text(value: str) -> np.ndarray:
+    """Parse pgvector's text form ("[0.1,0.2,...]") into a float32 array."""
+    return np.array(value.strip("[]").split(","), dtype=np.float32)
+
+
+def _encode(value: VectorLike, wire_dtype: np.dtype) -> Union[bytes, bytearray]:
+    if isinstance(value, (bytes, bytearray)):
+        # Already in wire format (pre-encoded vector[] elements)
+        return value
+    if isinstance(value, str):
+        value = parse_vector_text(value)
+    if isinstance(value, (list, tuple)):
+        # fromiter skips the float64 intermediate np.asarray would build
+        value = np.fromiter(value, dtype=np.float32, count=len(value))
+    values = np.asarray(value)
+    if values.ndim != 1:
+        raise ValueError(f"expected a 1-d vector, got shape {values.shape}")
+
+    dims = values.shape[0]
+    buf = bytearray(_HEADER.size + wire_dtype.itemsize * dims)
+    _HEADER.pack_into(buf, 0, dims, 0)
+    # Converts (dtype + byte order) directly into the wire buffer
+    np.frombuffer(buf, dtype=wire_dtype, offset=_HEADER.size)[:] = values
+    return buf
+
+
+def _decode(data: bytes, wire_dtype: np.dtype) -> np.ndarray:
+    dims, unused = _HEADER.unpack_from(data)
+    if unused != 0 or len(data) != _HEADER.size + wire_dtype.itemsize * dims:
+        raise ValueError("malformed binary vector")
+    return np.frombuffer(data, dtype=wire_dtype, count=dims, offset=_HEADER.size).astype(np.float32)
+
+
+def encode_vector(value: VectorLike) -> Union[bytes, bytearray]:
+    return _encode(value, _VECTOR_DTYPE)
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    return _decode(data, _VECTOR_DTYPE)
+
+
+def encode_halfvec(value: VectorLike) -> Union[bytes, bytearray]:
+    # Values outside float16 range become inf, which halfvec rejects
+    return _encode(value, _HALFVEC_DTYPE)
+
+
+def decode_halfvec(data: bytes) -> np.ndarray:
+    return _decode(data, _HALFVEC_DTYPE)
+
+
+# pgvector type name -> (encoder, decoder)
+_CODECS = {
+    "vector": (encode_vector, decode_vector),
+    "halfvec": (encode_halfvec, decode_halfvec),
+}
+
+
+async def register_vector_codec(conn: Any, schema: str = "public") -> bool:
+    """
+    Register the binary codecs on one asyncpg connection. Returns False when a
+    type is missing: the extension is not installed yet (e.g. a fresh
+    database), or is older than 0.7 and has no `halfvec`.
+    """
+    registered = True
+    for type_name, (encoder, decoder) in _CODECS.items():
+        try:
+            await conn.set_type_codec(
+                type_name,
+                schema=schema,
+                encoder=encoder,
+                decoder=decoder,
+                format="binary",
+            )
+        except ValueError as e:
+            if "unknown type" not in str(e):
+                raise
+            print(f"⚠️ pgvector type {type_name!r} not available; its codec is not registered on this connection")
+            registered = False
+    return registered
+
+
+def install_vector_codec(engine: AsyncEngine) -> None:
+    """Register the codecs on every connection the engine's pool opens."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        dbapi_connection.run_async(register_vector_codec)
+
+
+class _BinaryProcessing:
+    """Binds pass lists/arrays through to the codec, results come back as lists."""
+
+    def bind_processor(self, dialect: Any) -> None:
+        return None
+
+    def result_processor(self, dialect: Any, coltype: Any) -> Any:
+        def process(value: Optional[Union[np.ndarray, str]]) -> Optional[list]:
+            if value is None:
+                return None
+            if isinstance(value, str):
+                # Connection without the codec (extension created after connect)
+                return parse_vector_text(value).tolist()
+            return value.tolist()
+
+        return process
+
+
+class BinaryVector(_BinaryProcessing, VECTOR):
+    """pgvector `vector` column type for connections with the binary codec."""
+
+    cache_ok = True
+
+
+class BinaryHalfVector(_BinaryProcessing, HALFVEC):
+    """pgvector `halfvec` column type for connections with the binary codec."""
+
+    cache_ok = True
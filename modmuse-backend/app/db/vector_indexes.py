@@ -0,0 +1,166 @@
+# app/db/vector_indexes.py
+"""
+Helpers for the pgvector ANN indexes on `mod.embedding`.
+
+The global HNSW indexes are declared on the Mod model. On top of that every
+game with at least GAME_VECTOR_INDEX_MIN_MODS embedded mods gets partial HNSW
+indexes (`WHERE game_id = <id>`) on `embedding` and on its binary quantized
+copy `embedding_bq`, so a per-game similarity query only walks that
+game's graph instead of filtering a global one. Smaller games get none: an
+exact scan of their rows through `ix_mod_game_id` is cheaper than an ANN walk
+and has perfect recall, and catalogs range from a handful of mods to tens of
+thousands.
+
+    python -m app.db.vector_indexes            # create/drop to match catalog sizes
+    python -m app.db.vector_indexes --dry-run
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import settings
+
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 64
+
+# Indexed column -> operator class of its per-game partial index
+GAME_INDEX_OPS = {
+    "embedding": "vector_cosine_ops",
+    "embedding_bq": "bit_hamming_ops",
+}
+
+
+def game_vector_index_name(game_id: int, column: str = "embedding") -> str:
+    return f"ix_mod_{column}_hnsw_game_{int(game_id)}"
+
+
+def game_vector_index_names(game_id: int) -> List[str]:
+    return [game_vector_index_name(game_id, column) for column in GAME_INDEX_OPS]
+
+
+def game_vector_index_ddl(game_id: int, column: str = "embedding") -> str:
+    # DDL cannot take bind parameters; game_id is forced to int above and here.
+    game_id = int(game_id)
+    return (
+        f"CREATE INDEX IF NOT EXISTS {game_vector_index_name(game_id, column)} "
+        f"ON mod USING hnsw ({column} {GAME_INDEX_OPS[column]}) "
+        f"WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION}) "
+        f"WHERE game_id = {game_id}"
+    )
+
+
+async def ensure_game_vector_index(conn: AsyncConnection | AsyncSession, game_id: int) -> None:
+    """Create the partial ANN indexes for a newly added game (idempotent)."""
+    for column in GAME_INDEX_OPS:
+        await conn.execute(text(game_vector_index_ddl(game_id, column)))
+
+
+@dataclass
+class VectorIndexSyncReport:
+    created: List[int] = field(default_factory=list)
+    dropped: List[int] = field(default_factory=list)
+    kept: List[int] = field(default_factory=list)
+
+
+async def sync_game_vector_indexes(
+    conn: AsyncConnection | AsyncSession,
+    min_mods: int = settings.game_vector_index_min_mods,
+    dry_run: bool = False,
+) -> VectorIndexSyncReport:
+    """
+    Give every game with at least `min_mods` embedded mods its partial ANN
+    indexes and drop those of games below it (or no longer present).
+    """
+    counts = dict((await conn.execute(text("""
+        SELECT g.game_id, count(m.mod_id)
+        FROM game g
+        LEFT JOIN mod m ON m.game_id = g.game_id AND m.embedding IS NOT NULL
+        GROUP BY g.game_id
+    """))).tuples().all())
+    existing = set((await conn.execute(text("""
+        SELECT indexname FROM pg_indexes
+        WHERE tablename = 'mod'
+          AND (indexname LIKE 'ix_mod_embedding_hnsw_game_%'
+               OR indexname LIKE 'ix_mod_embedding_bq_hnsw_game_%')
+    """))).scalars().all())
+
+    report = VectorIndexSyncReport()
+    for game_id, count in sorted(counts.items()):
+        names = game_vector_index_names(game_id)
+        has_all = all(name in existing for name in names)
+        has_any = any(name in existing for name in names)
+        if count >= min_mods and not has_all:
+            report.created.append(game_id)
+        elif count < min_mods and has_any:
+            report.dropped.append(game_id)
+        elif has_all:
+            report.kept.append(game_id)
+
+    # Indexes of deleted games
+    known = {name for game_id in counts for name in game_vector_index_names(game_id)}
+    stale = sorted(existing - known)
+
+    if not dry_run:
+        for game_id in report.created:
+            await ensure_game_vector_index(conn, game_id)
+        for game_id in report.dropped:
+            for name in game_vector_index_names(game_id):
+                await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for name in stale:
+            await conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+    return report
+
+
+async def apply_search_tuning(session: AsyncSession, ef_search: Optional[int] = None) -> None:
+    """
+    Apply query-time ANN knobs for the current transaction in one round-trip.
+
+    - hnsw.ef_search: candidate list size while walking the HNSW graph
+      (higher = better recall, slower). An HNSW scan returns at most
+      ef_search rows, so a larger LIMIT (a rescoring pool) needs a larger value.
+    - hnsw.iterative_scan: a game without a partial index may be searched
+      through the global index, whose ef_search candidates are then filtered
+      by game_id and can leave fewer than k rows. An iterative scan resumes
+      the walk until enough rows pass the filter.
+    - ivfflat.probes: number of lists probed if an IVFFlat index is used instead.
+    - plan_cache_mode: asyncpg prepares statements, and a generic plan with
+      `game_id = $1` cannot use the per-game partial indexes.
+    """
+    params = {
+        "ef_search": str(max(settings.hnsw_ef_search, ef_search or 0)),
+        "probes": str(settings.ivfflat_probes),
+    }
+    configs = [
+        "set_config('hnsw.ef_search', :ef_search, true)",
+        "set_config('ivfflat.probes', :probes, true)",
+        "set_config('plan_cache_mode', 'force_custom_plan', true)",
+    ]
+    if settings.hnsw_iterative_scan:
+        configs.append("set_config('hnsw.iterative_scan', :iterative_scan, true)")
+        params["iterative_scan"] = settings.hnsw_iterative_scan
+    await session.execute(text("SELECT " + ", ".join(configs)), params)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from app.db.session import SessionLocal
+
+    async with SessionLocal() as session:
+        report = await sync_game_vector_indexes(session, min_mods=args.min_mods, dry_run=args.dry_run)
+        if not args.dry_run:
+            await session.commit()
+    verb = "Would" if args.dry_run else "Did"
+    print(
+        f"✔️ {verb} create {len(report.created)} and drop {len(report.dropped)} games' per-game ANN indexes "
+        f"(threshold {args.min_mods} embedded mods); {len(report.kept)} kept."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Match per-game ANN indexes to catalog sizes.")
+    parser.add_argument("--min-mods", type=int, default=settings.game_vector_index_min_mods)
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(_main(parser.parse_args()))
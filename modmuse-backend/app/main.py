@@ -2,6 +2,8 @@
 
 import logging
 import traceback
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,13 +11,54 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.routes_health import router as health_router
 from app.api.v1.routes_games import router as games_router
 from app.api.v1.routes_recommendations import router as recommendations_router
+from app.api.v1.routes_metrics import router as metrics_router
+from app.api.v1.routes_modlists import router as modlists_router
+from app.core.config import settings
+from app.db.models_utils.domain import EMBEDDING_DIM
+from app.db.session import warm_pool
+from app.services.catalog_version import catalog_version
+from app.services.embedding_registry import EmbeddingSpaceMismatch, embedding_registry
+from app.services.embedding_service import check_embedding_dimension, embedding_provider
+from app.services.history_writer import history_writer
 
 # -----------------------------------------------------------
 # 🔥 Enable global debug logging
 # -----------------------------------------------------------
 logging.basicConfig(level=logging.DEBUG)
 
+
+# -----------------------------------------------------------
+# Lifespan: the embedding provider must match the stored mod
+# vectors (model and dimension), the DB pool is pre-warmed,
+# background workers start with the app and are drained on
+# shutdown so queued history is not lost.
+# -----------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    check_embedding_dimension(EMBEDDING_DIM)
+    try:
+        await embedding_registry.ensure_compatible()
+        print(f"✔️ Embedding provider: {embedding_provider.model_id} ({embedding_provider.dim} dims)")
+    except EmbeddingSpaceMismatch:
+        raise
+    except Exception as e:
+        # DB not reachable yet: the first vector search checks again
+        print(f"⚠️ Embedding space check failed: {e}")
+    try:
+        warmed = await warm_pool(settings.db_pool_warmup)
+        print(f"✔️ Warmed {warmed} pooled DB connections")
+    except Exception as e:
+        print(f"⚠️ Pool warmup failed: {e}")
+    catalog_version.start()
+    if settings.history_write_mode == "write_behind":
+        history_writer.start()
+    yield
+    await history_writer.drain()
+    await catalog_version.stop()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     debug=True,
     title="ModMuse API",
     version="0.1.0",
@@ -49,6 +92,8 @@ async def all_exception_handler(request: Request, exc: Exception):
 app.include_router(health_router, prefix="/api/v1")
 app.include_router(games_router, prefix="/api/v1")
 app.include_router(recommendations_router, prefix="/api/v1")
+app.include_router(modlists_router, prefix="/api/v1")
+app.include_router(metrics_router, prefix="/api/v1")
 
 @app.get("/", tags=["root"])
 def read_root():
@@ -2,7 +2,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # ---------- Game ----------
@@ -46,24 +46,107 @@ class ModRead(ModBase):
 
 class PromptCreate(BaseModel):
     user_prompt: str
+    # Validated against the game registry; None means settings.default_game_id
+    game_id: Optional[int] = None
 
 
 class PromptRead(BaseModel):
-    prompt_id: int
+    # None when history is persisted write-behind (HISTORY_WRITE_MODE=write_behind)
+    prompt_id: Optional[int] = None
     user_prompt: str
     created_at: datetime
     extracted_keywords: List[str]
     model_version: str
 
 
+class CompatibilityRead(BaseModel):
+    # "compatible" (matched the prompt) or "dependency" (pulled in by another mod)
+    status: str = "compatible"
+    requires: List[int] = []
+    required_by: List[int] = []
+
+
+class ExcludedMod(BaseModel):
+    mod_id: int
+    # "conflict" (with a higher-ranked mod) or "dependency_conflict"
+    reason: str
+    conflicts_with: List[int] = []
+
+
 class RecommendationItem(BaseModel):
-    rec_id: int
-    prompt_id: int
+    rec_id: Optional[int] = None
+    prompt_id: Optional[int] = None
     mod: ModRead
     relevance_score: float
     rank_order: int
+    compatibility: Optional[CompatibilityRead] = None
 
 
 class RecommendationResponse(BaseModel):
     prompt: PromptRead
-    recommendations: List[RecommendationItem]
\ No newline at end of file
+    recommendations: List[RecommendationItem]
+    # Candidates dropped by compatibility filtering
+    excluded: List[ExcludedMod] = []
+    # Pipeline stages that timed out, failed or were skipped (partial results)
+    degraded_stages: List[str] = []
+
+
+# Streaming (POST /recommendations/stream) partial events
+
+class KeywordsEvent(BaseModel):
+    status: str
+    keywords: List[str]
+    elapsed_ms: float
+
+
+class CandidatesEvent(BaseModel):
+    # "semantic" or "keyword"
+    channel: str
+    status: str
+    mods: List[ModRead]
+    elapsed_ms: float
+
+
+class StreamErrorEvent(BaseModel):
+    detail: str
+
+
+class BatchPromptCreate(BaseModel):
+    prompts: List[PromptCreate]
+
+
+class BatchRecommendationResponse(BaseModel):
+    # One response per prompt, in request order
+    results: List[RecommendationResponse]
+    degraded_stages: List[str] = []
+
+
+# ---------- Mod list solver ----------
+
+class ModCandidate(BaseModel):
+    mod_id: int
+    score: float = Field(ge=0)
+
+
+class ModListSolveRequest(BaseModel):
+    game_id: int
+    candidates: List[ModCandidate]
+    # Dependencies that are not candidates may be added (with score 0)
+    allow_extra_dependencies: bool = True
+    time_budget_ms: Optional[int] = Field(default=None, gt=0, le=10_000)
+
+
+class ModListSolveResponse(BaseModel):
+    game_id: int
+    # Selected candidates, best score first
+    mod_ids: List[int]
+    dependencies_added: List[int] = []
+    dropped: List[int] = []
+    infeasible: List[int] = []
+    # Candidate ids that are not mods of this game
+    unknown: List[int] = []
+    total_score: float
+    greedy_score: float
+    improvements: int
+    elapsed_ms: float
+    timed_out: bool
@@ -1,14 +1,63 @@
 import os
 import json
-from typing import List, Optional, Any
+import re
+from typing import Any, Dict, List, Optional, Tuple
 
+import openai
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 
+from app.core.cache import SingleFlight, TTLCache, normalize_prompt
+from app.core.config import settings
+from app.core.resilience import CircuitBreaker, ProviderGuard
+
 load_dotenv()
 
-# Use the async OpenAI client everywhere in the backend
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Use the async OpenAI client everywhere in the backend. The SDK's own
+# retries are off: ProviderGuard owns timeouts, retries and backoff.
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+KEYWORD_MODEL = "gpt-4o-mini"
+# Embeddings live in services/embedding_service.py (pluggable providers)
+
+# Parsed keyword lists keyed on (normalized prompt, model), plus coalescing of
+# identical in-flight extraction calls.
+keyword_cache: TTLCache[Tuple[str, str], List[str]] = TTLCache(
+    maxsize=settings.keyword_cache_size,
+    ttl=settings.keyword_cache_ttl_seconds,
+)
+keyword_single_flight: SingleFlight[Tuple[str, str], List[str]] = SingleFlight()
+
+
+def is_transient_openai_error(error: BaseException) -> bool:
+    """Worth retrying and counted by circuit breakers: the provider, not the request, failed."""
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in (408, 409)
+
+
+def openai_guard(name: str, max_concurrency: int, stage_timeout: float) -> ProviderGuard:
+    """
+    Guard for the OpenAI calls of a pipeline stage. Its deadline ends a margin
+    before the stage timeout: if the stage cancelled the call first, the
+    timeout would never be recorded by the breaker.
+    """
+    return ProviderGuard(
+        name,
+        max_concurrency=max_concurrency,
+        deadline=max(0.0, stage_timeout - settings.openai_deadline_margin_seconds),
+        attempt_timeout=settings.openai_attempt_timeout_seconds,
+        max_attempts=settings.openai_max_attempts,
+        base_delay=settings.openai_retry_base_delay_seconds,
+        max_delay=settings.openai_retry_max_delay_seconds,
+        breaker=CircuitBreaker(settings.circuit_failure_threshold, settings.circuit_reset_seconds),
+        is_transient=is_transient_openai_error,
+    )
+
+
+# Ends before the keyword stage deadline, so a provider incident fails the
+# call (and the stage's fallback kicks in) rather than timing out the stage
+keyword_guard = openai_guard("keywords", settings.keyword_max_concurrency, settings.keyword_stage_timeout)
 
 def _safe_extract_text(resp: Any) -> Optional[str]:
     """
@@ -35,21 +84,68 @@ def _safe_extract_text(resp: Any) -> Optional[str]:
 # 1. Keyword extraction
 # ---------------------------------------------------------
 async def extract_keywords(prompt: str) -> List[str]:
+    """
+    Returns keyword tags for a prompt.
+
+    Results are memoized per normalized prompt, and identical concurrent calls
+    share a single OpenAI request.
+    """
+    key = (normalize_prompt(prompt), KEYWORD_MODEL)
+
+    cached = keyword_cache.get(key)
+    if cached is not None:
+        return list(cached)
+
+    async def load() -> List[str]:
+        keywords = await _request_keywords(prompt)
+        keyword_cache.set(key, keywords)
+        return keywords
+
+    return list(await keyword_single_flight.do(key, load))
+
+
+# Words that say nothing about which mods are wanted
+_FALLBACK_STOPWORDS = {
+    "a", "an", "and", "any", "are", "but", "can", "for", "from", "game", "get", "give", "have",
+    "i", "in", "into", "is", "it", "like", "looking", "make", "me", "mod", "mods", "more", "my",
+    "need", "of", "on", "or", "play", "recommend", "some", "something", "that", "the", "to",
+    "want", "what", "which", "with", "without", "would", "you",
+}
+_WORD = re.compile(r"[^\W\d_]{3,}")
+
+
+def fallback_keywords(prompt: str, limit: int = 12) -> List[str]:
+    """
+    Keywords without the LLM: the prompt's content words, in order. Used when
+    extraction is unavailable; the tag index matches them by token and trigram.
+    """
+    words = [w for w in _WORD.findall(normalize_prompt(prompt)) if w not in _FALLBACK_STOPWORDS]
+    return list(dict.fromkeys(words))[:limit]
+
+
+def keyword_cache_stats() -> Dict[str, Any]:
+    return {
+        "cache": keyword_cache.stats(),
+        "single_flight": keyword_single_flight.stats(),
+    }
+
+
+async def _request_keywords(prompt: str) -> List[str]:
     """
     Calls OpenAI asynchronously and safely extracts keyword JSON.
     Works with all response formats and silences Pylance.
     """
 
     try:
-        resp = await client.responses.create(
-            model="gpt-4o-mini",
+        resp = await keyword_guard.call(lambda: client.responses.create(
+            model=KEYWORD_MODEL,
             input=f"""
                 Extract important keyword tags from the following mod recommendation prompt.
                 Return ONLY a JSON array of simple strings, no prose, no markdown.
 
                 Prompt: "{prompt}"
             """
-        )
+        ))
 
         raw = _safe_extract_text(resp)
 
@@ -73,19 +169,3 @@ async def extract_keywords(prompt: str) -> List[str]:
 
     # Fallback
     return [x.strip() for x in raw.split(",") if x.strip()]
-
-# ---------------------------------------------------------
-# 2. Embedding function for semantic search
-# ---------------------------------------------------------
-async def embed_text(text: str) -> List[float]:
-    """
-    Generate a 1536-dimensional embedding vector for semantic search.
-    Compatible with pgvector column: Vector(1536)
-    """
-
-    response = await client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text,
-    )
-
-    return response.data[0].embedding
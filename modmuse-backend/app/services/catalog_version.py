@@ -0,0 +1,79 @@
+# app/services/catalog_version.py
+"""
+In-process view of the database `catalog_version` counter.
+
+The counter is bumped by triggers whenever games, mods, tags, mod tags,
+dependencies or incompatibilities change (including writes from the importer,
+the backfill job or another API process). A background task polls it every
+CATALOG_VERSION_POLL_SECONDS, so request handlers can read `current` without a
+query. Components with derived catalog data (response cache, in-memory
+indexes) register listeners that run when the version changes.
+
+`current` stays None until the first successful refresh; callers treat that
+as "unknown" and bypass anything keyed on the version.
+"""
+import asyncio
+import traceback
+from typing import Callable, List, Optional
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models_utils.domain import CatalogVersion
+from app.db.session import SessionLocal
+
+Listener = Callable[[int], None]
+
+
+class CatalogVersionTracker:
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self.current: Optional[int] = None
+        self._listeners: List[Listener] = []
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def subscribe(self, listener: Listener) -> None:
+        """Call `listener(new_version)` whenever the catalog version changes."""
+        self._listeners.append(listener)
+
+    def set(self, version: int) -> None:
+        previous, self.current = self.current, version
+        if previous is not None and previous != version:
+            for listener in self._listeners:
+                try:
+                    listener(version)
+                except Exception:
+                    traceback.print_exc()
+
+    async def refresh(self) -> Optional[int]:
+        async with SessionLocal() as session:
+            version = (await session.execute(
+                select(CatalogVersion.version).where(CatalogVersion.id == 1)
+            )).scalar_one_or_none()
+        if version is not None:
+            self.set(version)
+        return self.current
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ Catalog version refresh failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll(), name="catalog-version-poller")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+catalog_version = CatalogVersionTracker(poll_interval=settings.catalog_version_poll_seconds)
@@ -0,0 +1,334 @@
+# app/services/compatibility.py
+"""
+In-memory compatibility engine built from the `dependency` and
+`incompatibility` tables.
+
+Every mod that appears in an edge gets a dense slot, and each slot keeps
+Python-int bitsets:
+
+- deps[i]        direct dependencies
+- dependents[i]  reverse edges (who depends on i)
+- conflicts[i]   incompatibilities (symmetric)
+- closure[i]     transitive dependencies (cycles are allowed)
+
+`resolve()` walks a ranked candidate list once: it drops mods that conflict
+with what was already accepted (including through dependencies), pulls in
+required dependencies, and reports a status for every accepted mod.
+
+When the catalog version changes, the edge lists are re-read and diffed against
+the current graph. Only the closures of nodes downstream of a changed
+dependency edge are recomputed.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.db.models_utils.domain import Dependency, Incompatibility
+from app.db.session import SessionLocal
+from app.services.catalog_version import catalog_version
+
+Edge = Tuple[int, int]
+
+COMPATIBLE = "compatible"
+DEPENDENCY = "dependency"
+CONFLICT = "conflict"
+DEPENDENCY_CONFLICT = "dependency_conflict"
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Set bit positions of `mask`, lowest first."""
+    if mask.bit_count() > 32:
+        # Dense: one C-level pass over the binary string beats per-bit bigint ops
+        digits = bin(mask)[:1:-1]
+        i = digits.find("1")
+        while i != -1:
+            yield i
+            i = digits.find("1", i + 1)
+        return
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _incompatibility_key(a: int, b: int) -> Edge:
+    return (a, b) if a <= b else (b, a)
+
+
+@dataclass
+class ResolvedMod:
+    mod_id: int
+    status: str
+    # Transitive dependencies (mod ids), for accepted mods
+    requires: List[int] = field(default_factory=list)
+    # Accepted mods that pulled this one in as a dependency
+    required_by: List[int] = field(default_factory=list)
+
+
+@dataclass
+class ExcludedCandidate:
+    mod_id: int
+    reason: str
+    conflicts_with: List[int] = field(default_factory=list)
+
+
+@dataclass
+class CompatibilityResult:
+    # Accepted mods in output order (dependencies follow the mod that needs them)
+    mods: List[ResolvedMod]
+    excluded: List[ExcludedCandidate]
+
+    @property
+    def mod_ids(self) -> List[int]:
+        return [m.mod_id for m in self.mods]
+
+
+class CompatibilityGraph:
+    def __init__(self) -> None:
+        self._slots: Dict[int, int] = {}
+        self._ids: List[int] = []
+        self._deps: List[int] = []
+        self._dependents: List[int] = []
+        self._conflicts: List[int] = []
+        self._closure: List[int] = []
+        self.dependency_edges: Set[Edge] = set()
+        self.incompatibility_edges: Set[Edge] = set()
+
+    @classmethod
+    def from_edges(
+        cls, dependencies: Iterable[Edge], incompatibilities: Iterable[Edge]
+    ) -> "CompatibilityGraph":
+        graph = cls()
+        graph.apply_edges(set(dependencies), set(incompatibilities))
+        return graph
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # -----------------------------------------------------
+    # Slots / bitset helpers
+    # -----------------------------------------------------
+
+    def _slot(self, mod_id: int) -> int:
+        slot = self._slots.get(mod_id)
+        if slot is None:
+            slot = len(self._ids)
+            self._slots[mod_id] = slot
+            self._ids.append(mod_id)
+            for table in (self._deps, self._dependents, self._conflicts, self._closure):
+                table.append(0)
+        return slot
+
+    def slot(self, mod_id: int) -> Optional[int]:
+        """Bit position of a mod, or None if it has no edges at all."""
+        return self._slots.get(mod_id)
+
+    def mod_id_at(self, slot: int) -> int:
+        return self._ids[slot]
+
+    def mod_ids(self, mask: int) -> List[int]:
+        return sorted(self._ids[i] for i in iter_bits(mask))
+
+    def bundle(self, slot: int) -> int:
+        """The mod plus its transitive dependencies, as a bitset."""
+        return (1 << slot) | self._closure[slot]
+
+    def conflicts_mask(self, mask: int) -> int:
+        """Everything incompatible with any mod in `mask`."""
+        conflicts = 0
+        for i in iter_bits(mask):
+            conflicts |= self._conflicts[i]
+        return conflicts
+
+    def requires(self, mod_id: int) -> List[int]:
+        slot = self._slots.get(mod_id)
+        return [] if slot is None else self.mod_ids(self._closure[slot])
+
+    def conflicts_of(self, mod_id: int) -> List[int]:
+        slot = self._slots.get(mod_id)
+        return [] if slot is None else self.mod_ids(self._conflicts[slot])
+
+    # -----------------------------------------------------
+    # Incremental updates
+    # -----------------------------------------------------
+
+    def apply_edges(self, dependencies: Set[Edge], incompatibilities: Set[Edge]) -> int:
+        """
+        Make the graph match the given edge sets. Returns the number of edges
+        added or removed.
+        """
+        incompatibilities = {_incompatibility_key(a, b) for a, b in incompatibilities}
+        touched = 0  # slots whose direct dependencies changed
+
+        for mod_id, dep_id in dependencies - self.dependency_edges:
+            a, b = self._slot(mod_id), self._slot(dep_id)
+            self._deps[a] |= 1 << b
+            self._dependents[b] |= 1 << a
+            touched |= 1 << a
+        for mod_id, dep_id in self.dependency_edges - dependencies:
+            a, b = self._slots[mod_id], self._slots[dep_id]
+            self._deps[a] &= ~(1 << b)
+            self._dependents[b] &= ~(1 << a)
+            touched |= 1 << a
+
+        for mod_a, mod_b in incompatibilities - self.incompatibility_edges:
+            a, b = self._slot(mod_a), self._slot(mod_b)
+            self._conflicts[a] |= 1 << b
+            self._conflicts[b] |= 1 << a
+        for mod_a, mod_b in self.incompatibility_edges - incompatibilities:
+            a, b = self._slots[mod_a], self._slots[mod_b]
+            self._conflicts[a] &= ~(1 << b)
+            self._conflicts[b] &= ~(1 << a)
+
+        changed = (
+            len(dependencies ^ self.dependency_edges)
+            + len(incompatibilities ^ self.incompatibility_edges)
+        )
+        self.dependency_edges = dependencies
+        self.incompatibility_edges = incompatibilities
+        if touched:
+            self._recompute_closures(touched)
+        return changed
+
+    def _recompute_closures(self, touched: int) -> None:
+        # Every node that can reach a touched node may have a different closure.
+        affected = touched
+        frontier = touched
+        while frontier:
+            reached = 0
+            for i in iter_bits(frontier):
+                reached |= self._dependents[i]
+            frontier = reached & ~affected
+            affected |= frontier
+
+        nodes = list(iter_bits(affected))
+        for i in nodes:
+            self._closure[i] = 0
+
+        # Least fixpoint of closure[i] = deps[i] | closure[deps[i]...]; also
+        # terminates on dependency cycles.
+        changed = True
+        while changed:
+            changed = False
+            for i in nodes:
+                closure = self._deps[i]
+                for j in iter_bits(self._deps[i]):
+                    closure |= self._closure[j]
+                closure &= ~(1 << i)
+                if closure != self._closure[i]:
+                    self._closure[i] = closure
+                    changed = True
+
+    # -----------------------------------------------------
+    # Resolution
+    # -----------------------------------------------------
+
+    def resolve(self, candidate_ids: Iterable[int]) -> CompatibilityResult:
+        selected = 0
+        accepted: Dict[int, ResolvedMod] = {}
+        excluded: List[ExcludedCandidate] = []
+
+        for mod_id in candidate_ids:
+            existing = accepted.get(mod_id)
+            if existing is not None:
+                # Already pulled in as a dependency; it is also a match itself.
+                existing.status = COMPATIBLE
+                continue
+
+            slot = self._slots.get(mod_id)
+            if slot is None:
+                # No edges at all: always compatible
+                accepted[mod_id] = ResolvedMod(mod_id, COMPATIBLE)
+                continue
+
+            bundle = self.bundle(slot)
+            bundle_conflicts = self.conflicts_mask(bundle)
+
+            if bundle_conflicts & bundle:
+                excluded.append(ExcludedCandidate(
+                    mod_id, DEPENDENCY_CONFLICT, self.mod_ids(bundle_conflicts & bundle)
+                ))
+                continue
+            if bundle_conflicts & selected:
+                excluded.append(ExcludedCandidate(
+                    mod_id, CONFLICT, self.mod_ids(bundle_conflicts & selected)
+                ))
+                continue
+
+            selected |= bundle
+            requires = self.mod_ids(self._closure[slot])
+            accepted[mod_id] = ResolvedMod(mod_id, COMPATIBLE, requires=requires)
+            for dep_id in requires:
+                dep = accepted.get(dep_id)
+                if dep is None:
+                    dep = accepted[dep_id] = ResolvedMod(dep_id, DEPENDENCY)
+                dep.required_by.append(mod_id)
+
+        return CompatibilityResult(mods=list(accepted.values()), excluded=excluded)
+
+
+class CompatibilityEngine:
+    """Owns the current graph and keeps it in sync with the database."""
+
+    def __init__(self) -> None:
+        self._graph: Optional[CompatibilityGraph] = None
+        self._stale = True
+        self._lock = asyncio.Lock()
+        self.loads = 0
+        self.refreshes = 0
+        self.edges_changed = 0
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    async def graph(self) -> CompatibilityGraph:
+        if self._graph is not None and not self._stale:
+            return self._graph
+
+        async with self._lock:
+            if self._graph is None or self._stale:
+                self._stale = False
+                try:
+                    await self.refresh()
+                except Exception:
+                    self._stale = True
+                    raise
+        return self._graph
+
+    async def refresh(self) -> None:
+        async with SessionLocal() as load_session:
+            dependencies = set((await load_session.execute(
+                select(Dependency.mod_id, Dependency.depends_on_mod_id)
+            )).tuples().all())
+            incompatibilities = set((await load_session.execute(
+                select(Incompatibility.mod_id_a, Incompatibility.mod_id_b)
+            )).tuples().all())
+
+        if self._graph is None:
+            self._graph = CompatibilityGraph.from_edges(dependencies, incompatibilities)
+            self.loads += 1
+        else:
+            self.edges_changed += self._graph.apply_edges(dependencies, incompatibilities)
+            self.refreshes += 1
+
+    async def resolve(self, candidate_ids: Iterable[int]) -> CompatibilityResult:
+        return (await self.graph()).resolve(candidate_ids)
+
+    def stats(self) -> Dict[str, object]:
+        graph = self._graph
+        return {
+            "mods": len(graph) if graph else 0,
+            "dependencies": len(graph.dependency_edges) if graph else 0,
+            "incompatibilities": len(graph.incompatibility_edges) if graph else 0,
+            "loads": self.loads,
+            "refreshes": self.refreshes,
+            "edges_changed": self.edges_changed,
+        }
+
+
+compatibility_engine = CompatibilityEngine()
+
+# Dependencies or incompatibilities may have changed: diff on next use.
+catalog_version.subscribe(lambda version: compatibility_engine.mark_stale())
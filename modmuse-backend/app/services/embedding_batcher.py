@@ -0,0 +1,133 @@
+# app/services/embedding_batcher.py
+"""
+Micro-batching of single-text embedding requests.
+
+Every recommendation embeds its prompt on its own. Under concurrency the
+batcher collects those texts: the first one arms a timer of
+EMBEDDING_BATCH_WINDOW_MS, and when it fires (or EMBEDDING_BATCH_MAX_SIZE
+distinct texts are waiting, whichever comes first) they go to the provider
+as one list-input call. Each caller gets its own vector back. Identical texts
+in the same window are embedded once.
+
+Fewer, larger provider calls keep request counts under rate limits and raise
+throughput at high QPS; the price is at most one window of added latency for
+a lone request. A window of 0 disables batching.
+
+A caller that gives up (stage timeout) leaves the batch untouched: waiters
+share one future per text through `asyncio.shield`.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+from app.core.metrics import BATCH_SIZE_BUCKETS, Histogram
+
+EmbedFn = Callable[[Sequence[str]], Awaitable[List[List[float]]]]
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Every waiter may have been cancelled: do not log "never retrieved"
+    if not future.cancelled():
+        future.exception()
+
+
+@dataclass
+class _Pending:
+    future: asyncio.Future
+    # perf_counter() of every request waiting for this text
+    enqueued: List[float] = field(default_factory=list)
+
+
+class EmbeddingBatcher:
+    def __init__(self, embed: EmbedFn, max_batch: int, max_wait: float):
+        self._embed = embed
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self._pending: Dict[str, _Pending] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references to in-flight provider calls
+        self._in_flight: Set[asyncio.Task] = set()
+
+        self.requests = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        # Enqueue -> provider call, per request
+        self.wait_seconds = Histogram()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_wait > 0 and self.max_batch > 1
+
+    async def embed(self, text: str) -> List[float]:
+        self.requests += 1
+        if not self.enabled:
+            self.batches += 1
+            self.batch_size.observe(1)
+            return (await self._embed([text]))[0]
+
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(text)
+        if pending is None:
+            pending = self._pending[text] = _Pending(loop.create_future())
+            pending.future.add_done_callback(_consume_exception)
+        else:
+            self.coalesced += 1
+        pending.enqueued.append(time.perf_counter())
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await asyncio.shield(pending.future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+
+        now = time.perf_counter()
+        for pending in batch.values():
+            for enqueued in pending.enqueued:
+                self.wait_seconds.observe(now - enqueued)
+        self.batch_size.observe(len(batch))
+        self.batches += 1
+
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch: Dict[str, _Pending]) -> None:
+        try:
+            embeddings = await self._embed(list(batch))
+        except Exception as e:
+            self.failed_batches += 1
+            for pending in batch.values():
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        for pending, embedding in zip(batch.values(), embeddings):
+            if not pending.future.done():
+                pending.future.set_result(embedding)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.max_wait * 1000,
+            "max_batch": self.max_batch,
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "waiting": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "batch_size": self.batch_size.snapshot(scale=1.0, unit=""),
+            "wait": self.wait_seconds.snapshot(),
+        }
@@ -0,0 +1,169 @@
+# app/services/embedding_cache.py
+"""
+Two-tier cache in front of embedding_service.embed_text.
+
+Tier 1 is an in-process LRU keyed on (normalized prompt, embedding model).
+Tier 2 reuses the `prompt.embedding` column written by generate_recommendations:
+if the same normalized prompt was embedded with the same model before, that
+vector is loaded from prompt history instead of calling OpenAI again.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache, normalize_prompt
+from app.core.config import settings
+from app.db.models_utils.domain import Prompt
+from app.services.embedding_service import EMBEDDING_MODEL, embed_text, embed_texts
+
+CacheKey = Tuple[str, str]
+
+
+class PromptEmbeddingCache:
+    def __init__(self, maxsize: int, ttl: float, persistent: bool = True):
+        self.memory: TTLCache[CacheKey, List[float]] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.persistent = persistent
+
+        self.persistent_hits = 0
+        self.persistent_misses = 0
+        self.embed_calls = 0
+        self.embed_seconds = 0.0
+
+    @staticmethod
+    def key_for(prompt: str, model: str = EMBEDDING_MODEL) -> CacheKey:
+        return normalize_prompt(prompt), model
+
+    def peek(self, prompt: str, model: str = EMBEDDING_MODEL) -> Optional[List[float]]:
+        """Memory-tier lookup that never awaits and never counts as a hit or miss."""
+        return self.memory.peek(self.key_for(prompt, model))
+
+    async def _load_persistent(
+        self, session: AsyncSession, key: CacheKey
+    ) -> Optional[List[float]]:
+        normalized, model = key
+        result = await session.execute(
+            select(Prompt.embedding)
+            .where(
+                Prompt.normalized_prompt == normalized,
+                Prompt.embedding_model == model,
+                Prompt.embedding.is_not(None),
+            )
+            .order_by(Prompt.prompt_id.desc())
+            .limit(1)
+        )
+        embedding = result.scalar_one_or_none()
+        return list(embedding) if embedding is not None else None
+
+    async def _load_persistent_many(
+        self, session: AsyncSession, normalized: List[str], model: str
+    ) -> Dict[str, List[float]]:
+        """Latest stored embedding per normalized prompt, in one query."""
+        result = await session.execute(
+            select(Prompt.normalized_prompt, Prompt.embedding)
+            .distinct(Prompt.normalized_prompt)
+            .where(
+                Prompt.normalized_prompt.in_(normalized),
+                Prompt.embedding_model == model,
+                Prompt.embedding.is_not(None),
+            )
+            .order_by(Prompt.normalized_prompt, Prompt.prompt_id.desc())
+        )
+        return {row.normalized_prompt: list(row.embedding) for row in result}
+
+    async def get_or_embed(
+        self,
+        prompt: str,
+        session: Optional[AsyncSession] = None,
+        model: str = EMBEDDING_MODEL,
+    ) -> List[float]:
+        key = self.key_for(prompt, model)
+
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+
+        if self.persistent and session is not None:
+            stored = await self._load_persistent(session, key)
+            if stored is not None:
+                self.persistent_hits += 1
+                self.memory.set(key, stored)
+                return stored
+            self.persistent_misses += 1
+
+        started = time.perf_counter()
+        embedding = await embed_text(prompt)
+        self.embed_seconds += time.perf_counter() - started
+        self.embed_calls += 1
+
+        self.memory.set(key, embedding)
+        return embedding
+
+    async def get_or_embed_many(
+        self,
+        prompts: List[str],
+        session: Optional[AsyncSession] = None,
+        model: str = EMBEDDING_MODEL,
+    ) -> List[List[float]]:
+        """
+        Batch version of get_or_embed: memory tier first, then one persistent
+        lookup for all misses, then one list-input embeddings call for
+        whatever is left. Duplicate prompts are embedded once.
+        """
+        keys = [self.key_for(prompt, model) for prompt in prompts]
+        found: Dict[CacheKey, List[float]] = {}
+        missing: Dict[CacheKey, str] = {}
+        for key, prompt in zip(keys, prompts):
+            if key in found or key in missing:
+                continue
+            cached = self.memory.get(key)
+            if cached is not None:
+                found[key] = cached
+            else:
+                missing[key] = prompt
+
+        if missing and self.persistent and session is not None:
+            stored = await self._load_persistent_many(
+                session, [normalized for normalized, _ in missing], model
+            )
+            for key in list(missing):
+                embedding = stored.get(key[0])
+                if embedding is not None:
+                    self.persistent_hits += 1
+                    self.memory.set(key, embedding)
+                    found[key] = embedding
+                    del missing[key]
+                else:
+                    self.persistent_misses += 1
+
+        if missing:
+            started = time.perf_counter()
+            embeddings = await embed_texts(list(missing.values()))
+            self.embed_seconds += time.perf_counter() - started
+            self.embed_calls += 1
+            for key, embedding in zip(missing, embeddings):
+                self.memory.set(key, embedding)
+                found[key] = embedding
+
+        return [found[key] for key in keys]
+
+    def stats(self) -> Dict[str, object]:
+        avg_embed_seconds = (self.embed_seconds / self.embed_calls) if self.embed_calls else 0.0
+        total_hits = self.memory.hits + self.persistent_hits
+        return {
+            "memory": self.memory.stats(),
+            "persistent_hits": self.persistent_hits,
+            "persistent_misses": self.persistent_misses,
+            "embed_calls": self.embed_calls,
+            "avg_embed_seconds": avg_embed_seconds,
+            # Rough latency saved: every hit would otherwise have paid one embed round-trip.
+            "estimated_seconds_saved": total_hits * avg_embed_seconds,
+        }
+
+
+prompt_embedding_cache = PromptEmbeddingCache(
+    maxsize=settings.embedding_cache_size,
+    ttl=settings.embedding_cache_ttl_seconds,
+    persistent=settings.embedding_cache_persistent,
+)
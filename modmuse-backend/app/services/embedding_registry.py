@@ -0,0 +1,144 @@
+# app/services/embedding_registry.py
+"""
+Guard against comparing vectors from different embedding spaces.
+
+Query vectors come from `embedding_provider`; mod vectors from whichever
+provider ran the last backfill or re-embed. A distance between two spaces is
+meaningless, and when the dimensions happen to agree nothing errors. The
+`embedding_space` table records the model id and dimension per stored vector
+column, and Postgres knows the column's declared dimension.
+
+`ensure_compatible()` checks both against the provider, once per catalog
+version (the re-embed swap bumps it), and raises EmbeddingSpaceMismatch on
+any difference: startup is refused and the vector search stage fails, so
+requests degrade to keyword results instead of returning unrelated mods.
+Jobs that write vectors `claim()` the column first.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models_utils.domain import EmbeddingSpace
+from app.db.session import SessionLocal
+from app.services.catalog_version import catalog_version
+from app.services.embedding_service import embedding_provider
+
+MOD_EMBEDDING = "mod.embedding"
+
+
+class EmbeddingSpaceMismatch(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class StoredSpace:
+    # From the embedding_space row; None when nothing was recorded yet
+    model: Optional[str]
+    dimensions: Optional[int]
+    # Declared dimension of the column itself; None if it has none
+    column_dimensions: Optional[int]
+
+
+class EmbeddingRegistry:
+    def __init__(self, model_id: str, dim: int):
+        self.model_id = model_id
+        self.dim = dim
+        self._verified = False
+        # Remembered until the next catalog version, so a misconfigured
+        # process does not query the registry on every request
+        self._problem: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self.checks = 0
+
+    def mismatch(self, stored: StoredSpace, column: str = MOD_EMBEDDING) -> Optional[str]:
+        """Why vectors of `stored` cannot be compared with the provider's, or None."""
+        if stored.column_dimensions is not None and stored.column_dimensions != self.dim:
+            return (
+                f"{column} is vector({stored.column_dimensions}) but the embedding provider "
+                f"{self.model_id!r} produces {self.dim} dims"
+            )
+        if stored.model is not None and (stored.model, stored.dimensions) != (self.model_id, self.dim):
+            return (
+                f"{column} holds {stored.model!r} ({stored.dimensions} dims) vectors but the embedding "
+                f"provider is {self.model_id!r} ({self.dim} dims); re-embed with python -m app.db.reembed"
+            )
+        return None
+
+    async def read(self, session: AsyncSession, column: str = MOD_EMBEDDING) -> StoredSpace:
+        table, attribute = column.split(".")
+        record = await session.get(EmbeddingSpace, column)
+        # pgvector keeps the dimension in atttypmod (-1 when undeclared)
+        typmod = (await session.execute(
+            text("""
+                SELECT atttypmod
+                FROM pg_attribute
+                WHERE attrelid = to_regclass(:table)
+                  AND attname = :attribute
+                  AND NOT attisdropped
+            """),
+            {"table": table, "attribute": attribute},
+        )).scalar_one_or_none()
+        return StoredSpace(
+            model=record.model if record else None,
+            dimensions=record.dimensions if record else None,
+            column_dimensions=typmod if typmod and typmod > 0 else None,
+        )
+
+    async def verify(self, session: AsyncSession, column: str = MOD_EMBEDDING) -> None:
+        self.checks += 1
+        problem = self.mismatch(await self.read(session, column), column)
+        if problem is not None:
+            raise EmbeddingSpaceMismatch(problem)
+
+    async def ensure_compatible(self) -> None:
+        """Cheap after the first call per catalog version."""
+        if self._verified:
+            return
+        async with self._lock:
+            if not self._verified and self._problem is None:
+                async with SessionLocal() as session:
+                    try:
+                        await self.verify(session)
+                    except EmbeddingSpaceMismatch as e:
+                        self._problem = str(e)
+                    else:
+                        self._verified = True
+        if self._problem is not None:
+            raise EmbeddingSpaceMismatch(self._problem)
+
+    async def record(self, session: AsyncSession, column: str = MOD_EMBEDDING) -> None:
+        """Record the provider's space for `column` (caller commits)."""
+        stmt = insert(EmbeddingSpace).values(column_name=column, model=self.model_id, dimensions=self.dim)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[EmbeddingSpace.column_name],
+            set_={"model": stmt.excluded.model, "dimensions": stmt.excluded.dimensions, "updated_at": func.now()},
+        ))
+
+    async def claim(self, session: AsyncSession, column: str = MOD_EMBEDDING) -> None:
+        """Before writing vectors to `column`: refuse a different space, record ours."""
+        await self.verify(session, column)
+        await self.record(session, column)
+        await session.commit()
+
+    def invalidate(self) -> None:
+        self._verified = False
+        self._problem = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "model": self.model_id,
+            "dimensions": self.dim,
+            "verified": self._verified,
+            "mismatch": self._problem,
+            "checks": self.checks,
+        }
+
+
+embedding_registry = EmbeddingRegistry(embedding_provider.model_id, embedding_provider.dim)
+
+# A re-embed swap bumps the catalog version: check the new space again.
+catalog_version.subscribe(lambda version: embedding_registry.invalidate())
@@ -1,12 +1,258 @@
-from openai import AsyncOpenAI
-import os
-
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-async def embed_text(text: str) -> list[float]:
-    """Generate an embedding vector for text."""
-    response = await client.embeddings.create(
-        model="text-embedding-3-large",
-        input=text
-    )
-    return response.data[0].embedding
\ No newline at end of file
+# app/services/embedding_service.py
+"""
+Embedding providers: the single place text becomes a vector.
+
+Mod embeddings (backfill / seed) and prompt embeddings (recommendations)
+both go through `embedding_provider`, so catalog and query vectors always
+come from the same model and dimension. `model_id` identifies the vector
+space; it is stored with prompt embeddings and keys the embedding and
+response caches, so switching providers never mixes spaces.
+
+Every provider takes a list of texts and batches internally:
+
+- OpenAIEmbeddingProvider: list-input `embeddings.create` calls of up to
+  EMBEDDING_BATCH_SIZE texts (OpenAI allows 2048). Below the model's native
+  dimension, EMBEDDING_DIM is passed as `dimensions`: the API returns
+  shortened, renormalized vectors (text-embedding-3-* only).
+- HashingEmbeddingProvider: deterministic feature hashing of words, word
+  bigrams and character trigrams. No model, no network, microseconds per
+  text; lexical rather than semantic, meant for tests and offline runs.
+- OnnxEmbeddingProvider: a local sentence-transformer exported to ONNX
+  (e.g. all-MiniLM-L6-v2), mean-pooled and normalized, run on CPU in a
+  worker thread. Needs the optional `onnxruntime` and `tokenizers` packages.
+
+Single texts (`embed_text`, one per recommendation) go through
+`embedding_batcher`, which merges concurrent requests into list-input calls
+(services/embedding_batcher.py). Online calls (`embed_text`, `embed_texts`)
+run under `embedding_guard` (concurrency limit, retries, circuit breaker, see
+app/core/resilience.py); the backfill jobs call the provider directly.
+
+EMBEDDING_PROVIDER selects one ("openai", "hashing" or "onnx"). Its dimension
+must match the `mod.embedding` column; `check_embedding_dimension()` runs at
+startup and in the backfill job, and services/embedding_registry.py checks
+the provider against what the stored vectors were produced with.
+"""
+import asyncio
+import hashlib
+import re
+from pathlib import Path
+from typing import List, Optional, Protocol, Sequence
+
+import numpy as np
+
+from app.core.cache import normalize_prompt
+from app.core.config import settings
+from app.services.ai_services import client, openai_guard
+from app.services.embedding_batcher import EmbeddingBatcher
+
+# Native output dimension of the OpenAI embedding models
+OPENAI_MODEL_DIMS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+# Models that accept the `dimensions` parameter
+OPENAI_SHORTENABLE_MODELS = {"text-embedding-3-small", "text-embedding-3-large"}
+
+
+class EmbeddingProvider(Protocol):
+    name: str
+    # Identifies the vector space (stored as prompt.embedding_model)
+    model_id: str
+    dim: int
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """One vector per text, in order."""
+        ...
+
+
+def _chunks(texts: Sequence[str], size: int) -> List[Sequence[str]]:
+    return [texts[start:start + size] for start in range(0, len(texts), size)]
+
+
+# ---------------------------------------------------------
+# OpenAI
+# ---------------------------------------------------------
+
+class OpenAIEmbeddingProvider:
+    name = "openai"
+
+    def __init__(self, client, model: str, dimensions: Optional[int] = None, max_batch: int = 2048):
+        if model not in OPENAI_MODEL_DIMS:
+            raise ValueError(f"Unknown OpenAI embedding model: {model!r}")
+        native = OPENAI_MODEL_DIMS[model]
+        if dimensions is not None and dimensions != native:
+            if model not in OPENAI_SHORTENABLE_MODELS:
+                raise ValueError(f"{model} cannot return {dimensions}-dim embeddings, only {native}")
+            if not 0 < dimensions < native:
+                raise ValueError(f"{model} embeddings can be shortened to 1..{native - 1} dims, not {dimensions}")
+        self.client = client
+        self.model = model
+        self.dim = dimensions or native
+        # Full-size vectors keep the plain model name (the id existing rows carry)
+        self.model_id = model if self.dim == native else f"{model}@{self.dim}"
+        self._extra = {} if self.dim == native else {"dimensions": self.dim}
+        self.max_batch = max_batch
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        embeddings: List[List[float]] = []
+        for chunk in _chunks(texts, self.max_batch):
+            response = await self.client.embeddings.create(model=self.model, input=list(chunk), **self._extra)
+            # One item per input, tagged with its input index
+            by_index = {item.index: item.embedding for item in response.data}
+            embeddings.extend(by_index[i] for i in range(len(chunk)))
+        return embeddings
+
+
+# ---------------------------------------------------------
+# Local: feature hashing
+# ---------------------------------------------------------
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class HashingEmbeddingProvider:
+    name = "hashing"
+
+    # Relative weight of each feature kind
+    WORD_WEIGHT = 1.0
+    BIGRAM_WEIGHT = 0.5
+    TRIGRAM_WEIGHT = 0.25
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.model_id = f"hashing-v1-{dim}"
+
+    def _features(self, text: str):
+        words = _WORD_RE.findall(normalize_prompt(text))
+        for word in words:
+            yield "w:" + word, self.WORD_WEIGHT
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                # Character trigrams tolerate typos and inflections
+                yield "c:" + padded[i:i + 3], self.TRIGRAM_WEIGHT
+        for first, second in zip(words, words[1:]):
+            yield f"b:{first} {second}", self.BIGRAM_WEIGHT
+
+    def embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            # Low bits pick the slot, the top bit the sign (keeps collisions unbiased)
+            vector[h % self.dim] += weight if h >> 63 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self.embed_one(text).tolist() for text in texts]
+
+
+# ---------------------------------------------------------
+# Local: ONNX sentence model
+# ---------------------------------------------------------
+
+class OnnxEmbeddingProvider:
+    name = "onnx"
+
+    def __init__(self, model_path: str, tokenizer_path: str, max_batch: int = 64, max_length: int = 256):
+        try:
+            import onnxruntime  # optional dependency
+            from tokenizers import Tokenizer  # optional dependency
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_PROVIDER=onnx requires the 'onnxruntime' and 'tokenizers' packages"
+            ) from e
+
+        self._session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self._tokenizer = Tokenizer.from_file(tokenizer_path)
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding()
+        self.max_batch = max_batch
+        self.model_id = f"onnx:{Path(model_path).stem}"
+        # Output width is often symbolic in the graph; measure it
+        self.dim = int(self._run(["dimension probe"]).shape[1])
+
+    def _run(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(list(texts))
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+
+        hidden = self._session.run(None, feeds)[0]  # (batch, tokens, dim)
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return pooled / norms
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        embeddings: List[List[float]] = []
+        for chunk in _chunks(texts, self.max_batch):
+            # CPU-bound: keep the event loop free
+            embeddings.extend((await asyncio.to_thread(self._run, chunk)).tolist())
+        return embeddings
+
+
+def create_embedding_provider(name: str) -> EmbeddingProvider:
+    if name == "openai":
+        return OpenAIEmbeddingProvider(
+            client,
+            settings.embedding_model,
+            dimensions=settings.embedding_dim,
+            max_batch=settings.embedding_batch_size,
+        )
+    if name == "hashing":
+        return HashingEmbeddingProvider(dim=settings.embedding_dim)
+    if name == "onnx":
+        if not settings.onnx_model_path or not settings.onnx_tokenizer_path:
+            raise RuntimeError("EMBEDDING_PROVIDER=onnx requires ONNX_MODEL_PATH and ONNX_TOKENIZER_PATH")
+        return OnnxEmbeddingProvider(
+            settings.onnx_model_path,
+            settings.onnx_tokenizer_path,
+            max_batch=settings.embedding_batch_size,
+        )
+    raise ValueError(f"Unknown embedding provider: {name!r} (expected 'openai', 'hashing' or 'onnx')")
+
+
+embedding_provider: EmbeddingProvider = create_embedding_provider(settings.embedding_provider)
+
+EMBEDDING_MODEL = embedding_provider.model_id
+
+# Ends before the embedding stage deadline; a batch counts as one call
+embedding_guard = openai_guard("embeddings", settings.embedding_max_concurrency, settings.embedding_stage_timeout)
+
+
+async def _guarded_embed(texts: Sequence[str]) -> List[List[float]]:
+    return await embedding_guard.call(lambda: embedding_provider.embed(texts))
+
+
+embedding_batcher = EmbeddingBatcher(
+    _guarded_embed,
+    max_batch=settings.embedding_batch_max_size,
+    max_wait=settings.embedding_batch_window_ms / 1000,
+)
+
+
+def check_embedding_dimension(column_dim: int) -> None:
+    """Refuse to run with a provider whose vectors cannot be compared with the stored ones."""
+    if embedding_provider.dim != column_dim:
+        raise RuntimeError(
+            f"Embedding provider {embedding_provider.model_id!r} produces {embedding_provider.dim}-dim "
+            f"vectors but mod.embedding is vector({column_dim}); change EMBEDDING_PROVIDER/EMBEDDING_DIM "
+            f"or re-embed the catalog (python -m app.db.reembed)"
+        )
+
+
+async def embed_text(text: str) -> List[float]:
+    """Batched with concurrent callers (see embedding_batcher)."""
+    return await embedding_batcher.embed(text)
+
+
+async def embed_texts(texts: Sequence[str]) -> List[List[float]]:
+    """Results are in the order of `texts`; the provider batches internally."""
+    if not texts:
+        return []
+    return await _guarded_embed(texts)
@@ -0,0 +1,177 @@
+# app/services/game_registry.py
+"""
+Cached, versioned view of the `game` table.
+
+The whole table is loaded in one query (it is small: one row per supported
+game) into an immutable GameSnapshot that also carries the pre-serialized
+`GET /games/` body, its ETag (content hash) and Last-Modified time. Serving
+the list or validating a request's game_id therefore never touches the
+database or pydantic serialization.
+
+The snapshot is reloaded:
+- when the catalog version changes (a trigger bumps it on `game` writes),
+- when older than GAME_REGISTRY_TTL_SECONDS (in case polling is down),
+- early when a request names an unknown game (rate limited, so unknown ids
+  cannot turn every request into a query).
+
+A reload that produces identical content keeps the same ETag and
+Last-Modified, so clients keep getting 304s. A failed reload keeps serving
+the previous snapshot.
+"""
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models_utils.domain import Game
+from app.db.session import SessionLocal
+from app.models.domain import GameRead
+from app.services.catalog_version import catalog_version
+
+# Minimum gap between reloads triggered by an unknown game_id
+_MISS_RELOAD_INTERVAL = 5.0
+
+_GAME_LIST = TypeAdapter(List[GameRead])
+
+
+class UnknownGameError(LookupError):
+    def __init__(self, game_id: int):
+        super().__init__(f"Unknown game_id: {game_id}")
+        self.game_id = game_id
+
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    # Increments whenever the content changes
+    version: int
+    games: Dict[int, GameRead]
+    # Pre-serialized JSON list, ordered by game_id
+    body: bytes
+    etag: str
+    last_modified: datetime
+    loaded_at: float
+
+
+def build_snapshot(
+    games: List[GameRead], previous: Optional[GameSnapshot] = None
+) -> GameSnapshot:
+    games = sorted(games, key=lambda g: g.game_id)
+    body = _GAME_LIST.dump_json(games)
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    if previous is not None and previous.etag == etag:
+        version, last_modified = previous.version, previous.last_modified
+    else:
+        version = previous.version + 1 if previous is not None else 1
+        # HTTP dates have second resolution
+        last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    return GameSnapshot(
+        version=version,
+        games={g.game_id: g for g in games},
+        body=body,
+        etag=etag,
+        last_modified=last_modified,
+        loaded_at=time.monotonic(),
+    )
+
+
+class GameRegistry:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: Optional[GameSnapshot] = None
+        self._stale = False
+        self._lock = asyncio.Lock()
+        self.loads = 0
+        self.load_failures = 0
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def _needs_reload(self) -> bool:
+        snapshot = self._snapshot
+        return (
+            snapshot is None
+            or self._stale
+            or time.monotonic() - snapshot.loaded_at > self.ttl
+        )
+
+    async def snapshot(self) -> GameSnapshot:
+        if self._needs_reload():
+            await self._reload(self._needs_reload)
+        return self._snapshot
+
+    async def games(self) -> Dict[int, GameRead]:
+        return (await self.snapshot()).games
+
+    async def get(self, game_id: int) -> Optional[GameRead]:
+        snapshot = await self.snapshot()
+        if game_id not in snapshot.games and time.monotonic() - snapshot.loaded_at > _MISS_RELOAD_INTERVAL:
+            # Possibly a game added since the last load
+            await self._reload(lambda: game_id not in self._snapshot.games)
+            snapshot = self._snapshot
+        return snapshot.games.get(game_id)
+
+    async def require(self, game_id: int) -> GameRead:
+        game = await self.get(game_id)
+        if game is None:
+            raise UnknownGameError(game_id)
+        return game
+
+    async def list_games(self) -> List[GameRead]:
+        return list((await self.games()).values())
+
+    async def _reload(self, still_needed: Callable[[], bool]) -> None:
+        async with self._lock:
+            # Another request may have reloaded while we waited
+            if self._snapshot is not None and not still_needed():
+                return
+            self._stale = False
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.load_failures += 1
+                if self._snapshot is None:
+                    raise
+                print(f"⚠️ Game registry reload failed, serving previous snapshot: {e}")
+
+    async def refresh(self) -> None:
+        async with SessionLocal() as session:
+            rows = (await session.execute(select(Game))).scalars().all()
+        games = [
+            GameRead(
+                game_id=game.game_id,
+                name=game.name,
+                genre=game.genre,
+                engine=game.engine,
+                platform=game.platform,
+            )
+            for game in rows
+        ]
+        self._snapshot = build_snapshot(games, self._snapshot)
+        self.loads += 1
+
+    def stats(self) -> Dict[str, object]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"games": 0, "version": None, "loads": self.loads, "load_failures": self.load_failures}
+        return {
+            "games": len(snapshot.games),
+            "version": snapshot.version,
+            "etag": snapshot.etag,
+            "age_seconds": round(time.monotonic() - snapshot.loaded_at, 1),
+            "loads": self.loads,
+            "load_failures": self.load_failures,
+        }
+
+
+game_registry = GameRegistry(ttl=settings.game_registry_ttl_seconds)
+
+# Games may have been added or edited: reload on next use.
+catalog_version.subscribe(lambda version: game_registry.mark_stale())
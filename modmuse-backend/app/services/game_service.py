@@ -1,24 +1,46 @@
 # app/services/game_service.py
-from typing import List
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+
 from app.models.domain import GameRead
+from app.services.game_registry import GameSnapshot, game_registry
+
+
+async def list_supported_games() -> List[GameRead]:
+    """All games in the `game` table, ordered by game_id (served from the registry snapshot)."""
+    return await game_registry.list_games()
+
+
+async def games_snapshot() -> GameSnapshot:
+    """Current snapshot, including the pre-serialized list body and its validators."""
+    return await game_registry.snapshot()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 §13.1.2): W/ prefixes are ignored
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
 
 
-#TODO In Part 3 this will query the database.
-def list_supported_games() -> List[GameRead]:
-    #TODO Placeholder data for skeleton testing
-    return [
-        GameRead(
-            game_id=1,
-            name="Skyrim",
-            genre="RPG",
-            engine="Creation Engine",
-            platform="PC",
-        ),
-        GameRead(
-            game_id=2,
-            name="Minecraft",
-            genre="Sandbox",
-            engine="Custom",
-            platform="PC",
-        ),
-    ]
\ No newline at end of file
+def is_not_modified(
+    snapshot: GameSnapshot, if_none_match: Optional[str], if_modified_since: Optional[str]
+) -> bool:
+    """
+    Whether a conditional GET can be answered with 304. If-None-Match takes
+    precedence; If-Modified-Since is only consulted without it.
+    """
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, snapshot.etag)
+    if if_modified_since is not None:
+        try:
+            since: datetime = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            # "-0000" or no zone at all: HTTP dates are in UTC
+            since = since.replace(tzinfo=timezone.utc)
+        return snapshot.last_modified <= since
+    return False
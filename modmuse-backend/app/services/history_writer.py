@@ -0,0 +1,167 @@
+# app/services/history_writer.py
+"""
+Write-behind queue for prompt/recommendation history.
+
+With HISTORY_WRITE_MODE=write_behind the recommendation response is built from
+in-memory data and the PromptHistoryEntry is handed to this queue. A single
+background task drains it and writes batches from many requests at once via
+PromptHistoryRepository.save_many, flushing when `batch_size` entries are
+waiting or `flush_interval` seconds have passed, whichever comes first.
+
+Backpressure: when the queue is full, `submit` waits at most `enqueue_timeout`
+seconds for room and then drops the entry (counted in `dropped`) rather than
+stalling the request. On shutdown `drain` flushes whatever is still queued.
+"""
+import asyncio
+import time
+import traceback
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.db.repositories import PromptHistoryEntry, PromptHistoryRepository
+from app.db.session import SessionLocal
+
+FlushFn = Callable[[Sequence[PromptHistoryEntry]], Awaitable[None]]
+
+
+async def _save_batch(entries: Sequence[PromptHistoryEntry]) -> None:
+    async with SessionLocal() as session:
+        await PromptHistoryRepository(session).save_many(entries)
+        await session.commit()
+
+
+class HistoryWriter:
+    def __init__(
+        self,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        enqueue_timeout: float,
+        flush: FlushFn = _save_batch,
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._flush = flush
+
+        self._queue: Optional[asyncio.Queue[PromptHistoryEntry]] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._closing = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name="history-writer")
+
+    async def submit(self, entry: PromptHistoryEntry) -> bool:
+        """Queue one entry; returns False if it was dropped."""
+        if self._closing:
+            self.dropped += 1
+            return False
+        if not self.running:
+            self.start()
+        assert self._queue is not None
+
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(entry), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                return False
+
+        self.enqueued += 1
+        return True
+
+    async def _next_batch(self) -> List[PromptHistoryEntry]:
+        assert self._queue is not None
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[PromptHistoryEntry]) -> None:
+        started = time.perf_counter()
+        try:
+            await self._flush(batch)
+            self.written += len(batch)
+        except Exception as e:
+            # History is best-effort in this mode: log and keep the writer alive.
+            self.failed += len(batch)
+            print(f"🔥 History write-behind flush failed ({len(batch)} entries): {e}")
+            traceback.print_exc()
+        finally:
+            self.flushes += 1
+            self.last_flush_seconds = time.perf_counter() - started
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Stop accepting entries, flush what is queued, stop the background task."""
+        self._closing = True
+        if self._task is None or self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ History writer drain timed out with {self._queue.qsize()} entries queued")
+            self.dropped += self._queue.qsize()
+        finally:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+
+history_writer = HistoryWriter(
+    max_queue=settings.history_queue_max_size,
+    batch_size=settings.history_batch_size,
+    flush_interval=settings.history_flush_interval_seconds,
+    enqueue_timeout=settings.history_enqueue_timeout_seconds,
+)
@@ -0,0 +1,299 @@
+# app/services/modlist_solver.py
+"""
+Conflict-free mod list solver.
+
+Given candidate mods with relevance scores, pick the highest-scoring subset
+that contains no incompatible pair and includes every (transitive) dependency
+of every selected mod. This is a weighted independent-set problem, so it is
+solved heuristically within a time budget:
+
+1. Each candidate is a "bundle" (mod + dependency closure) from the
+   compatibility graph. Bundles that conflict with themselves are infeasible.
+2. Greedy: bundles are added whenever they do not clash with the current
+   selection. Three orders are tried (value / (1 + conflicting candidates),
+   bundle value, own score) and the best run is kept.
+3. Local improvement: an unselected bundle replaces the selected bundles it
+   clashes with, and candidates that were only blocked by those are added
+   back greedily; the swap is kept if the total score went up. Repeats until
+   no swap helps or the budget runs out.
+
+Candidates with no dependency/incompatibility edges are always selected.
+"""
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Set
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models_utils.domain import Mod
+from app.db.session import SessionLocal
+from app.models.domain import ModListSolveRequest, ModListSolveResponse
+from app.services.compatibility import CompatibilityGraph, compatibility_engine, iter_bits
+from app.services.game_registry import game_registry
+
+_EPSILON = 1e-9
+
+
+@dataclass
+class SolverResult:
+    # Selected candidates, best score first
+    selected: List[int]
+    # Non-candidate mods added because a selected mod depends on them
+    dependencies_added: List[int]
+    # Feasible candidates left out because they clash with a better selection
+    dropped: List[int]
+    # Candidates that can never be selected (self-conflicting dependency
+    # closure, or a missing dependency when extra dependencies are not allowed)
+    infeasible: List[int]
+    total_score: float
+    greedy_score: float
+    improvements: int = 0
+    elapsed_ms: float = 0.0
+    timed_out: bool = False
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+class _Selection:
+    """
+    Selected bundles. Slot owners and conflict counts are kept per slot, so
+    adding or removing a bundle only touches that bundle's bits, and the
+    selection score is maintained incrementally.
+    """
+
+    def __init__(
+        self,
+        bundles: Mapping[int, int],
+        bundle_slots: Mapping[int, List[int]],
+        conflict_slots: Mapping[int, List[int]],
+        weights: Mapping[int, float],
+    ):
+        self.bundles = bundles
+        self.bundle_slots = bundle_slots
+        self.conflict_slots = conflict_slots
+        self.weights = weights
+        self.roots: Set[int] = set()
+        self.mask = 0
+        self.conflict_mask = 0
+        self.score = 0.0
+        self.owners: Dict[int, Set[int]] = defaultdict(set)
+        self._conflict_counts: Dict[int, int] = defaultdict(int)
+
+    def add(self, root: int) -> None:
+        self.roots.add(root)
+        for i in self.bundle_slots[root]:
+            owners = self.owners[i]
+            if not owners:
+                self.mask |= 1 << i
+                self.score += self.weights.get(i, 0.0)
+            owners.add(root)
+        for i in self.conflict_slots[root]:
+            self._conflict_counts[i] += 1
+            if self._conflict_counts[i] == 1:
+                self.conflict_mask |= 1 << i
+
+    def remove(self, root: int) -> None:
+        self.roots.discard(root)
+        for i in self.bundle_slots[root]:
+            owners = self.owners[i]
+            owners.discard(root)
+            if not owners:
+                del self.owners[i]
+                self.mask &= ~(1 << i)
+                self.score -= self.weights.get(i, 0.0)
+        for i in self.conflict_slots[root]:
+            self._conflict_counts[i] -= 1
+            if not self._conflict_counts[i]:
+                del self._conflict_counts[i]
+                self.conflict_mask &= ~(1 << i)
+
+    def fits(self, root: int) -> bool:
+        return not (self.bundles[root] & self.conflict_mask)
+
+
+def solve_mod_list(
+    graph: CompatibilityGraph,
+    scores: Mapping[int, float],
+    time_budget: float,
+    allow_extra_dependencies: bool = True,
+) -> SolverResult:
+    started = time.perf_counter()
+    deadline = started + time_budget
+
+    free = [mod_id for mod_id in scores if graph.slot(mod_id) is None]
+    weights: Dict[int, float] = {}
+    for mod_id, score in scores.items():
+        slot = graph.slot(mod_id)
+        if slot is not None:
+            weights[slot] = score
+    candidate_mask = 0
+    for slot in weights:
+        candidate_mask |= 1 << slot
+
+    # -----------------------------------------------------
+    # Bundles and feasibility (bit positions decoded once)
+    # -----------------------------------------------------
+    bundles: Dict[int, int] = {}
+    conflicts: Dict[int, int] = {}
+    bundle_slots: Dict[int, List[int]] = {}
+    conflict_slots: Dict[int, List[int]] = {}
+    bundle_values: Dict[int, float] = {}
+    infeasible: List[int] = []
+    for slot in weights:
+        bundle = graph.bundle(slot)
+        bundle_conflicts = graph.conflicts_mask(bundle)
+        if bundle & bundle_conflicts or (
+            not allow_extra_dependencies and bundle & ~candidate_mask
+        ):
+            infeasible.append(graph.mod_id_at(slot))
+            continue
+        bundles[slot] = bundle
+        conflicts[slot] = bundle_conflicts
+        bundle_slots[slot] = list(iter_bits(bundle))
+        conflict_slots[slot] = list(iter_bits(bundle_conflicts))
+        bundle_values[slot] = sum(weights.get(i, 0.0) for i in bundle_slots[slot])
+
+    def priority(slot: int) -> float:
+        degree = (conflicts[slot] & candidate_mask).bit_count()
+        return bundle_values[slot] / (1 + degree)
+
+    def greedy(order: List[int]) -> _Selection:
+        selection = _Selection(bundles, bundle_slots, conflict_slots, weights)
+        for root in order:
+            if selection.fits(root):
+                selection.add(root)
+        return selection
+
+    # -----------------------------------------------------
+    # Greedy construction: keep the best of three orders
+    # (value per conflict, bundle value, own score)
+    # -----------------------------------------------------
+    orders = [
+        sorted(bundles, key=lambda slot: (-key(slot), graph.mod_id_at(slot)))
+        for key in (priority, bundle_values.__getitem__, weights.__getitem__)
+    ]
+    order, selection = max(
+        ((o, greedy(o)) for o in orders), key=lambda pair: pair[1].score
+    )
+    greedy_score = selection.score
+
+    # -----------------------------------------------------
+    # Local improvement: swap one bundle in, the bundles it clashes
+    # with out, refill what that freed up; keep only if it scores higher.
+    # -----------------------------------------------------
+    # slot -> candidate bundles that cannot be added while it is selected
+    blocked_by: Dict[int, List[int]] = defaultdict(list)
+    for root in order:
+        for i in conflict_slots[root]:
+            blocked_by[i].append(root)
+    rank = {root: n for n, root in enumerate(order)}
+
+    improvements = 0
+    timed_out = False
+    improved = True
+    while improved and not timed_out:
+        improved = False
+        for root in order:
+            if time.perf_counter() > deadline:
+                timed_out = True
+                break
+            if root in selection.roots:
+                continue
+
+            clash = selection.mask & conflicts[root]
+            if not clash:
+                selection.add(root)
+                continue
+
+            victims: Set[int] = set()
+            for i in iter_bits(clash):
+                victims |= selection.owners[i]
+
+            before, current = selection.mask, selection.score
+            for victim in victims:
+                selection.remove(victim)
+            lost = before & ~selection.mask
+            selection.add(root)
+
+            added = [root]
+            freed = {other for i in iter_bits(lost) for other in blocked_by.get(i, ())}
+            for other in sorted(freed, key=rank.__getitem__):
+                if other not in selection.roots and selection.fits(other):
+                    selection.add(other)
+                    added.append(other)
+
+            if selection.score > current + _EPSILON:
+                improvements += 1
+                improved = True
+                continue
+
+            # Not better: roll back
+            for other in added:
+                selection.remove(other)
+            for victim in victims:
+                selection.add(victim)
+
+    free_score = sum(scores[mod_id] for mod_id in free)
+    chosen_slots = list(selection.owners)
+    selected = free + [graph.mod_id_at(i) for i in chosen_slots if i in weights]
+    selected.sort(key=lambda mod_id: (-scores[mod_id], mod_id))
+    selected_set = set(selected)
+    infeasible_set = set(infeasible)
+
+    return SolverResult(
+        selected=selected,
+        dependencies_added=sorted(graph.mod_id_at(i) for i in chosen_slots if i not in weights),
+        dropped=sorted(
+            mod_id for mod_id in scores if mod_id not in selected_set and mod_id not in infeasible_set
+        ),
+        infeasible=sorted(infeasible),
+        total_score=free_score + sum(weights[i] for i in chosen_slots if i in weights),
+        greedy_score=free_score + greedy_score,
+        improvements=improvements,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+        timed_out=timed_out,
+        stats={"candidates": len(scores), "bundles": len(bundles)},
+    )
+
+
+async def solve_candidates(request: ModListSolveRequest) -> ModListSolveResponse:
+    """Validate candidates against the game's catalog, then solve."""
+    await game_registry.require(request.game_id)
+
+    scores: Dict[int, float] = {}
+    for candidate in request.candidates:
+        scores[candidate.mod_id] = max(candidate.score, scores.get(candidate.mod_id, 0.0))
+
+    async with SessionLocal() as session:
+        known = set((await session.scalars(
+            select(Mod.mod_id).where(
+                Mod.game_id == request.game_id,
+                Mod.mod_id.in_(list(scores)),
+            )
+        )).all())
+    unknown = sorted(mod_id for mod_id in scores if mod_id not in known)
+    scores = {mod_id: score for mod_id, score in scores.items() if mod_id in known}
+
+    budget_ms = request.time_budget_ms or settings.solver_time_budget_ms
+    graph = await compatibility_engine.graph()
+    result = solve_mod_list(
+        graph,
+        scores,
+        time_budget=budget_ms / 1000,
+        allow_extra_dependencies=request.allow_extra_dependencies,
+    )
+
+    return ModListSolveResponse(
+        game_id=request.game_id,
+        mod_ids=result.selected,
+        dependencies_added=result.dependencies_added,
+        dropped=result.dropped,
+        infeasible=result.infeasible,
+        unknown=unknown,
+        total_score=result.total_score,
+        greedy_score=result.greedy_score,
+        improvements=result.improvements,
+        elapsed_ms=result.elapsed_ms,
+        timed_out=result.timed_out,
+    )
@@ -0,0 +1,160 @@
+# app/services/pipeline.py
+"""
+Minimal async stage graph used by the recommendation pipeline.
+
+Each stage names the stages it depends on and gets their values as keyword
+arguments. Stages whose dependencies are satisfied run concurrently, each under
+its own timeout. A stage that times out or raises resolves to its `default`
+value instead of failing the whole graph, and every stage that depends on it is
+skipped, so callers can still build a partial result. A stage with a
+`fallback` instead resolves to `fallback(error)` with status "fallback": it
+still counts as degraded, but its dependents run on the fallback value.
+
+`run(on_result=...)` reports each StageResult as soon as that stage settles,
+which is what the streaming endpoint uses to emit partial results early.
+"""
+import asyncio
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+STAGE_OK = "ok"
+STAGE_TIMEOUT = "timeout"
+STAGE_ERROR = "error"
+STAGE_SKIPPED = "skipped"
+STAGE_FALLBACK = "fallback"
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[..., Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    default: Any = None
+    fallback: Optional[Callable[[BaseException], Any]] = None
+
+
+@dataclass
+class StageResult:
+    name: str
+    value: Any
+    status: str
+    elapsed: float = 0.0
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STAGE_OK
+
+    @property
+    def usable(self) -> bool:
+        """Dependents can run on this value."""
+        return self.status in (STAGE_OK, STAGE_FALLBACK)
+
+
+@dataclass
+class PipelineResult:
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.stages[name].value
+
+    @property
+    def degraded(self) -> List[str]:
+        """Names of stages that did not complete normally, in insertion order."""
+        return [name for name, res in self.stages.items() if not res.ok]
+
+    def timings(self) -> Dict[str, float]:
+        return {name: res.elapsed for name, res in self.stages.items()}
+
+
+class StageGraph:
+    def __init__(self) -> None:
+        self._stages: Dict[str, Stage] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Awaitable[Any]],
+        *,
+        deps: Tuple[str, ...] = (),
+        timeout: Optional[float] = None,
+        default: Any = None,
+        fallback: Optional[Callable[[BaseException], Any]] = None,
+    ) -> "StageGraph":
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dep!r}")
+        self._stages[name] = Stage(
+            name=name, fn=fn, deps=tuple(deps), timeout=timeout, default=default, fallback=fallback
+        )
+        return self
+
+    async def run(
+        self, on_result: Optional[Callable[[StageResult], None]] = None
+    ) -> PipelineResult:
+        tasks: Dict[str, "asyncio.Task[StageResult]"] = {}
+
+        # Stages can only depend on previously added ones, so insertion order is
+        # already a valid topological order.
+        for stage in self._stages.values():
+            dep_tasks = [tasks[dep] for dep in stage.deps]
+            tasks[stage.name] = asyncio.create_task(self._run_stage(stage, dep_tasks, on_result))
+
+        try:
+            done = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return PipelineResult(stages={res.name: res for res in done})
+
+    async def _run_stage(
+        self,
+        stage: Stage,
+        dep_tasks: List["asyncio.Task[StageResult]"],
+        on_result: Optional[Callable[[StageResult], None]] = None,
+    ) -> StageResult:
+        result = await self._settle(stage, dep_tasks)
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    async def _settle(
+        self, stage: Stage, dep_tasks: List["asyncio.Task[StageResult]"]
+    ) -> StageResult:
+        dep_results = [await task for task in dep_tasks]
+        if any(not res.usable for res in dep_results):
+            return StageResult(stage.name, stage.default, STAGE_SKIPPED)
+
+        kwargs = {res.name: res.value for res in dep_results}
+        started = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(stage.fn(**kwargs), timeout=stage.timeout)
+        except asyncio.TimeoutError as e:
+            elapsed = time.perf_counter() - started
+            print(f"⏱️ Stage '{stage.name}' missed its {stage.timeout}s deadline")
+            return self._failed(stage, STAGE_TIMEOUT, elapsed, e)
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            print(f"🔥 Stage '{stage.name}' failed: {type(e).__name__}: {e}")
+            traceback.print_exc()
+            return self._failed(stage, STAGE_ERROR, elapsed, e)
+
+        return StageResult(stage.name, value, STAGE_OK, time.perf_counter() - started)
+
+    def _failed(self, stage: Stage, status: str, elapsed: float, error: BaseException) -> StageResult:
+        if stage.fallback is None:
+            return StageResult(stage.name, stage.default, status, elapsed, error)
+        try:
+            value = stage.fallback(error)
+        except Exception as e:
+            print(f"🔥 Stage '{stage.name}' fallback failed: {type(e).__name__}: {e}")
+            return StageResult(stage.name, stage.default, status, elapsed, error)
+        print(f"↩️ Stage '{stage.name}' using its fallback after {status}")
+        return StageResult(stage.name, value, STAGE_FALLBACK, elapsed, error)
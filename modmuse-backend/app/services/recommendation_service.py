@@ -1,13 +1,21 @@
 # app/services/recommendation_service.py
 
+import asyncio
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-from sqlalchemy import select, text
+from pydantic import BaseModel
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models.domain import (
+    BatchRecommendationResponse,
+    CandidatesEvent,
+    CompatibilityRead,
+    ExcludedMod,
+    KeywordsEvent,
     PromptCreate,
     PromptRead,
     RecommendationItem,
@@ -15,10 +23,564 @@ from app.models.domain import (
     ModRead,
     TagRead,
 )
-from app.db.models_utils.domain import Prompt, Recommendation, Mod, Tag, ModTag
-from app.services.ai_services import extract_keywords, embed_text
+from app.core.cache import normalize_prompt
+from app.core.config import settings
+from app.db.models_utils.domain import Mod, ModTag, Prompt
+from app.db.repositories import (
+    PromptHistoryEntry,
+    PromptHistoryRepository,
+    RecommendationRow,
+    SavedHistory,
+)
+from app.db.session import SessionLocal
+from app.services.ai_services import KEYWORD_MODEL, extract_keywords, fallback_keywords
+from app.services.catalog_version import catalog_version
+from app.services.compatibility import (
+    CompatibilityGraph,
+    ExcludedCandidate,
+    ResolvedMod,
+    compatibility_engine,
+)
+from app.services.embedding_cache import prompt_embedding_cache
+from app.services.embedding_registry import embedding_registry
+from app.services.embedding_service import EMBEDDING_MODEL
+from app.services.game_registry import game_registry
+from app.services.history_writer import history_writer
+from app.services.pipeline import STAGE_OK, PipelineResult, StageGraph, StageResult
+from app.services.response_cache import response_cache
+from app.services.semantic_cache import semantic_prompt_cache
+from app.services.tag_index import tag_index
+from app.services.vector_index import vector_backend
+
+
+async def resolve_game_id(game_id: Optional[int]) -> int:
+    """The request's game (default: settings.default_game_id); raises UnknownGameError."""
+    game_id = settings.default_game_id if game_id is None else game_id
+    await game_registry.require(game_id)
+    return game_id
+
+
+# ---------------------------------------------------------
+# Retrieval stages
+#
+# Search stages return ranked mod ids only; mods are hydrated
+# once, after merging and compatibility filtering. Stages that
+# query run concurrently, so each opens its own short-lived
+# session instead of sharing the request session.
+#
+# Everything is partitioned by game: per-game partial ANN
+# indexes / numpy partitions and per-game tag postings, so a
+# query only touches its own game's data.
+# ---------------------------------------------------------
+
+async def _semantic_search(embedding: List[float], game_id: int) -> List[int]:
+    """4A. Semantic Search (settings.vector_backend) — FILTERED BY GAME"""
+    # Mod vectors from another embedding space: fail the stage, not the answer
+    await embedding_registry.ensure_compatible()
+    scored = await vector_backend.search(embedding, game_id, k=settings.semantic_top_k)
+    return [mod_id for mod_id, _ in scored]
+
+
+async def _keyword_search(keywords: List[str], game_id: int) -> List[int]:
+    """4B. Keyword Tag Search (fuzzy, in-memory tag index) — ALSO FILTERED BY GAME"""
+    if not keywords:
+        return []
+
+    scored = await tag_index.candidates(keywords, game_id, limit=settings.keyword_candidate_limit)
+    return [mod_id for mod_id, _ in scored]
+
+
+def _by_game(game_ids: List[int]) -> Dict[int, List[int]]:
+    """Positions in a batch grouped by game_id."""
+    groups: Dict[int, List[int]] = {}
+    for n, game_id in enumerate(game_ids):
+        groups.setdefault(game_id, []).append(n)
+    return groups
+
+
+async def _semantic_search_many(embeddings: List[List[float]], game_ids: List[int]) -> List[List[int]]:
+    """4A for a batch: one set-based / vectorized search per game in the batch."""
+    await embedding_registry.ensure_compatible()
+    groups = _by_game(game_ids)
+    scored = await asyncio.gather(*(
+        vector_backend.search_many([embeddings[n] for n in positions], game_id, k=settings.semantic_top_k)
+        for game_id, positions in groups.items()
+    ))
+    results: List[List[int]] = [[] for _ in embeddings]
+    for positions, hits_per_prompt in zip(groups.values(), scored):
+        for n, hits in zip(positions, hits_per_prompt):
+            results[n] = [mod_id for mod_id, _ in hits]
+    return results
+
+
+async def _keyword_search_many(keyword_lists: List[List[str]], game_ids: List[int]) -> List[List[int]]:
+    """4B for a batch: each game's tag index is loaded once, then lookups are in-memory."""
+    game_tags = {game_id: await tag_index.for_game(game_id) for game_id in set(game_ids)}
+    return [
+        [mod_id for mod_id, _ in game_tags[game_id].candidates(keywords, settings.keyword_candidate_limit)]
+        if keywords else []
+        for keywords, game_id in zip(keyword_lists, game_ids)
+    ]
+
+
+async def _extract_keywords_many(prompts: List[str]) -> List[List[str]]:
+    results = await asyncio.gather(*(extract_keywords(p) for p in prompts), return_exceptions=True)
+    keyword_lists: List[List[str]] = []
+    for prompt, result in zip(prompts, results):
+        if isinstance(result, BaseException):
+            # Like the single-prompt stage fallback: the tag channel runs on the prompt's own words
+            print(f"⚠️ Keyword extraction failed for {prompt!r}: {result}")
+            result = fallback_keywords(prompt)
+        keyword_lists.append(result)
+    return keyword_lists
+
+
+async def _hydrate_mods(mod_ids: List[int]) -> Dict[int, Mod]:
+    """Load mods (with tags) by id in one query."""
+    if not mod_ids:
+        return {}
+
+    async with SessionLocal() as search_session:
+        result = await search_session.execute(
+            select(Mod)
+            .options(selectinload(Mod.tags).selectinload(ModTag.tag))
+            .where(Mod.mod_id.in_(mod_ids))
+        )
+        return {mod.mod_id: mod for mod in result.scalars().all()}
+
+
+# ---------------------------------------------------------
+# 5. Merge + Deduplicate + Compatibility filtering
+# ---------------------------------------------------------
+
+@dataclass
+class _Ranked:
+    mod_ids: List[int]
+    resolved: Dict[int, ResolvedMod] = field(default_factory=dict)
+    excluded: List[ExcludedCandidate] = field(default_factory=list)
+
+
+async def _compatibility_graph(degraded: List[str]) -> Optional[CompatibilityGraph]:
+    try:
+        return await compatibility_engine.graph()
+    except Exception as e:
+        print(f"⚠️ Compatibility filtering unavailable: {e}")
+        degraded.append("compatibility")
+        return None
+
+
+def _rank(
+    semantic_ids: List[int], keyword_ids: List[int], graph: Optional[CompatibilityGraph]
+) -> _Ranked:
+    """
+    Semantic first, then keyword matches, deduplicated. With the compatibility
+    graph, one pass drops conflicting mods and pulls required dependencies in
+    right after the mod that needs them.
+    """
+    merged = list(dict.fromkeys(semantic_ids + keyword_ids))
+    if graph is None:
+        return _Ranked(mod_ids=merged)
+
+    compat = graph.resolve(merged)
+    return _Ranked(
+        mod_ids=compat.mod_ids,
+        resolved={m.mod_id: m for m in compat.mods},
+        excluded=compat.excluded,
+    )
+
+
+# ---------------------------------------------------------
+# 6. History rows + DTOs
+# ---------------------------------------------------------
+
+def _history_entry(
+    user_prompt: str,
+    game_id: int,
+    extracted_keywords: List[str],
+    prompt_embedding: Optional[List[float]],
+    mods: List[Mod],
+    catalog_version: Optional[int],
+) -> PromptHistoryEntry:
+    """`catalog_version` only for complete answers: it makes the entry reusable."""
+    # Tags matched by the keyword channel (exact, token or fuzzy)
+    game_tags = tag_index.loaded(game_id)
+    matched_tags = game_tags.match_keywords(extracted_keywords) if game_tags else {}
+    keyword_set = set(extracted_keywords)
+
+    rows: List[RecommendationRow] = []
+    for rank_order, mod in enumerate(mods, start=1):
+        tag_score = sum(
+            1 for t in mod.tags if t.tag_id in matched_tags or t.tag.name in keyword_set
+        )
+        rows.append(RecommendationRow(mod_id=mod.mod_id, relevance_score=tag_score, rank_order=rank_order))
+
+    return PromptHistoryEntry(
+        user_prompt=user_prompt,
+        created_at=datetime.utcnow(),
+        extracted_keywords=extracted_keywords,
+        model_version=KEYWORD_MODEL,
+        normalized_prompt=normalize_prompt(user_prompt),
+        embedding_model=EMBEDDING_MODEL,
+        embedding=prompt_embedding,
+        game_id=game_id,
+        catalog_version=catalog_version,
+        recommendations=rows,
+    )
+
+
+def _mod_read(mod: Mod) -> ModRead:
+    return ModRead(
+        mod_id=mod.mod_id,
+        name=mod.name,
+        description=mod.description,
+        source_url=mod.source_url,
+        version=mod.version,
+        game_id=mod.game_id,
+        tags=[TagRead(tag_id=mt.tag_id, name=mt.tag.name) for mt in mod.tags]
+    )
+
+
+def _compatibility_read(resolved: Optional[ResolvedMod]) -> Optional[CompatibilityRead]:
+    if resolved is None:
+        return None
+    return CompatibilityRead(
+        status=resolved.status,
+        requires=resolved.requires,
+        required_by=resolved.required_by,
+    )
+
+
+def _build_response(
+    entry: PromptHistoryEntry,
+    saved: SavedHistory,
+    mods: List[Mod],
+    ranked: _Ranked,
+    degraded: List[str],
+) -> RecommendationResponse:
+    recommendation_items: List[RecommendationItem] = []
+
+    for mod, row, rec_id in zip(mods, entry.recommendations, saved.rec_ids):
+        recommendation_items.append(
+            RecommendationItem(
+                rec_id=rec_id,
+                prompt_id=saved.prompt_id,
+                mod=_mod_read(mod),
+                relevance_score=row.relevance_score,
+                rank_order=row.rank_order,
+                compatibility=_compatibility_read(ranked.resolved.get(mod.mod_id)),
+            )
+        )
+
+    prompt_read = PromptRead(
+        prompt_id=saved.prompt_id,
+        user_prompt=entry.user_prompt,
+        created_at=entry.created_at,
+        extracted_keywords=entry.extracted_keywords,
+        model_version=entry.model_version,
+    )
+
+    return RecommendationResponse(
+        prompt=prompt_read,
+        recommendations=recommendation_items,
+        excluded=[
+            ExcludedMod(mod_id=e.mod_id, reason=e.reason, conflicts_with=e.conflicts_with)
+            for e in ranked.excluded
+        ],
+        degraded_stages=degraded,
+    )
+
+
+def _cached_entry(
+    cached: RecommendationResponse, user_prompt: str, game_id: int, version: Optional[int]
+) -> PromptHistoryEntry:
+    return PromptHistoryEntry(
+        user_prompt=user_prompt,
+        created_at=datetime.utcnow(),
+        extracted_keywords=cached.prompt.extracted_keywords,
+        model_version=KEYWORD_MODEL,
+        normalized_prompt=normalize_prompt(user_prompt),
+        embedding_model=EMBEDDING_MODEL,
+        # Only if it is still in memory; never worth an API call here
+        embedding=prompt_embedding_cache.peek(user_prompt),
+        game_id=game_id,
+        catalog_version=version,
+        recommendations=[
+            RecommendationRow(
+                mod_id=item.mod.mod_id,
+                relevance_score=item.relevance_score,
+                rank_order=item.rank_order,
+            )
+            for item in cached.recommendations
+        ],
+    )
+
+
+def _replayed_response(
+    cached: RecommendationResponse, entry: PromptHistoryEntry, saved: SavedHistory
+) -> RecommendationResponse:
+    """A cached response re-issued under the new prompt's ids."""
+    return RecommendationResponse(
+        prompt=cached.prompt.model_copy(update={
+            "prompt_id": saved.prompt_id,
+            "user_prompt": entry.user_prompt,
+            "created_at": entry.created_at,
+        }),
+        recommendations=[
+            item.model_copy(update={"rec_id": rec_id, "prompt_id": saved.prompt_id})
+            for item, rec_id in zip(cached.recommendations, saved.rec_ids)
+        ],
+        excluded=cached.excluded,
+    )
+
+
+async def _prompt_embedding(user_prompt: str) -> List[float]:
+    """
+    Prompt embedding through the cache, on its own session: callers cancel
+    it at their deadline, which must not leave the request session mid-query.
+    """
+    async with SessionLocal() as embed_session:
+        return await prompt_embedding_cache.get_or_embed(user_prompt, embed_session)
+
+
+async def _prompt_embeddings(user_prompts: List[str]) -> List[List[float]]:
+    async with SessionLocal() as embed_session:
+        return await prompt_embedding_cache.get_or_embed_many(user_prompts, embed_session)
+
+
+async def _stored_response(prompt_id: int, session: AsyncSession) -> Optional[RecommendationResponse]:
+    """A prior prompt's answer rebuilt from its Prompt + Recommendation rows."""
+    prompt = (await session.execute(
+        select(Prompt)
+        .options(selectinload(Prompt.recommendations))
+        .where(Prompt.prompt_id == prompt_id)
+    )).scalar_one_or_none()
+    if prompt is None:
+        return None
+
+    recs = sorted(prompt.recommendations, key=lambda r: r.rank_order)
+    mods_by_id = await _hydrate_mods([r.mod_id for r in recs])
+    recs = [r for r in recs if r.mod_id in mods_by_id]
+
+    degraded: List[str] = []
+    compat_graph = await _compatibility_graph(degraded)
+    if degraded:
+        return None
+    # Statuses for the stored (already compatibility-checked) list
+    ranked = _rank([r.mod_id for r in recs], [], compat_graph)
+
+    entry = PromptHistoryEntry(
+        user_prompt=prompt.user_prompt,
+        created_at=prompt.created_at,
+        extracted_keywords=prompt.extracted_keywords.split(",") if prompt.extracted_keywords else [],
+        model_version=prompt.model_version,
+        recommendations=[
+            RecommendationRow(mod_id=r.mod_id, relevance_score=r.relevance_score, rank_order=r.rank_order)
+            for r in recs
+        ],
+    )
+    saved = SavedHistory(prompt_id=prompt.prompt_id, rec_ids=[r.rec_id for r in recs])
+    return _build_response(entry, saved, [mods_by_id[r.mod_id] for r in recs], ranked, degraded)
+
+
+async def _similar_prompt_response(
+    game_id: int,
+    version: Optional[int],
+    embedding: "asyncio.Future[List[float]]",
+    session: AsyncSession,
+) -> Optional[RecommendationResponse]:
+    """
+    0b. Near-duplicate prompt reuse
+
+    Waits for the prompt embedding the retrieval graph is already computing
+    (so its stage deadline applies and a failed embedding is not retried)
+    and looks for a close enough prior prompt for the game.
+    """
+    if not semantic_prompt_cache.active(version):
+        return None
+    await asyncio.wait([embedding])
+    if embedding.cancelled() or embedding.exception() is not None:
+        return None
+    try:
+        match = await semantic_prompt_cache.lookup(game_id, embedding.result(), version)
+        if match is None:
+            return None
+        if match.response is None:
+            match.response = await _stored_response(match.prompt_id, session)
+            if match.response is None:
+                return None
+            semantic_prompt_cache.remember(match)
+    except Exception as e:
+        # Reuse is an optimization: fall through to the full pipeline
+        print(f"⚠️ Prompt reuse lookup failed: {e!r}")
+        return None
+
+    print(f"🔥 DEBUG — Reusing answer of prompt {match.prompt_id} (similarity {match.similarity:.3f})")
+    return match.response
+
+
+async def _save_history(entry: PromptHistoryEntry, session: AsyncSession) -> SavedHistory:
+    if settings.history_write_mode == "write_behind":
+        # Off the critical path: ids are not known yet and are left empty.
+        await history_writer.submit(entry)
+        return SavedHistory(prompt_id=None, rec_ids=[None] * len(entry.recommendations))
 
-SKYRIM_GAME_ID = 1  # TODO: update to real game_id for Skyrim
+    saved = await PromptHistoryRepository(session).save(entry)
+    await session.commit()
+    return saved
+
+
+async def _save_history_many(
+    entries: List[PromptHistoryEntry], session: AsyncSession
+) -> List[SavedHistory]:
+    if settings.history_write_mode == "write_behind":
+        for entry in entries:
+            await history_writer.submit(entry)
+        return [SavedHistory(prompt_id=None, rec_ids=[None] * len(e.recommendations)) for e in entries]
+
+    saved = await PromptHistoryRepository(session).save_many(entries)
+    await session.commit()
+    return saved
+
+
+def _raise_if_no_retrieval(stages: PipelineResult) -> None:
+    if not stages.stages["vector_search"].ok and not stages.stages["tag_search"].ok:
+        # Nothing to degrade to: surface the first underlying failure.
+        failed = next(res for res in stages.stages.values() if res.error is not None)
+        raise RuntimeError(f"All retrieval stages failed ({failed.name}: {failed.status})") from failed.error
+
+
+def _retrieval_graph(
+    user_prompt: str, game_id: int, embedding: "asyncio.Future[List[float]]"
+) -> StageGraph:
+    """
+    1-4. Retrieval stage graph
+
+      keywords  ──► tag_search
+      embedding ──► vector_search
+
+    Independent stages run concurrently, so latency is roughly the
+    slowest chain. A stage that misses its deadline resolves to an
+    empty result and the response is built from whatever finished.
+    The embedding stage awaits `embedding`, which the near-duplicate
+    lookup shares (see _start_retrieval).
+
+    Provider outages (circuit open, overload, retries exhausted) fail
+    fast inside the stage deadlines. Without keyword extraction the
+    tag channel runs on the prompt's own words; without embeddings
+    the answer is tag-only. Only if both channels fail is there no
+    answer.
+    """
+    graph = StageGraph()
+    graph.add(
+        "keywords",
+        lambda: extract_keywords(user_prompt),
+        timeout=settings.keyword_stage_timeout,
+        default=[],
+        fallback=lambda error: fallback_keywords(user_prompt),
+    )
+    graph.add(
+        "embedding",
+        lambda: embedding,
+        timeout=settings.embedding_stage_timeout,
+        default=None,
+    )
+    graph.add(
+        "vector_search",
+        lambda embedding: _semantic_search(embedding, game_id),
+        deps=("embedding",),
+        timeout=settings.vector_search_stage_timeout,
+        default=[],
+    )
+    graph.add(
+        "tag_search",
+        lambda keywords: _keyword_search(keywords, game_id),
+        deps=("keywords",),
+        timeout=settings.tag_search_stage_timeout,
+        default=[],
+    )
+    return graph
+
+
+def _start_retrieval(
+    user_prompt: str,
+    game_id: int,
+    on_result: Optional[Callable[[StageResult], None]] = None,
+) -> Tuple["asyncio.Future[List[float]]", "asyncio.Task[PipelineResult]"]:
+    """
+    Start the retrieval graph before the near-duplicate lookup, so keyword
+    extraction overlaps the prompt embedding both of them need. A reused
+    answer cancels the run.
+    """
+    embedding = asyncio.ensure_future(_prompt_embedding(user_prompt))
+    run = asyncio.create_task(_retrieval_graph(user_prompt, game_id, embedding).run(on_result=on_result))
+    return embedding, run
+
+
+async def _replay(
+    cached: RecommendationResponse,
+    user_prompt: str,
+    game_id: int,
+    version: Optional[int],
+    session: AsyncSession,
+) -> RecommendationResponse:
+    """A cached or reused answer, recorded in history for the new prompt."""
+    entry = _cached_entry(cached, user_prompt, game_id, version)
+    saved = await _save_history(entry, session)
+    return _replayed_response(cached, entry, saved)
+
+
+async def _complete(
+    user_prompt: str,
+    game_id: int,
+    stages: PipelineResult,
+    session: AsyncSession,
+    version: int,
+    known_mods: Optional[Dict[int, Mod]] = None,
+) -> RecommendationResponse:
+    """Steps 5-7 once retrieval has settled; `known_mods` skips re-hydration."""
+    _raise_if_no_retrieval(stages)
+
+    extracted_keywords: List[str] = stages["keywords"]
+    prompt_embedding: Optional[List[float]] = stages["embedding"]
+
+    print("🔥 DEBUG — Extracted keywords:", extracted_keywords)
+    print("🔥 DEBUG — Prompt embedding length:", len(prompt_embedding) if prompt_embedding else None)
+
+    # ---------------------------------------------------------
+    # 5. Merge + Deduplicate (semantic first) + Compatibility
+    # ---------------------------------------------------------
+    degraded = stages.degraded
+    compat_graph = await _compatibility_graph(degraded)
+    ranked = _rank(stages["vector_search"], stages["tag_search"], compat_graph)
+
+    mods_by_id = dict(known_mods or {})
+    mods_by_id.update(await _hydrate_mods([m for m in ranked.mod_ids if m not in mods_by_id]))
+    final_mods = [mods_by_id[mod_id] for mod_id in ranked.mod_ids if mod_id in mods_by_id]
+
+    # ---------------------------------------------------------
+    # 6. Save Prompt + Recommendation rows → DB
+    #
+    # One INSERT ... RETURNING for the prompt and every
+    # recommendation row, however many mods were recommended.
+    # ---------------------------------------------------------
+    entry = _history_entry(
+        user_prompt, game_id, extracted_keywords, prompt_embedding, final_mods,
+        None if degraded else version,
+    )
+    saved = await _save_history(entry, session)
+
+    # ---------------------------------------------------------
+    # 7. Build Response DTO
+    # ---------------------------------------------------------
+    response = _build_response(entry, saved, final_mods, ranked, degraded)
+
+    # Partial results are never cached
+    if not degraded:
+        await response_cache.set(game_id, user_prompt, EMBEDDING_MODEL, version, response)
+        semantic_prompt_cache.add(game_id, version, prompt_embedding, response)
+
+    print(f"🔥 DEBUG — Returning {len(response.recommendations)} recommendations.")
+    return response
 
 
 async def generate_recommendations(
@@ -27,156 +589,244 @@ async def generate_recommendations(
 ) -> RecommendationResponse:
 
     try:
-        # ---------------------------------------------------------
-        # 1. Extract Keywords
-        # ---------------------------------------------------------
-        extracted_keywords: List[str] = await extract_keywords(prompt_data.user_prompt)
-        print("🔥 DEBUG — Extracted keywords:", extracted_keywords)
+        user_prompt = prompt_data.user_prompt
+        game_id = await resolve_game_id(prompt_data.game_id)
 
         # ---------------------------------------------------------
-        # 2. Generate Embedding
+        # 0. Full-response cache (keyed on catalog version), then
+        #    near-duplicate prompt reuse
+        #
+        # A cache hit skips the keyword LLM call and every catalog
+        # query. Reuse needs the prompt embedding, so retrieval starts
+        # alongside it and a reused answer cancels the rest; history
+        # is still recorded for the new prompt.
         # ---------------------------------------------------------
-        prompt_embedding: Optional[List[float]] = await embed_text(prompt_data.user_prompt)
-        print("🔥 DEBUG — Prompt embedding length:", len(prompt_embedding) if prompt_embedding else None)
+        version = catalog_version.current
+        cached = await response_cache.get(game_id, user_prompt, EMBEDDING_MODEL, version)
+        if cached is not None:
+            print("🔥 DEBUG — Response cache hit")
+            return await _replay(cached, user_prompt, game_id, version, session)
 
-        # ---------------------------------------------------------
-        # 3. Save Prompt → DB
-        # ---------------------------------------------------------
-        new_prompt = Prompt(
-            user_prompt=prompt_data.user_prompt,
-            created_at=datetime.utcnow(),
-            extracted_keywords=",".join(extracted_keywords),
-            model_version="gpt-4o-mini",
-            embedding=prompt_embedding,
+        embedding, run = _start_retrieval(user_prompt, game_id)
+        try:
+            cached = await _similar_prompt_response(game_id, version, embedding, session)
+            if cached is not None:
+                run.cancel()
+                return await _replay(cached, user_prompt, game_id, version, session)
+            stages = await run
+        finally:
+            if not run.done():
+                run.cancel()
+        print("🔥 DEBUG — Stage timings:", stages.timings())
+
+        return await _complete(user_prompt, game_id, stages, session, version)
+
+    except Exception as e:
+        print("\n🔥🔥🔥 ERROR INSIDE generate_recommendations() 🔥🔥🔥")
+        import traceback
+        traceback.print_exc()
+        print("---------------------------------------------------------\n")
+        raise
+
+
+# ---------------------------------------------------------
+# Streaming
+#
+# Events as (name, model) pairs; the route frames them as
+# NDJSON or SSE:
+#   keywords  — as soon as extraction settles
+#   semantic  — first vector-search hits
+#   keyword   — tag-channel hits
+#   result    — final ranked, compatibility-checked response
+# Channel events come in whatever order the stages finish.
+# ---------------------------------------------------------
+
+StreamEvent = Tuple[str, BaseModel]
+
+_STREAMED_STAGES = {"keywords": "keywords", "vector_search": "semantic", "tag_search": "keyword"}
+
+
+async def stream_recommendations(
+    prompt_data: PromptCreate,
+    session: AsyncSession
+) -> AsyncIterator[StreamEvent]:
+    user_prompt = prompt_data.user_prompt
+    game_id = await resolve_game_id(prompt_data.game_id)
+    version = catalog_version.current
+
+    cached = await response_cache.get(game_id, user_prompt, EMBEDDING_MODEL, version)
+    if cached is not None:
+        print("🔥 DEBUG — Response cache hit (stream)")
+        yield "keywords", KeywordsEvent(
+            status=STAGE_OK, keywords=cached.prompt.extracted_keywords, elapsed_ms=0.0
         )
-        session.add(new_prompt)
-        await session.flush()
+        yield "result", await _replay(cached, user_prompt, game_id, version, session)
+        return
 
-        # ---------------------------------------------------------
-        # 4A. Semantic Search (pgvector) — FILTERED BY GAME
-        # ---------------------------------------------------------
-        semantic_mods: List[Mod] = []
-        semantic_ids: List[int] = []
-
-        if prompt_embedding:
-            embed_str = "[" + ",".join(f"{x}" for x in prompt_embedding) + "]"
-            vector_query = text("""
-                SELECT mod_id
-                FROM mod
-                WHERE embedding IS NOT NULL
-                  AND game_id = :game_id
-                ORDER BY embedding <=> :embed
-                LIMIT 8;
-            """)
-
-            rows = await session.execute(
-                vector_query,
-                {
-                    "embed": embed_str,
-                    "game_id": SKYRIM_GAME_ID
-                }
+    settled: "asyncio.Queue[Optional[StageResult]]" = asyncio.Queue()
+    embedding, run = _start_retrieval(user_prompt, game_id, on_result=settled.put_nowait)
+    run.add_done_callback(lambda _: settled.put_nowait(None))
+
+    # Mods hydrated for channel events are reused for the final list
+    known_mods: Dict[int, Mod] = {}
+    try:
+        cached = await _similar_prompt_response(game_id, version, embedding, session)
+        if cached is not None:
+            run.cancel()
+            yield "keywords", KeywordsEvent(
+                status=STAGE_OK, keywords=cached.prompt.extracted_keywords, elapsed_ms=0.0
             )
+            yield "result", await _replay(cached, user_prompt, game_id, version, session)
+            return
+
+        while (res := await settled.get()) is not None:
+            event = _STREAMED_STAGES.get(res.name)
+            if event is None:
+                continue
+            elapsed_ms = res.elapsed * 1000
+            if event == "keywords":
+                yield event, KeywordsEvent(status=res.status, keywords=res.value, elapsed_ms=elapsed_ms)
+                continue
+
+            missing = [mod_id for mod_id in res.value if mod_id not in known_mods]
+            known_mods.update(await _hydrate_mods(missing))
+            yield event, CandidatesEvent(
+                channel=event,
+                status=res.status,
+                mods=[_mod_read(known_mods[m]) for m in res.value if m in known_mods],
+                elapsed_ms=elapsed_ms,
+            )
+
+        stages = await run
+        print("🔥 DEBUG — Stage timings (stream):", stages.timings())
+        yield "result", await _complete(user_prompt, game_id, stages, session, version, known_mods)
+    finally:
+        # Client went away mid-stream: stop outstanding stages
+        if not run.done():
+            run.cancel()
 
-            semantic_ids = [row.mod_id for row in rows]
 
-            if semantic_ids:
-                result = await session.execute(
-                    select(Mod)
-                    .options(selectinload(Mod.tags).selectinload(ModTag.tag))
-                    .where(Mod.mod_id.in_(semantic_ids))
-                )
-                semantic_mods = list(result.scalars().all())
+async def generate_recommendations_batch(
+    prompts: List[PromptCreate],
+    session: AsyncSession
+) -> BatchRecommendationResponse:
+    """
+    Many prompts through one pipeline run: a single list-input embeddings call,
+    one batched vector search, one mod hydration query and one bulk history
+    insert, instead of all of that per prompt. Prompts may target different
+    games; searches are grouped per game.
+    """
+    try:
+        user_prompts = [p.user_prompt for p in prompts]
+        game_ids = [await resolve_game_id(p.game_id) for p in prompts]
 
         # ---------------------------------------------------------
-        # 4B. Keyword Tag Search — ALSO FILTERED BY GAME
+        # 0. Full-response cache, per prompt
         # ---------------------------------------------------------
-        keyword_mods: List[Mod] = []
-        if extracted_keywords:
-            stmt = (
-                select(Mod)
-                .options(selectinload(Mod.tags).selectinload(ModTag.tag))
-                .join(ModTag)
-                .join(Tag)
-                .where(
-                    Mod.game_id == SKYRIM_GAME_ID,
-                    Tag.name.in_(extracted_keywords),
-                )
-            )
-            result = await session.execute(stmt)
-            keyword_mods = list(result.scalars().unique().all())
+        version = catalog_version.current
+        cached = await asyncio.gather(*(
+            response_cache.get(game_id, prompt, EMBEDDING_MODEL, version)
+            for prompt, game_id in zip(user_prompts, game_ids)
+        ))
+        misses = [i for i, hit in enumerate(cached) if hit is None]
+        miss_prompts = [user_prompts[i] for i in misses]
+        miss_games = [game_ids[i] for i in misses]
+        print(f"🔥 DEBUG — Batch of {len(prompts)}: {len(prompts) - len(misses)} response cache hits")
 
         # ---------------------------------------------------------
-        # 5. Merge + Deduplicate (semantic first)
+        # 1-4. Retrieval stage graph, batched
         # ---------------------------------------------------------
-        final_mods: List[Mod] = []
-        seen = set()
+        degraded: List[str] = []
+        ranked_by_index: Dict[int, _Ranked] = {}
+        keywords_by_index: Dict[int, List[str]] = {}
+        embedding_by_index: Dict[int, Optional[List[float]]] = {}
+
+        if misses:
+            graph = StageGraph()
+            graph.add(
+                "keywords",
+                lambda: _extract_keywords_many(miss_prompts),
+                timeout=settings.keyword_stage_timeout,
+                default=[[] for _ in misses],
+                fallback=lambda error: [fallback_keywords(p) for p in miss_prompts],
+            )
+            graph.add(
+                "embedding",
+                lambda: _prompt_embeddings(miss_prompts),
+                timeout=settings.embedding_stage_timeout,
+                default=None,
+            )
+            graph.add(
+                "vector_search",
+                lambda embedding: _semantic_search_many(embedding, miss_games),
+                deps=("embedding",),
+                timeout=settings.vector_search_stage_timeout,
+                default=[[] for _ in misses],
+            )
+            graph.add(
+                "tag_search",
+                lambda keywords: _keyword_search_many(keywords, miss_games),
+                deps=("keywords",),
+                timeout=settings.tag_search_stage_timeout,
+                default=[[] for _ in misses],
+            )
+
+            stages = await graph.run()
+            print("🔥 DEBUG — Batch stage timings:", stages.timings())
+            _raise_if_no_retrieval(stages)
 
-        for mod in semantic_mods + keyword_mods:
-            if mod.mod_id not in seen:
-                seen.add(mod.mod_id)
-                final_mods.append(mod)
+            degraded = stages.degraded
+            compat_graph = await _compatibility_graph(degraded)
+            embeddings = stages["embedding"] or [None] * len(misses)
+            for n, i in enumerate(misses):
+                keywords_by_index[i] = stages["keywords"][n]
+                embedding_by_index[i] = embeddings[n]
+                ranked_by_index[i] = _rank(stages["vector_search"][n], stages["tag_search"][n], compat_graph)
 
         # ---------------------------------------------------------
-        # 6. Build Recommendation Rows + DTO Objects
+        # 5. One hydration query for every prompt's mods
         # ---------------------------------------------------------
-        recommendation_items: List[RecommendationItem] = []
-        rank_counter = 1
-
-        for mod in final_mods:
-            tag_names = {t.tag.name for t in mod.tags}
-            tag_score = len(set(extracted_keywords).intersection(tag_names))
-
-            # Save Recommendation → DB
-            rec = Recommendation(
-                prompt_id=new_prompt.prompt_id,
-                mod_id=mod.mod_id,
-                relevance_score=tag_score,
-                rank_order=rank_counter,
-            )
-            session.add(rec)
-            await session.flush()
-
-            mod_read = ModRead(
-                mod_id=mod.mod_id,
-                name=mod.name,
-                description=mod.description,
-                source_url=mod.source_url,
-                version=mod.version,
-                game_id=mod.game_id,
-                tags=[TagRead(tag_id=mt.tag_id, name=mt.tag.name) for mt in mod.tags]
-            )
+        all_ids = list(dict.fromkeys(mod_id for r in ranked_by_index.values() for mod_id in r.mod_ids))
+        mods_by_id = await _hydrate_mods(all_ids)
 
-            recommendation_items.append(
-                RecommendationItem(
-                    rec_id=rec.rec_id,
-                    prompt_id=new_prompt.prompt_id,
-                    mod=mod_read,
-                    relevance_score=tag_score,
-                    rank_order=rank_counter,
-                )
-            )
+        entries: List[PromptHistoryEntry] = []
+        final_mods_by_index: Dict[int, List[Mod]] = {}
+        for i, prompt in enumerate(user_prompts):
+            hit = cached[i]
+            if hit is not None:
+                entries.append(_cached_entry(hit, prompt, game_ids[i], version))
+                continue
+            final_mods = [mods_by_id[mod_id] for mod_id in ranked_by_index[i].mod_ids if mod_id in mods_by_id]
+            final_mods_by_index[i] = final_mods
+            entries.append(_history_entry(
+                prompt, game_ids[i], keywords_by_index[i], embedding_by_index[i], final_mods,
+                None if degraded else version,
+            ))
 
-            rank_counter += 1
+        # ---------------------------------------------------------
+        # 6. Bulk history insert (or write-behind)
+        # ---------------------------------------------------------
+        saved_all = await _save_history_many(entries, session)
 
         # ---------------------------------------------------------
-        # 7. Build Response DTO
+        # 7. Build Response DTOs
         # ---------------------------------------------------------
-        prompt_read = PromptRead(
-            prompt_id=new_prompt.prompt_id,
-            user_prompt=new_prompt.user_prompt,
-            created_at=new_prompt.created_at,
-            extracted_keywords=extracted_keywords,
-            model_version=new_prompt.model_version,
-        )
+        results: List[RecommendationResponse] = []
+        for i, (entry, saved) in enumerate(zip(entries, saved_all)):
+            hit = cached[i]
+            if hit is not None:
+                results.append(_replayed_response(hit, entry, saved))
+                continue
+            response = _build_response(entry, saved, final_mods_by_index[i], ranked_by_index[i], degraded)
+            if not degraded:
+                await response_cache.set(game_ids[i], entry.user_prompt, EMBEDDING_MODEL, version, response)
+                semantic_prompt_cache.add(game_ids[i], version, embedding_by_index[i], response)
+            results.append(response)
 
-        print(f"🔥 DEBUG — Returning {len(recommendation_items)} recommendations.")
-        return RecommendationResponse(
-            prompt=prompt_read,
-            recommendations=recommendation_items,
-        )
+        return BatchRecommendationResponse(results=results, degraded_stages=degraded)
 
-    except Exception as e:
-        print("\n🔥🔥🔥 ERROR INSIDE generate_recommendations() 🔥🔥🔥")
+    except Exception:
+        print("\n🔥🔥🔥 ERROR INSIDE generate_recommendations_batch() 🔥🔥🔥")
         import traceback
         traceback.print_exc()
         print("---------------------------------------------------------\n")
@@ -0,0 +1,154 @@
+# app/services/response_cache.py
+"""
+Full-response cache for RecommendationResponse.
+
+Keys are (game_id, normalized prompt, embedding model, catalog version), so any
+catalog change (see services/catalog_version.py) naturally retires every old
+entry. A hit skips both OpenAI calls and every catalog query.
+
+Backends store serialized JSON bytes and are pluggable:
+
+- InMemoryResponseBackend: per-process LRU with TTL (default).
+- SharedResponseBackend: wraps any async client with redis-style
+  `get(key)` / `set(key, value, ex=seconds)`, so several API processes share
+  one cache. RESPONSE_CACHE_BACKEND=redis builds one from RESPONSE_CACHE_URL
+  (requires the optional `redis` package).
+"""
+import hashlib
+from typing import Any, Dict, Optional, Protocol
+
+from app.core.cache import TTLCache, normalize_prompt
+from app.core.config import settings
+from app.models.domain import RecommendationResponse
+
+
+class ResponseCacheBackend(Protocol):
+    name: str
+
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+
+class InMemoryResponseBackend:
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache[str, bytes] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value)
+
+
+class SharedResponseBackend:
+    name = "shared"
+
+    def __init__(self, client: Any, prefix: str = "modmuse:rec:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.client.get(self.prefix + key)
+        if isinstance(value, str):
+            value = value.encode()
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+
+class ResponseCache:
+    def __init__(self, backend: Optional[ResponseCacheBackend], ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.errors = 0
+
+    @staticmethod
+    def key_for(game_id: int, prompt: str, embedding_model: str, version: int) -> str:
+        raw = f"{game_id}\x1f{normalize_prompt(prompt)}\x1f{embedding_model}\x1f{version}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def get(
+        self, game_id: int, prompt: str, embedding_model: str, version: Optional[int]
+    ) -> Optional[RecommendationResponse]:
+        if self.backend is None or version is None:
+            self.bypassed += 1
+            return None
+
+        try:
+            raw = await self.backend.get(self.key_for(game_id, prompt, embedding_model, version))
+        except Exception as e:
+            # A flaky shared cache must never fail the request.
+            self.errors += 1
+            print(f"⚠️ Response cache get failed: {e}")
+            return None
+
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return RecommendationResponse.model_validate_json(raw)
+
+    async def set(
+        self,
+        game_id: int,
+        prompt: str,
+        embedding_model: str,
+        version: Optional[int],
+        response: RecommendationResponse,
+    ) -> None:
+        if self.backend is None or version is None:
+            return
+        try:
+            await self.backend.set(
+                self.key_for(game_id, prompt, embedding_model, version),
+                response.model_dump_json().encode(),
+                self.ttl,
+            )
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Response cache set failed: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "errors": self.errors,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def create_response_backend(name: str) -> Optional[ResponseCacheBackend]:
+    if name == "off":
+        return None
+    if name == "memory":
+        return InMemoryResponseBackend(
+            maxsize=settings.response_cache_size, ttl=settings.response_cache_ttl_seconds
+        )
+    if name == "redis":
+        try:
+            import redis.asyncio as redis  # optional dependency
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package") from e
+        if not settings.response_cache_url:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires RESPONSE_CACHE_URL")
+        return SharedResponseBackend(redis.from_url(settings.response_cache_url))
+    raise ValueError(f"Unknown response cache backend: {name!r} (expected 'memory', 'redis' or 'off')")
+
+
+response_cache = ResponseCache(
+    backend=create_response_backend(settings.response_cache_backend),
+    ttl=settings.response_cache_ttl_seconds,
+)
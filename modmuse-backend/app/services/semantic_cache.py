@@ -0,0 +1,264 @@
+# app/services/semantic_cache.py
+"""
+Near-duplicate prompt reuse.
+
+The response cache only helps when a prompt normalizes to exactly the same
+text. This cache also catches rewordings: a new prompt is embedded first, and
+if its closest prior prompt for the same game, answered under the current
+catalog version, has cosine similarity >= SEMANTIC_CACHE_THRESHOLD, that
+prompt's recommendations are returned without the keyword LLM call or any
+catalog search.
+
+Per game, the embeddings of the most recent SEMANTIC_CACHE_MAX_PROMPTS
+complete answers sit in a normalized float32 ring buffer, so a lookup is one
+matrix-vector product. The buffer starts small and doubles as prompts arrive,
+so games with few answers do not hold a full-capacity matrix. Partitions are seeded lazily from `prompt` rows
+(`game_id`, `catalog_version`, `embedding`) and then appended to as prompts
+are answered. Rows loaded from the table carry only their prompt_id and are
+rebuilt from their stored Recommendation rows on first hit; answers produced
+in this process keep their response in memory.
+
+A catalog version change drops every partition (old answers may name
+changed or removed mods); the next lookup reloads from the new version's rows.
+"""
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.metrics import SIMILARITY_BUCKETS, Histogram
+from app.db.session import SessionLocal
+from app.db.vector_codec import parse_vector_text
+from app.models.domain import RecommendationResponse
+from app.services.embedding_service import EMBEDDING_MODEL
+from app.services.catalog_version import catalog_version
+
+
+# Rows allocated for a new partition before it grows towards its capacity
+INITIAL_ROWS = 64
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _PromptPartition:
+    """Most recent `capacity` prompt embeddings for one game and catalog version."""
+
+    def __init__(self, version: int, capacity: int, initial_rows: int = INITIAL_ROWS):
+        self.version = version
+        self.capacity = capacity
+        self.size = 0
+        self._next = 0
+        self._initial_rows = max(1, min(capacity, initial_rows))
+        # Allocated on the first add, once the dimension is known
+        self.matrix: Optional[np.ndarray] = None
+        self.prompt_ids: List[Optional[int]] = []
+        self.responses: List[Optional[RecommendationResponse]] = []
+
+    def add(
+        self,
+        embedding: np.ndarray,
+        prompt_id: Optional[int],
+        response: Optional[RecommendationResponse],
+    ) -> None:
+        if self.matrix is None:
+            self.matrix = np.zeros((self._initial_rows, embedding.shape[0]), dtype=np.float32)
+        if embedding.shape != (self.matrix.shape[1],):
+            # Another embedding model's dimension: never comparable
+            return
+        row = self._next
+        if row == len(self.prompt_ids):
+            # Still filling up: the ring wraps only once it holds `capacity` rows
+            if row == self.matrix.shape[0]:
+                self._grow()
+            self.prompt_ids.append(prompt_id)
+            self.responses.append(response)
+        else:
+            self.prompt_ids[row] = prompt_id
+            self.responses[row] = response
+        self.matrix[row] = _unit(embedding.astype(np.float32, copy=False))
+        self._next = (row + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _grow(self) -> None:
+        matrix = np.zeros((min(self.capacity, self.matrix.shape[0] * 2), self.matrix.shape[1]), dtype=np.float32)
+        matrix[: self.size] = self.matrix[: self.size]
+        self.matrix = matrix
+
+    def best(self, query: np.ndarray) -> Optional[Tuple[int, float]]:
+        """(row, cosine similarity) of the closest stored prompt."""
+        if self.size == 0 or query.shape != (self.matrix.shape[1],):
+            return None
+        scores = self.matrix[: self.size] @ query
+        row = int(np.argmax(scores))
+        return row, float(scores[row])
+
+
+@dataclass
+class PromptMatch:
+    similarity: float
+    prompt_id: Optional[int]
+    # None until rebuilt from the stored Recommendation rows
+    response: Optional[RecommendationResponse]
+    _partition: _PromptPartition
+    _row: int
+
+
+class SemanticPromptCache:
+    def __init__(
+        self,
+        threshold: float,
+        max_prompts: int,
+        max_games: Optional[int] = None,
+        enabled: bool = True,
+    ):
+        self.threshold = threshold
+        self.max_prompts = max_prompts
+        self.max_games = max_games
+        self.enabled = enabled
+        # Least recently used first
+        self._partitions: "OrderedDict[int, _PromptPartition]" = OrderedDict()
+        self._load_locks: Dict[int, asyncio.Lock] = {}
+
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.loads = 0
+        # Best similarity found by every lookup, hit or miss
+        self.similarity = Histogram(SIMILARITY_BUCKETS)
+
+    def active(self, version: Optional[int]) -> bool:
+        """Unknown catalog version: nothing can be proven current, bypass."""
+        if not self.enabled or version is None:
+            self.bypassed += 1
+            return False
+        return True
+
+    async def lookup(
+        self, game_id: int, embedding: Sequence[float], version: int
+    ) -> Optional[PromptMatch]:
+        partition = await self._partition_for(game_id, version)
+        self.lookups += 1
+
+        best = partition.best(_unit(np.asarray(embedding, dtype=np.float32)))
+        if best is None:
+            self.misses += 1
+            return None
+        row, similarity = best
+        self.similarity.observe(similarity)
+        if similarity < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return PromptMatch(
+            similarity=similarity,
+            prompt_id=partition.prompt_ids[row],
+            response=partition.responses[row],
+            _partition=partition,
+            _row=row,
+        )
+
+    def remember(self, match: PromptMatch) -> None:
+        """Keep a response rebuilt from the table, unless its row was reused meanwhile."""
+        if match._partition.prompt_ids[match._row] == match.prompt_id:
+            match._partition.responses[match._row] = match.response
+
+    def add(
+        self,
+        game_id: int,
+        version: Optional[int],
+        embedding: Optional[Sequence[float]],
+        response: RecommendationResponse,
+    ) -> None:
+        """
+        Record a complete answer. Games not loaded at this version are skipped:
+        their next lookup loads the answer from the `prompt` table instead.
+        """
+        if not self.enabled or embedding is None:
+            return
+        partition = self._partitions.get(game_id)
+        if partition is None or partition.version != version:
+            return
+        partition.add(np.asarray(embedding, dtype=np.float32), response.prompt.prompt_id, response)
+
+    def invalidate(self) -> None:
+        self._partitions.clear()
+
+    # ---- loading ----
+
+    async def _partition_for(self, game_id: int, version: int) -> _PromptPartition:
+        partition = self._partitions.get(game_id)
+        if partition is not None and partition.version == version:
+            self._partitions.move_to_end(game_id)
+            return partition
+
+        lock = self._load_locks.setdefault(game_id, asyncio.Lock())
+        async with lock:
+            partition = self._partitions.get(game_id)
+            if partition is None or partition.version != version:
+                partition = await self.load_game(game_id, version)
+                self._store(game_id, partition)
+        return partition
+
+    async def load_game(self, game_id: int, version: int) -> _PromptPartition:
+        async with SessionLocal() as load_session:
+            rows = (await load_session.execute(
+                text("""
+                    SELECT prompt_id, embedding
+                    FROM prompt
+                    WHERE game_id = :game_id
+                      AND catalog_version = :version
+                      AND embedding_model = :model
+                      AND embedding IS NOT NULL
+                    ORDER BY prompt_id DESC
+                    LIMIT :limit
+                """),
+                {"game_id": game_id, "version": version, "model": EMBEDDING_MODEL, "limit": self.max_prompts},
+            )).all()
+
+        partition = _PromptPartition(version, self.max_prompts, initial_rows=max(len(rows), INITIAL_ROWS))
+        # Oldest first, so the ring buffer overwrites them first
+        for row in reversed(rows):
+            embedding = parse_vector_text(row.embedding) if isinstance(row.embedding, str) else row.embedding
+            partition.add(embedding, row.prompt_id, None)
+        self.loads += 1
+        return partition
+
+    def _store(self, game_id: int, partition: _PromptPartition) -> None:
+        self._partitions[game_id] = partition
+        self._partitions.move_to_end(game_id)
+        while self.max_games is not None and len(self._partitions) > self.max_games:
+            self._partitions.popitem(last=False)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "loads": self.loads,
+            "prompts": {game_id: part.size for game_id, part in self._partitions.items()},
+            "best_similarity": self.similarity.snapshot(scale=1.0, unit=""),
+        }
+
+
+semantic_prompt_cache = SemanticPromptCache(
+    threshold=settings.semantic_cache_threshold,
+    max_prompts=settings.semantic_cache_max_prompts,
+    max_games=settings.max_loaded_games,
+    enabled=settings.semantic_cache_enabled,
+)
+
+# Answers computed against an older catalog may be stale: reload on next use.
+catalog_version.subscribe(lambda version: semantic_prompt_cache.invalidate())
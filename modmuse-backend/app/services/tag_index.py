@@ -0,0 +1,246 @@
+# app/services/tag_index.py
+"""
+In-memory, per-game tag index for the keyword retrieval channel.
+
+Built from `tag` + `mod_tag` (one query per game), it replaces the
+`Tag.name IN (...)` join with dictionary lookups:
+
+- names are normalized (NFKC, casefold, punctuation stripped) and each
+  token is lightly lemmatized ("mechanics" -> "mechanic", "bodies" -> "body"),
+- a keyword matches a tag exactly, by token ("survival mechanics" -> "survival"),
+  or by trigram similarity for typos and spelling variants ("armour" -> "armor"),
+- every tag has a precomputed posting list of the game's mod ids.
+
+Partitions are loaded lazily and dropped when the catalog version changes.
+At most MAX_LOADED_GAMES stay loaded; the least recently used is evicted.
+"""
+import asyncio
+import re
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models_utils.domain import Mod, ModTag, Tag
+from app.db.session import SessionLocal
+from app.services.catalog_version import catalog_version
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+# Match strengths, highest wins per tag
+EXACT_MATCH = 1.0
+TOKEN_MATCH = 0.8
+
+
+def _lemmatize(token: str) -> str:
+    """Very small suffix-stripping lemmatizer; good enough for tag vocabularies."""
+    if len(token) <= 3:
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tag_tokens(term: str) -> List[str]:
+    term = unicodedata.normalize("NFKC", term).casefold()
+    return [_lemmatize(token) for token in _NON_WORD.sub(" ", term).replace("_", " ").split()]
+
+
+def normalize_tag(term: str) -> str:
+    return " ".join(tag_tokens(term))
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of padded trigram sets (same idea as pg_trgm)."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+@dataclass
+class TagMatch:
+    tag_id: int
+    name: str
+    score: float
+
+
+class GameTagIndex:
+    def __init__(self, min_similarity: float):
+        self.min_similarity = min_similarity
+        self.names: Dict[int, str] = {}
+        self.postings: Dict[int, List[int]] = {}
+        self._by_normalized: Dict[str, Set[int]] = defaultdict(set)
+        self._by_token: Dict[str, Set[int]] = defaultdict(set)
+        self._by_trigram: Dict[str, Set[int]] = defaultdict(set)
+        self._normalized: Dict[int, str] = {}
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[Tuple[int, str, int]], min_similarity: float
+    ) -> "GameTagIndex":
+        """Build from (tag_id, tag_name, mod_id) rows."""
+        index = cls(min_similarity)
+        postings: Dict[int, Set[int]] = defaultdict(set)
+        for tag_id, name, mod_id in rows:
+            postings[tag_id].add(mod_id)
+            if tag_id not in index.names:
+                index._add_tag(tag_id, name)
+        index.postings = {tag_id: sorted(mod_ids) for tag_id, mod_ids in postings.items()}
+        return index
+
+    def _add_tag(self, tag_id: int, name: str) -> None:
+        normalized = normalize_tag(name)
+        self.names[tag_id] = name
+        self._normalized[tag_id] = normalized
+        self._by_normalized[normalized].add(tag_id)
+        for token in normalized.split():
+            self._by_token[token].add(tag_id)
+        for gram in trigrams(normalized):
+            self._by_trigram[gram].add(tag_id)
+
+    def match(self, keyword: str) -> List[TagMatch]:
+        normalized = normalize_tag(keyword)
+        if not normalized:
+            return []
+
+        scores: Dict[int, float] = {}
+        for tag_id in self._by_normalized.get(normalized, ()):
+            scores[tag_id] = EXACT_MATCH
+
+        # Token overlap: every token of the tag appears in the keyword, or
+        # the keyword is a single token of a multi-word tag.
+        keyword_tokens = set(normalized.split())
+        for token in keyword_tokens:
+            for tag_id in self._by_token.get(token, ()):
+                if tag_id in scores:
+                    continue
+                tag_words = set(self._normalized[tag_id].split())
+                if tag_words <= keyword_tokens or keyword_tokens <= tag_words:
+                    scores[tag_id] = TOKEN_MATCH
+
+        # Trigram candidates, verified with the full Jaccard similarity
+        candidates: Set[int] = set()
+        for gram in trigrams(normalized):
+            candidates |= self._by_trigram.get(gram, set())
+        for tag_id in candidates - scores.keys():
+            similarity = trigram_similarity(normalized, self._normalized[tag_id])
+            if similarity >= self.min_similarity:
+                scores[tag_id] = similarity * TOKEN_MATCH
+
+        return sorted(
+            (TagMatch(tag_id, self.names[tag_id], score) for tag_id, score in scores.items()),
+            key=lambda m: (-m.score, m.tag_id),
+        )
+
+    def match_keywords(self, keywords: Sequence[str]) -> Dict[int, float]:
+        """Best score per matched tag_id across all keywords."""
+        best: Dict[int, float] = {}
+        for keyword in keywords:
+            for m in self.match(keyword):
+                if m.score > best.get(m.tag_id, 0.0):
+                    best[m.tag_id] = m.score
+        return best
+
+    def candidates(self, keywords: Sequence[str], limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Mod ids whose tags match any keyword, ranked by the summed match
+        scores of their matching tags (ties by mod_id).
+        """
+        mod_scores: Dict[int, float] = defaultdict(float)
+        for tag_id, score in self.match_keywords(keywords).items():
+            for mod_id in self.postings.get(tag_id, ()):
+                mod_scores[mod_id] += score
+        ranked = sorted(mod_scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit is not None else ranked
+
+
+class TagIndex:
+    """Lazily loaded GameTagIndex per game_id."""
+
+    def __init__(self, min_similarity: float, max_games: Optional[int] = None):
+        self.min_similarity = min_similarity
+        self.max_games = max_games
+        # Least recently used first
+        self._games: "OrderedDict[int, GameTagIndex]" = OrderedDict()
+        self._load_locks: Dict[int, asyncio.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, game_id: int) -> bool:
+        return game_id in self._games
+
+    def loaded(self, game_id: int) -> Optional[GameTagIndex]:
+        return self._games.get(game_id)
+
+    async def for_game(self, game_id: int) -> GameTagIndex:
+        index = self._games.get(game_id)
+        if index is not None:
+            self._games.move_to_end(game_id)
+            return index
+
+        lock = self._load_locks.setdefault(game_id, asyncio.Lock())
+        async with lock:
+            if game_id not in self._games:
+                await self.load_game(game_id)
+        return self._games[game_id]
+
+    async def load_game(self, game_id: int) -> None:
+        async with SessionLocal() as load_session:
+            rows = (await load_session.execute(
+                select(Tag.tag_id, Tag.name, ModTag.mod_id)
+                .join(ModTag, ModTag.tag_id == Tag.tag_id)
+                .join(Mod, Mod.mod_id == ModTag.mod_id)
+                .where(Mod.game_id == game_id)
+            )).all()
+
+        self._games[game_id] = GameTagIndex.from_rows(
+            ((row.tag_id, row.name, row.mod_id) for row in rows), self.min_similarity
+        )
+        self._games.move_to_end(game_id)
+        self.loads += 1
+        while self.max_games is not None and len(self._games) > self.max_games:
+            self._games.popitem(last=False)
+            self.evictions += 1
+
+    async def candidates(
+        self, keywords: Sequence[str], game_id: int, limit: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        return (await self.for_game(game_id)).candidates(keywords, limit)
+
+    def invalidate(self, game_id: Optional[int] = None) -> None:
+        if game_id is None:
+            self._games.clear()
+        else:
+            self._games.pop(game_id, None)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "games_loaded": len(self._games),
+            "tags": {game_id: len(index.names) for game_id, index in self._games.items()},
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+
+tag_index = TagIndex(
+    min_similarity=settings.tag_match_min_similarity,
+    max_games=settings.max_loaded_games,
+)
+
+# Tags or mod tags changed: rebuild on next use.
+catalog_version.subscribe(lambda version: tag_index.invalidate())
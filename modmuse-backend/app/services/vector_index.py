@@ -0,0 +1,549 @@
+# app/services/vector_index.py
+"""
+Vector-search backends for the semantic retrieval channel.
+
+Two interchangeable backends implement `search(embedding, game_id, k)` and
+return `(mod_id, cosine_similarity)` pairs, best first:
+
+- PgVectorBackend: the original `ORDER BY embedding <=> :embed` query, or
+  with VECTOR_QUANTIZATION=binary a two-stage search: Hamming-distance
+  candidates from the binary quantized `embedding_bq` column, rescored with
+  exact cosine distance.
+- NumpyVectorIndex: an in-process float32 matrix per game_id with normalized
+  rows, so cosine scoring is a single matrix-vector product followed by an
+  argpartition top-k. Partitions are loaded lazily from the `mod` table. When
+  the catalog version changes, the mods the backfill, importer or re-embed
+  jobs logged as changed (app/db/vector_changes.py) are re-read and upserted
+  or removed row by row; only a large change reloads the partitions. At most
+  MAX_LOADED_GAMES partitions stay loaded (least recently searched evicted), so
+  hundreds of games with uneven catalogs do not all sit in memory.
+
+`search_many` answers a batch of queries at once: one LATERAL top-k query for
+pgvector, one matrix-matrix product for NumPy.
+
+`settings.vector_backend` selects which one `vector_backend` points at.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.vector_changes import CHANGE_RETENTION_SECONDS, latest_change_id, read_vector_changes
+from app.db.vector_codec import encode_vector, parse_vector_text
+from app.db.vector_indexes import apply_search_tuning
+from app.services.catalog_version import catalog_version
+
+ScoredMod = Tuple[int, float]
+
+
+class VectorSearchBackend(Protocol):
+    name: str
+
+    async def search(self, embedding: Sequence[float], game_id: int, k: int) -> List[ScoredMod]:
+        ...
+
+    async def search_many(
+        self, embeddings: Sequence[Sequence[float]], game_id: int, k: int
+    ) -> List[List[ScoredMod]]:
+        ...
+
+    def stats(self) -> Dict[str, object]:
+        ...
+
+
+def _as_array(embedding) -> np.ndarray:
+    # Decoded straight to float32 arrays by the binary codec
+    return parse_vector_text(embedding) if isinstance(embedding, str) else embedding
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise top_k for a (queries, candidates) score matrix, best first."""
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    picked = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-picked, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without a full sort."""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+# ---------------------------------------------------------
+# pgvector (database) backend
+# ---------------------------------------------------------
+
+# Exact-distance query over the full vectors (HNSW on `embedding`)
+_SEARCH_FULL = """
+    SELECT mod_id, 1 - (embedding <=> :embed) AS similarity
+    FROM mod
+    WHERE embedding IS NOT NULL
+      AND game_id = :game_id
+    ORDER BY embedding <=> :embed
+    LIMIT :k;
+"""
+
+# Two-stage: a `pool`-sized candidate set by Hamming distance on the 1-bit
+# copy (HNSW on `embedding_bq`, 32x smaller than the vectors), then exact
+# cosine rescoring of just those candidates
+_SEARCH_QUANTIZED = """
+    SELECT mod_id, 1 - (embedding <=> :embed) AS similarity
+    FROM (
+        SELECT mod_id, embedding
+        FROM mod
+        WHERE embedding IS NOT NULL
+          AND game_id = :game_id
+        ORDER BY embedding_bq <~> binary_quantize(CAST(:embed AS vector))
+        LIMIT :pool
+    ) AS candidates
+    ORDER BY embedding <=> :embed
+    LIMIT :k;
+"""
+
+# One round-trip: a per-query top-k (index scan) for every input vector
+_SEARCH_MANY_FULL = """
+    SELECT q.idx, m.mod_id, 1 - (m.embedding <=> q.embed) AS similarity
+    FROM unnest(CAST(:embeds AS vector[])) WITH ORDINALITY AS q(embed, idx)
+    CROSS JOIN LATERAL (
+        SELECT mod_id, embedding
+        FROM mod
+        WHERE embedding IS NOT NULL
+          AND game_id = :game_id
+        ORDER BY embedding <=> q.embed
+        LIMIT :k
+    ) AS m
+    ORDER BY q.idx, similarity DESC;
+"""
+
+_SEARCH_MANY_QUANTIZED = """
+    SELECT q.idx, m.mod_id, m.similarity
+    FROM unnest(CAST(:embeds AS vector[])) WITH ORDINALITY AS q(embed, idx)
+    CROSS JOIN LATERAL (
+        SELECT c.mod_id, 1 - (c.embedding <=> q.embed) AS similarity
+        FROM (
+            SELECT mod_id, embedding
+            FROM mod
+            WHERE embedding IS NOT NULL
+              AND game_id = :game_id
+            ORDER BY embedding_bq <~> binary_quantize(q.embed)
+            LIMIT :pool
+        ) AS c
+        ORDER BY c.embedding <=> q.embed
+        LIMIT :k
+    ) AS m
+    ORDER BY q.idx, m.similarity DESC;
+"""
+
+QUANTIZATION_MODES = ("none", "binary")
+
+
+class PgVectorBackend:
+    name = "pgvector"
+
+    def __init__(self, quantization: str = "none", rescore_pool: int = 256) -> None:
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unknown vector quantization: {quantization!r} (expected 'none' or 'binary')"
+            )
+        self.quantization = quantization
+        self.rescore_pool = rescore_pool
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    @property
+    def quantized(self) -> bool:
+        return self.quantization == "binary"
+
+    def _pool_size(self, k: int) -> int:
+        return max(k, self.rescore_pool)
+
+    async def search(self, embedding: Sequence[float], game_id: int, k: int) -> List[ScoredMod]:
+        # Bound as binary float32 by the connection's vector codec
+        params = {"embed": embedding, "game_id": game_id, "k": k}
+        ef_search = None
+        if self.quantized:
+            params["pool"] = ef_search = self._pool_size(k)
+
+        started = time.perf_counter()
+        async with SessionLocal() as search_session:
+            await apply_search_tuning(search_session, ef_search)
+            rows = await search_session.execute(
+                text(_SEARCH_QUANTIZED if self.quantized else _SEARCH_FULL), params
+            )
+            results = [(row.mod_id, float(row.similarity)) for row in rows]
+
+        self.searches += 1
+        self.search_seconds += time.perf_counter() - started
+        return results
+
+    async def search_many(
+        self, embeddings: Sequence[Sequence[float]], game_id: int, k: int
+    ) -> List[List[ScoredMod]]:
+        if not embeddings:
+            return []
+        # Elements are pre-encoded: asyncpg would read nested lists as a 2-D array.
+        params = {"embeds": [encode_vector(e) for e in embeddings], "game_id": game_id, "k": k}
+        ef_search = None
+        if self.quantized:
+            params["pool"] = ef_search = self._pool_size(k)
+
+        started = time.perf_counter()
+        results: List[List[ScoredMod]] = [[] for _ in embeddings]
+        async with SessionLocal() as search_session:
+            await apply_search_tuning(search_session, ef_search)
+            rows = await search_session.execute(
+                text(_SEARCH_MANY_QUANTIZED if self.quantized else _SEARCH_MANY_FULL), params
+            )
+            for row in rows:
+                results[row.idx - 1].append((row.mod_id, float(row.similarity)))
+
+        self.searches += len(embeddings)
+        self.search_seconds += time.perf_counter() - started
+        return results
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": self.name,
+            "quantization": self.quantization,
+            "rescore_pool": self.rescore_pool if self.quantized else None,
+            "searches": self.searches,
+            "avg_search_ms": (self.search_seconds / self.searches * 1000) if self.searches else 0.0,
+        }
+
+
+# ---------------------------------------------------------
+# In-process NumPy backend
+# ---------------------------------------------------------
+
+class _GamePartition:
+    """Normalized float32 rows for one game, with amortized O(1) appends."""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.dim = dim
+        self.size = 0
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.row_of: Dict[int, int] = {}
+        self.loaded_at = time.monotonic()
+        # Last mod_vector_change entry reflected in the rows
+        self.change_cursor = 0
+
+    @classmethod
+    def from_rows(cls, ids: Sequence[int], vectors: np.ndarray) -> "_GamePartition":
+        part = cls(dim=vectors.shape[1], capacity=max(len(ids), 64))
+        part.size = len(ids)
+        part.matrix[: part.size] = _normalize_rows(vectors.astype(np.float32, copy=False))
+        part.ids[: part.size] = ids
+        part.row_of = {int(mod_id): row for row, mod_id in enumerate(ids)}
+        return part
+
+    def upsert(self, mod_id: int, vector: np.ndarray) -> None:
+        if vector.shape != (self.dim,):
+            raise ValueError(f"Expected a {self.dim}-dim vector, got shape {vector.shape}")
+        row = self.row_of.get(mod_id)
+        if row is None:
+            if self.size == self.matrix.shape[0]:
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.ids[row] = mod_id
+            self.row_of[mod_id] = row
+        self.matrix[row] = _normalize_rows(vector.astype(np.float32, copy=False))
+
+    def remove(self, mod_id: int) -> bool:
+        row = self.row_of.pop(mod_id, None)
+        if row is None:
+            return False
+        last = self.size - 1
+        if row != last:
+            # Move the last row into the hole to keep the live rows contiguous.
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = self.ids[last]
+            self.row_of[int(self.ids[row])] = row
+        self.size = last
+        return True
+
+    def _grow(self) -> None:
+        capacity = self.matrix.shape[0] * 2
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[: self.size] = self.matrix[: self.size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[: self.size] = self.ids[: self.size]
+        self.matrix, self.ids = matrix, ids
+
+    def search(self, query: np.ndarray, k: int) -> List[ScoredMod]:
+        if self.size == 0:
+            return []
+        scores = self.matrix[: self.size] @ query
+        best = top_k(scores, k)
+        return list(zip(self.ids[best].tolist(), scores[best].tolist()))
+
+    def search_many(self, queries: np.ndarray, k: int) -> List[List[ScoredMod]]:
+        if self.size == 0:
+            return [[] for _ in range(queries.shape[0])]
+        scores = queries @ self.matrix[: self.size].T
+        best = top_k_rows(scores, k)
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        return [
+            list(zip(self.ids[row_best].tolist(), row_scores.tolist()))
+            for row_best, row_scores in zip(best, best_scores)
+        ]
+
+
+class NumpyVectorIndex:
+    name = "numpy"
+
+    def __init__(
+        self,
+        max_age_seconds: Optional[float] = None,
+        max_games: Optional[int] = None,
+        max_incremental_mods: int = 5000,
+    ):
+        self.max_age_seconds = max_age_seconds
+        self.max_games = max_games
+        self.max_incremental_mods = max_incremental_mods
+        # Least recently searched first
+        self._partitions: "OrderedDict[int, _GamePartition]" = OrderedDict()
+        self._load_locks: Dict[int, asyncio.Lock] = {}
+        self._sync_lock = asyncio.Lock()
+        # monotonic() of the first catalog change not synced yet
+        self._changed_since: Optional[float] = None
+        # Highest change_id applied by a sync
+        self._synced_through = 0
+
+        self.searches = 0
+        self.search_seconds = 0.0
+        self.loads = 0
+        self.evictions = 0
+        self.syncs = 0
+        self.mods_synced = 0
+        self.sync_reloads = 0
+
+    def __contains__(self, game_id: int) -> bool:
+        return game_id in self._partitions
+
+    async def search(self, embedding: Sequence[float], game_id: int, k: int) -> List[ScoredMod]:
+        partition = await self._partition_for(game_id)
+        return self.search_loaded(embedding, game_id, k) if partition else []
+
+    def search_loaded(self, embedding: Sequence[float], game_id: int, k: int) -> List[ScoredMod]:
+        """Score against an already-loaded partition (no I/O)."""
+        partition = self._partitions.get(game_id)
+        if partition is None:
+            return []
+        self._partitions.move_to_end(game_id)
+
+        started = time.perf_counter()
+        query = _normalize_rows(np.asarray(embedding, dtype=np.float32))
+        results = partition.search(query, k)
+        self.searches += 1
+        self.search_seconds += time.perf_counter() - started
+        return results
+
+    async def search_many(
+        self, embeddings: Sequence[Sequence[float]], game_id: int, k: int
+    ) -> List[List[ScoredMod]]:
+        partition = await self._partition_for(game_id)
+        if partition is None or not embeddings:
+            return [[] for _ in embeddings]
+
+        started = time.perf_counter()
+        queries = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        results = partition.search_many(queries, k)
+        self.searches += len(embeddings)
+        self.search_seconds += time.perf_counter() - started
+        return results
+
+    # ---- incremental maintenance ----
+
+    def upsert(self, game_id: int, mod_id: int, embedding: Sequence[float]) -> None:
+        """Add or replace one mod's vector. No-op for games that are not loaded yet."""
+        partition = self._partitions.get(game_id)
+        if partition is not None:
+            partition.upsert(mod_id, np.asarray(embedding, dtype=np.float32))
+
+    def remove(self, mod_id: int) -> None:
+        for partition in self._partitions.values():
+            if partition.remove(mod_id):
+                return
+
+    def invalidate(self, game_id: Optional[int] = None) -> None:
+        """Drop one partition (or all) so the next search reloads from the DB."""
+        if game_id is None:
+            self._partitions.clear()
+        else:
+            self._partitions.pop(game_id, None)
+
+    def mark_changed(self) -> None:
+        """The catalog changed: sync logged mod changes before the next search."""
+        if self._changed_since is None:
+            self._changed_since = time.monotonic()
+
+    async def sync_changes(self) -> None:
+        """Upsert/remove the mods logged since the oldest partition's cursor."""
+        async with self._sync_lock:
+            changed_since, self._changed_since = self._changed_since, None
+            if changed_since is None or not self._partitions:
+                return
+            if time.monotonic() - changed_since > CHANGE_RETENTION_SECONDS / 2:
+                # Entries this old may already be pruned
+                self._reload_all()
+                return
+
+            after = min(part.change_cursor for part in self._partitions.values())
+            async with SessionLocal() as sync_session:
+                changes = await read_vector_changes(sync_session, after, limit=self.max_incremental_mods)
+                if not changes:
+                    return
+                mod_ids = {mod_id for change in changes for mod_id in (change.mod_ids or ())}
+                if (
+                    any(change.mod_ids is None for change in changes)
+                    or len(changes) == self.max_incremental_mods
+                    or len(mod_ids) > self.max_incremental_mods
+                ):
+                    self._reload_all()
+                    return
+                rows = (await sync_session.execute(
+                    text("""
+                        SELECT mod_id, game_id, embedding
+                        FROM mod
+                        WHERE mod_id = ANY(:mod_ids)
+                    """),
+                    {"mod_ids": sorted(mod_ids)},
+                )).all()
+
+            current = {row.mod_id: row for row in rows}
+            for mod_id in mod_ids:
+                # Also covers a mod that moved to another game
+                self.remove(mod_id)
+                row = current.get(mod_id)
+                if row is not None and row.embedding is not None:
+                    self.upsert(row.game_id, mod_id, _as_array(row.embedding))
+
+            through = changes[-1].change_id
+            for part in self._partitions.values():
+                part.change_cursor = max(part.change_cursor, through)
+            self._synced_through = max(self._synced_through, through)
+            self.syncs += 1
+            self.mods_synced += len(mod_ids)
+
+    def _reload_all(self) -> None:
+        self.invalidate()
+        self.sync_reloads += 1
+
+    # ---- loading ----
+
+    def _is_stale(self, partition: _GamePartition) -> bool:
+        if self.max_age_seconds is None:
+            return False
+        return time.monotonic() - partition.loaded_at > self.max_age_seconds
+
+    async def _partition_for(self, game_id: int) -> Optional[_GamePartition]:
+        if self._changed_since is not None:
+            await self.sync_changes()
+        partition = self._partitions.get(game_id)
+        if partition is not None and not self._is_stale(partition):
+            self._partitions.move_to_end(game_id)
+            return partition
+
+        lock = self._load_locks.setdefault(game_id, asyncio.Lock())
+        async with lock:
+            partition = self._partitions.get(game_id)
+            if partition is None or self._is_stale(partition):
+                await self.load_game(game_id)
+        return self._partitions.get(game_id)
+
+    async def load_game(self, game_id: int) -> None:
+        async with SessionLocal() as load_session:
+            # Read first: a change committed while loading is replayed later
+            cursor = await latest_change_id(load_session)
+            rows = (await load_session.execute(
+                text("""
+                    SELECT mod_id, embedding
+                    FROM mod
+                    WHERE embedding IS NOT NULL
+                      AND game_id = :game_id
+                """),
+                {"game_id": game_id},
+            )).all()
+
+        if not rows:
+            self._partitions.pop(game_id, None)
+            return
+
+        ids = [row.mod_id for row in rows]
+        vectors = np.vstack([_as_array(row.embedding) for row in rows])
+        partition = _GamePartition.from_rows(ids, vectors)
+        partition.change_cursor = cursor
+        self._store(game_id, partition)
+        self.loads += 1
+        if cursor < self._synced_through:
+            # A sync ran while this game was loading and skipped it
+            self.mark_changed()
+
+    def _store(self, game_id: int, partition: _GamePartition) -> None:
+        self._partitions[game_id] = partition
+        self._partitions.move_to_end(game_id)
+        while self.max_games is not None and len(self._partitions) > self.max_games:
+            self._partitions.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": self.name,
+            "partitions": {game_id: part.size for game_id, part in self._partitions.items()},
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "syncs": self.syncs,
+            "mods_synced": self.mods_synced,
+            "sync_reloads": self.sync_reloads,
+            "searches": self.searches,
+            "avg_search_ms": (self.search_seconds / self.searches * 1000) if self.searches else 0.0,
+        }
+
+
+def create_vector_backend(name: str) -> VectorSearchBackend:
+    if name == "numpy":
+        return NumpyVectorIndex(
+            max_age_seconds=settings.vector_index_max_age_seconds,
+            max_games=settings.max_loaded_games,
+            max_incremental_mods=settings.vector_index_max_incremental_mods,
+        )
+    if name == "pgvector":
+        return PgVectorBackend(
+            quantization=settings.vector_quantization,
+            rescore_pool=settings.vector_rescore_pool,
+        )
+    raise ValueError(f"Unknown vector backend: {name!r} (expected 'pgvector' or 'numpy')")
+
+
+vector_backend: VectorSearchBackend = create_vector_backend(settings.vector_backend)
+
+if isinstance(vector_backend, NumpyVectorIndex):
+    # Mods may have changed somewhere (importer, backfill, another process): replay the change log.
+    catalog_version.subscribe(lambda version: vector_backend.mark_changed())
@@ -0,0 +1,249 @@
+# benchmarks/bench_ann_recall.py
+"""
+Recall and latency of the pgvector HNSW index versus exact search.
+
+Loads synthetic, clustered mod-like embeddings into a scratch table at
+increasing catalog sizes, then compares `ORDER BY embedding <=> $1 LIMIT k`
+with the index disabled (exact) and enabled at several hnsw.ef_search values.
+
+It then measures the two-stage search used with VECTOR_QUANTIZATION=binary:
+`pool` candidates by Hamming distance on the binary quantized copy (HNSW on
+`embedding_bq`), rescored with exact cosine distance, for several pool sizes.
+Per-row storage of each embedding representation is printed once per size.
+
+Last, a small game (--small-game-mods rows, below GAME_VECTOR_INDEX_MIN_MODS,
+so without a partial index) is added next to a global HNSW index. Its plan is
+printed, and its top-k is checked against exact search with
+hnsw.iterative_scan off and strict_order (as apply_search_tuning sets it).
+When the planner walks the global index, off returns the ef_search nearest
+rows of any game, filtered by game_id afterwards, so often fewer than k.
+
+Usage (from modmuse-backend/, needs DATABASE_URL and pgvector >= 0.7; the
+iterative scan rows need >= 0.8):
+
+    python -m benchmarks.bench_ann_recall --sizes 1000 10000 100000 --queries 200
+    python -m benchmarks.bench_ann_recall --rescore-pools 16 32 64 128
+    python -m benchmarks.bench_ann_recall --sizes 100000 --small-game-mods 200
+
+The scratch table `bench_mod_embedding` is dropped when the run finishes.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List, Sequence, Tuple
+
+import asyncpg
+import numpy as np
+from dotenv import load_dotenv
+from pgvector.asyncpg import register_vector
+
+TABLE = "bench_mod_embedding"
+
+
+def synthetic_catalog(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """Clustered vectors: real mod catalogs group into themes (survival, UI, ...)."""
+    n_clusters = max(8, n // 50)
+    centers = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def exact_sql(k: int, game_id: int = 1) -> str:
+    return f"SELECT id FROM {TABLE} WHERE game_id = {game_id} ORDER BY embedding <=> $1 LIMIT {k}"
+
+
+def rescored_sql(k: int, pool: int) -> str:
+    # Same shape as PgVectorBackend's quantized query
+    return f"""
+        SELECT id FROM (
+            SELECT id, embedding FROM {TABLE}
+            WHERE game_id = 1
+            ORDER BY embedding_bq <~> binary_quantize($1::vector)
+            LIMIT {pool}
+        ) AS candidates
+        ORDER BY embedding <=> $1
+        LIMIT {k}
+    """
+
+
+def mean_recall(found: List[List[int]], exact: List[List[int]]) -> float:
+    return statistics.mean(len(set(f) & set(e)) / max(len(e), 1) for f, e in zip(found, exact))
+
+
+async def run_queries(
+    conn: asyncpg.Connection, queries: np.ndarray, sql: str
+) -> Tuple[List[List[int]], List[float]]:
+    stmt = await conn.prepare(sql)
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        rows = await stmt.fetch(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([row["id"] for row in rows])
+    return results, latencies
+
+
+async def bench_size(
+    conn: asyncpg.Connection, n: int, args: argparse.Namespace, rng: np.random.Generator
+) -> None:
+    await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    await conn.execute(
+        f"CREATE TABLE {TABLE} (id int PRIMARY KEY, game_id int NOT NULL, embedding vector({args.dim}), "
+        f"embedding_bq bit({args.dim}) GENERATED ALWAYS AS (binary_quantize(embedding)::bit({args.dim})) STORED)"
+    )
+
+    vectors = synthetic_catalog(n, args.dim, rng)
+    await conn.copy_records_to_table(
+        TABLE,
+        records=((i, 1, vectors[i]) for i in range(n)),
+        columns=["id", "game_id", "embedding"],
+    )
+    await conn.execute(f"ANALYZE {TABLE}")
+
+    sizes = await conn.fetchrow(f"""
+        SELECT avg(pg_column_size(embedding::real[]::double precision[])) AS float8_array,
+               avg(pg_column_size(embedding)) AS vector,
+               avg(pg_column_size(embedding::halfvec)) AS halfvec,
+               avg(pg_column_size(embedding_bq)) AS bit
+        FROM {TABLE}
+    """)
+    print(
+        f"{n:>8} bytes/row: double precision[] {sizes['float8_array']:.0f}, vector {sizes['vector']:.0f}, "
+        f"halfvec {sizes['halfvec']:.0f}, bit {sizes['bit']:.0f}"
+    )
+
+    picks = rng.integers(0, n, size=args.queries)
+    queries = vectors[picks] + 0.2 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    # Exact baseline: force a sequential scan + sort
+    async with conn.transaction():
+        await conn.execute("SET LOCAL enable_indexscan = off")
+        exact, exact_ms = await run_queries(conn, queries, exact_sql(args.k))
+    print(
+        f"{n:>8} {'exact':>10} {1.0:>8.3f} "
+        f"{statistics.median(exact_ms):>9.2f} {percentile(exact_ms, 95):>9.2f}"
+    )
+
+    started = time.perf_counter()
+    await conn.execute(
+        f"CREATE INDEX ON {TABLE} USING hnsw (embedding vector_cosine_ops) "
+        f"WITH (m = 16, ef_construction = 64) WHERE game_id = 1"
+    )
+    build_s = time.perf_counter() - started
+
+    for ef_search in args.ef_search:
+        async with conn.transaction():
+            await conn.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+            ann, ann_ms = await run_queries(conn, queries, exact_sql(args.k))
+        print(
+            f"{n:>8} {'ef=' + str(ef_search):>10} {mean_recall(ann, exact):>8.3f} "
+            f"{statistics.median(ann_ms):>9.2f} {percentile(ann_ms, 95):>9.2f}"
+            f"   (index build {build_s:.1f}s)"
+        )
+
+    started = time.perf_counter()
+    await conn.execute(
+        f"CREATE INDEX ON {TABLE} USING hnsw (embedding_bq bit_hamming_ops) "
+        f"WITH (m = 16, ef_construction = 64) WHERE game_id = 1"
+    )
+    bq_build_s = time.perf_counter() - started
+
+    for pool in args.rescore_pools:
+        pool = max(pool, args.k)
+        async with conn.transaction():
+            # As apply_search_tuning does: the HNSW scan must be able to fill the pool
+            await conn.execute(f"SET LOCAL hnsw.ef_search = {int(pool)}")
+            rescored, rescored_ms = await run_queries(conn, queries, rescored_sql(args.k, pool))
+        print(
+            f"{n:>8} {'bq+' + str(pool):>10} {mean_recall(rescored, exact):>8.3f} "
+            f"{statistics.median(rescored_ms):>9.2f} {percentile(rescored_ms, 95):>9.2f}"
+            f"   (index build {bq_build_s:.1f}s)"
+        )
+
+
+async def bench_small_game(
+    conn: asyncpg.Connection, n: int, args: argparse.Namespace, rng: np.random.Generator
+) -> None:
+    """A game too small for a partial index, searched next to a global HNSW index."""
+    vectors = synthetic_catalog(args.small_game_mods, args.dim, rng)
+    await conn.copy_records_to_table(
+        TABLE,
+        records=((n + i, 2, vectors[i]) for i in range(args.small_game_mods)),
+        columns=["id", "game_id", "embedding"],
+    )
+    # Like the Mod model: ix_mod_game_id plus a global ix_mod_embedding_hnsw
+    await conn.execute(f"CREATE INDEX ON {TABLE} (game_id)")
+    await conn.execute(
+        f"CREATE INDEX ON {TABLE} USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    )
+    await conn.execute(f"ANALYZE {TABLE}")
+
+    picks = rng.integers(0, args.small_game_mods, size=args.queries)
+    queries = vectors[picks] + 0.2 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    sql = exact_sql(args.k, game_id=2)
+
+    async with conn.transaction():
+        await conn.execute("SET LOCAL enable_indexscan = off")
+        exact, _ = await run_queries(conn, queries, sql)
+
+    plan = await conn.fetch(f"EXPLAIN {sql}", queries[0])
+    print(f"{n:>8} small game ({args.small_game_mods} mods) plan:")
+    for row in plan:
+        print(f"{'':>10}{row[0]}")
+
+    version = await conn.fetchval("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    modes = ["off", "strict_order"] if tuple(map(int, version.split(".")[:2])) >= (0, 8) else [None]
+    for mode in modes:
+        async with conn.transaction():
+            await conn.execute(f"SET LOCAL hnsw.ef_search = {int(args.ef_search[0])}")
+            if mode is not None:
+                await conn.execute(f"SET LOCAL hnsw.iterative_scan = {mode}")
+            found, found_ms = await run_queries(conn, queries, sql)
+        short = sum(len(rows) < args.k for rows in found)
+        print(
+            f"{n:>8} {'small/' + (mode or 'n/a'):>10} {mean_recall(found, exact):>8.3f} "
+            f"{statistics.median(found_ms):>9.2f} {percentile(found_ms, 95):>9.2f}"
+            f"   ({short}/{len(found)} queries with fewer than k={args.k} rows)"
+        )
+
+
+async def main(args: argparse.Namespace) -> None:
+    load_dotenv()
+    dsn = os.environ["DATABASE_URL"].replace("postgresql+asyncpg://", "postgresql://")
+    conn = await asyncpg.connect(dsn)
+    await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    await register_vector(conn)
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'mods':>8} {'mode':>10} {'recall':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    try:
+        for n in args.sizes:
+            await bench_size(conn, n, args, rng)
+            if args.small_game_mods:
+                await bench_small_game(conn, n, args, rng)
+    finally:
+        await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[20, 40, 80, 160])
+    parser.add_argument("--rescore-pools", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument(
+        "--small-game-mods", type=int, default=200, help="Mods of the unindexed small game (0 to skip)"
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+# benchmarks/bench_embedding_batching.py
+"""
+Provider calls and throughput of embedding micro-batching at a given load.
+
+Simulates a provider whose list-input call costs a fixed round-trip plus a
+small per-text cost and allows a limited number of calls in flight (a crude
+stand-in for rate limits). Open-loop arrivals at each QPS go through
+EmbeddingBatcher with several windows; window 0 is the unbatched baseline.
+No network or API key needed.
+
+Usage (from modmuse-backend/):
+
+    python -m benchmarks.bench_embedding_batching --qps 50 200 1000 --windows 0 2 5 10
+"""
+import argparse
+import asyncio
+import time
+from typing import List, Sequence
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+def simulated_provider(round_trip: float, per_text: float, max_in_flight: int):
+    limit = asyncio.Semaphore(max_in_flight)
+
+    async def embed(texts: Sequence[str]) -> List[List[float]]:
+        async with limit:
+            await asyncio.sleep(round_trip + per_text * len(texts))
+        return [[0.0] for _ in texts]
+
+    return embed
+
+
+async def run(qps: float, window_ms: float, args: argparse.Namespace) -> None:
+    batcher = EmbeddingBatcher(
+        simulated_provider(args.round_trip_ms / 1000, args.per_text_ms / 1000, args.max_in_flight),
+        max_batch=args.max_batch,
+        max_wait=window_ms / 1000,
+    )
+    latencies: List[float] = []
+
+    async def request(n: int) -> None:
+        started = time.perf_counter()
+        await batcher.embed(f"prompt {n}")
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    tasks = []
+    for n in range(args.requests):
+        tasks.append(asyncio.create_task(request(n)))
+        await asyncio.sleep(1 / qps)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    stats = batcher.stats()
+    print(
+        f"  qps {qps:>6.0f}  window {window_ms:>4.1f}ms: {stats['batches']:>5} calls "
+        f"({stats['requests_per_batch']:.1f} texts/call), {args.requests / elapsed:>7.1f} req/s, "
+        f"p50 {latencies[len(latencies) // 2] * 1000:.1f}ms  p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    for qps in args.qps:
+        for window_ms in args.windows:
+            await run(qps, window_ms, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qps", type=float, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5, 10], help="Batch windows (ms)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--round-trip-ms", type=float, default=80)
+    parser.add_argument("--per-text-ms", type=float, default=0.2)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
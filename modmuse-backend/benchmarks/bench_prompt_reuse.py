@@ -0,0 +1,83 @@
+# benchmarks/bench_prompt_reuse.py
+"""
+Would-be hit rate of near-duplicate prompt reuse on real prompt history.
+
+Replays the most recent stored prompts (with embeddings) in the order they
+were asked: each one is looked up against the prompts before it for the same
+game, then added, as the semantic prompt cache does. Catalog versions are
+ignored, so this is an upper bound for a catalog that never changes.
+
+Prints the distribution of best similarities and the hit rate at several
+thresholds (the live counters are under GET /metrics/caches -> prompt_reuse).
+
+Usage (from modmuse-backend/, needs DATABASE_URL):
+
+    python -m benchmarks.bench_prompt_reuse --limit 20000
+    python -m benchmarks.bench_prompt_reuse --thresholds 0.9 0.93 0.95 0.97
+"""
+import argparse
+import asyncio
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.metrics import SIMILARITY_BUCKETS, Histogram
+from app.db.session import SessionLocal, engine
+from app.services.embedding_service import EMBEDDING_MODEL
+from app.services.semantic_cache import _PromptPartition, _unit
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with SessionLocal() as session:
+        rows = (await session.execute(
+            text("""
+                SELECT prompt_id, game_id, embedding
+                FROM (
+                    SELECT prompt_id, game_id, embedding
+                    FROM prompt
+                    WHERE embedding IS NOT NULL
+                      AND game_id IS NOT NULL
+                      AND embedding_model = :model
+                    ORDER BY prompt_id DESC
+                    LIMIT :limit
+                ) AS recent
+                ORDER BY prompt_id
+            """),
+            {"model": EMBEDDING_MODEL, "limit": args.limit},
+        )).all()
+    await engine.dispose()
+
+    partitions: Dict[int, _PromptPartition] = {}
+    similarities: List[float] = []
+    histogram = Histogram(SIMILARITY_BUCKETS)
+    for row in rows:
+        embedding = np.asarray(row.embedding, dtype=np.float32)
+        partition = partitions.setdefault(row.game_id, _PromptPartition(version=0, capacity=args.max_prompts))
+        best = partition.best(_unit(embedding))
+        if best is not None:
+            similarities.append(best[1])
+            histogram.observe(best[1])
+        partition.add(embedding, row.prompt_id, None)
+
+    print(f"{len(rows)} prompts over {len(partitions)} games, {len(similarities)} with a prior prompt")
+    snapshot = histogram.snapshot(scale=1.0, unit="")
+    print(
+        f"best similarity: p50 {snapshot['p50']}  p95 {snapshot['p95']}  "
+        f"p99 {snapshot['p99']}  max {snapshot['max']}"
+    )
+    for bucket, count in snapshot["buckets"].items():
+        print(f"  {bucket:>8} {count:>8}")
+
+    sims = np.asarray(similarities)
+    for threshold in args.thresholds:
+        hits = int((sims >= threshold).sum())
+        print(f"threshold {threshold:.2f}: {hits} reused ({hits / max(len(rows), 1):.1%} of prompts)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=20_000)
+    parser.add_argument("--max-prompts", type=int, default=1_000, help="Per-game window, as SEMANTIC_CACHE_MAX_PROMPTS")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.90, 0.93, 0.95, 0.97, 0.99])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,62 @@
+# benchmarks/bench_vector_codec.py
+"""
+Client-side cost of sending and receiving one embedding: the old text path
+(format 1536 floats as "[...]" / parse `embedding::text`) versus the binary
+codec registered on asyncpg connections (app/db/vector_codec.py).
+
+Server-side savings (Postgres no longer parses or prints decimal text) come
+on top and are not measured here.
+
+Usage (from modmuse-backend/, no database needed):
+
+    python -m benchmarks.bench_vector_codec
+    python -m benchmarks.bench_vector_codec --dims 3072 --number 2000
+"""
+import argparse
+import timeit
+
+import numpy as np
+from pgvector import Vector
+
+from app.db.vector_codec import decode_vector, encode_vector, parse_vector_text
+
+
+def text_encode(embedding) -> str:
+    # What PgVectorBackend used to do for every query
+    return "[" + ",".join(f"{x}" for x in embedding) + "]"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark vector wire encodings.")
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--number", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    array = rng.normal(size=args.dims).astype(np.float32)
+    as_list = array.astype(np.float64).tolist()  # OpenAI returns Python floats
+
+    as_text = text_encode(as_list)
+    as_binary = bytes(encode_vector(as_list))
+    stored_text = Vector(array).to_text()  # what `embedding::text` returns
+
+    cases = {
+        "encode: text (f-string join, list)": lambda: text_encode(as_list),
+        "encode: pgvector Vector.to_binary (list)": lambda: Vector(as_list).to_binary(),
+        "encode: binary codec (list)": lambda: encode_vector(as_list),
+        "encode: binary codec (float32 ndarray)": lambda: encode_vector(array),
+        "decode: parse embedding::text": lambda: parse_vector_text(stored_text),
+        "decode: pgvector Vector.from_binary().to_numpy()": lambda: Vector.from_binary(as_binary).to_numpy(),
+        "decode: binary codec": lambda: decode_vector(as_binary),
+    }
+
+    print(f"{args.dims} dims, {args.number} iterations each")
+    print(f"  wire size: text {len(as_text):,} bytes | binary {len(as_binary):,} bytes "
+          f"({len(as_text) / len(as_binary):.1f}x smaller)")
+    for name, fn in cases.items():
+        seconds = min(timeit.repeat(fn, number=args.number, repeat=3)) / args.number
+        print(f"  {name:<50} {seconds * 1e6:9.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
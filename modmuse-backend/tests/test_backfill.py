@@ -0,0 +1,143 @@
+# tests/test_backfill.py
+import asyncio
+
+import pytest
+
+from app.db import backfill
+from app.db.backfill import backfill_mod_embeddings, mod_embedding_text
+
+
+class FakeCatalog:
+    """mod_id -> embedding (None = pending), committed one chunk at a time."""
+
+    def __init__(self, mod_ids, fail_commit_at=None):
+        self.embeddings = {mod_id: None for mod_id in mod_ids}
+        self.changes = []
+        self.commits = 0
+        self.fail_commit_at = fail_commit_at
+
+    async def next_chunk(self, after_id, limit, game_id, reembed):
+        pending = [
+            mod_id for mod_id, embedding in sorted(self.embeddings.items())
+            if mod_id > after_id and (reembed or embedding is None)
+        ]
+        return [(mod_id, mod_embedding_text(f"mod {mod_id}", None)) for mod_id in pending[:limit]]
+
+    def session(self):
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.rows = []
+        self.added = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, rows=None):
+        self.rows.extend(rows or [])
+
+    def add(self, change):
+        self.added.append(change.mod_ids)
+
+    async def commit(self):
+        if self.catalog.commits + 1 == self.catalog.fail_commit_at:
+            raise ConnectionError("connection lost")
+        self.catalog.commits += 1
+        for row in self.rows:
+            self.catalog.embeddings[row["mod_id"]] = row["embedding"]
+        self.catalog.changes.extend(self.added)
+
+
+class FakeProvider:
+    model_id = "fake"
+
+    def __init__(self, fail_on=()):
+        self.calls = []
+        self.fail_on = set(fail_on)
+
+    async def embed(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail_on & set(texts):
+            raise RuntimeError("provider error")
+        return [[float(len(text))] for text in texts]
+
+
+class FakeRegistry:
+    async def claim(self, session):
+        pass
+
+
+@pytest.fixture
+def run_backfill(monkeypatch):
+    def run(catalog, provider, **kwargs):
+        monkeypatch.setattr(backfill, "_next_chunk", catalog.next_chunk)
+        monkeypatch.setattr(backfill, "SessionLocal", catalog.session)
+        monkeypatch.setattr(backfill, "embedding_provider", provider)
+        monkeypatch.setattr(backfill, "embedding_registry", FakeRegistry())
+        monkeypatch.setattr(backfill, "check_embedding_dimension", lambda dim: None)
+
+        async def no_prune(session):
+            pass
+
+        monkeypatch.setattr(backfill, "prune_vector_changes", no_prune)
+        return asyncio.run(backfill_mod_embeddings(**kwargs))
+
+    return run
+
+
+def test_chunks_are_packed_into_provider_batches(run_backfill):
+    catalog = FakeCatalog(range(1, 8))
+    provider = FakeProvider()
+
+    report = run_backfill(catalog, provider, batch_size=2, concurrency=2)
+
+    # Chunks of batch_size * concurrency mods, one provider call per batch
+    assert [[int(text.split()[1].rstrip(":")) for text in call] for call in provider.calls] == [
+        [1, 2], [3, 4], [5, 6], [7],
+    ]
+    assert (report.embedded, report.failed, report.requests, report.chunks) == (7, 0, 4, 2)
+    assert report.last_mod_id == 7
+    assert catalog.commits == 2
+    assert catalog.changes == [[1, 2, 3, 4], [5, 6, 7]]
+    assert all(embedding is not None for embedding in catalog.embeddings.values())
+
+
+def test_failed_batches_are_counted_and_retried_by_the_next_run(run_backfill):
+    catalog = FakeCatalog(range(1, 7))
+    failing = FakeProvider(fail_on={mod_embedding_text("mod 3", None)})
+
+    report = run_backfill(catalog, failing, batch_size=2, concurrency=2)
+
+    assert (report.embedded, report.failed, report.requests, report.chunks) == (4, 2, 3, 2)
+    assert report.last_mod_id == 6
+    assert [mod_id for mod_id, embedding in catalog.embeddings.items() if embedding is None] == [3, 4]
+
+    retry = run_backfill(catalog, FakeProvider(), batch_size=2, concurrency=2)
+    assert (retry.embedded, retry.failed, retry.chunks) == (2, 0, 1)
+    assert all(embedding is not None for embedding in catalog.embeddings.values())
+
+
+def test_run_resumes_after_the_last_committed_chunk(run_backfill):
+    catalog = FakeCatalog(range(1, 9), fail_commit_at=2)
+    provider = FakeProvider()
+
+    with pytest.raises(ConnectionError):
+        run_backfill(catalog, provider, batch_size=2, concurrency=2)
+    # The first chunk is committed, the second is lost
+    assert [mod_id for mod_id, embedding in catalog.embeddings.items() if embedding is not None] == [1, 2, 3, 4]
+
+    catalog.fail_commit_at = None
+    provider.calls.clear()
+    report = run_backfill(catalog, provider, batch_size=2, concurrency=2, reembed=True, start_after=4)
+
+    assert [len(call) for call in provider.calls] == [2, 2]
+    assert mod_embedding_text("mod 4", None) not in sum(provider.calls, [])
+    assert (report.embedded, report.chunks, report.last_mod_id) == (4, 1, 8)
+    assert all(embedding is not None for embedding in catalog.embeddings.values())
@@ -0,0 +1,77 @@
+# tests/test_compatibility.py
+from app.services.compatibility import (
+    COMPATIBLE,
+    CONFLICT,
+    DEPENDENCY,
+    DEPENDENCY_CONFLICT,
+    CompatibilityGraph,
+)
+
+
+def test_transitive_closure_handles_chains_and_cycles():
+    graph = CompatibilityGraph.from_edges(
+        dependencies={(1, 2), (2, 3), (4, 5), (5, 4)},
+        incompatibilities=set(),
+    )
+
+    assert graph.requires(1) == [2, 3]
+    assert graph.requires(3) == []
+    assert graph.requires(4) == [5]
+    assert graph.requires(99) == []
+
+
+def test_resolve_pulls_dependencies_and_drops_conflicts():
+    graph = CompatibilityGraph.from_edges(
+        dependencies={(1, 2)},
+        # 3 conflicts with 1's dependency, so it loses to the higher-ranked 1
+        incompatibilities={(3, 2)},
+    )
+
+    result = graph.resolve([1, 3, 7])
+
+    assert result.mod_ids == [1, 2, 7]
+    statuses = {m.mod_id: m for m in result.mods}
+    assert statuses[1].status == COMPATIBLE and statuses[1].requires == [2]
+    assert statuses[2].status == DEPENDENCY and statuses[2].required_by == [1]
+    assert [(e.mod_id, e.reason, e.conflicts_with) for e in result.excluded] == [(3, CONFLICT, [2])]
+
+
+def test_resolve_rejects_mods_whose_dependencies_conflict():
+    graph = CompatibilityGraph.from_edges(
+        dependencies={(1, 2), (1, 3)},
+        incompatibilities={(2, 3)},
+    )
+
+    result = graph.resolve([1])
+
+    assert result.mods == []
+    assert result.excluded[0].reason == DEPENDENCY_CONFLICT
+
+
+def test_candidate_already_pulled_in_is_marked_compatible():
+    graph = CompatibilityGraph.from_edges(dependencies={(1, 2)}, incompatibilities=set())
+
+    result = graph.resolve([1, 2])
+
+    assert result.mod_ids == [1, 2]
+    assert result.mods[1].status == COMPATIBLE
+    assert result.mods[1].required_by == [1]
+
+
+def test_apply_edges_updates_closures_incrementally():
+    graph = CompatibilityGraph.from_edges(
+        dependencies={(1, 2), (2, 3)},
+        incompatibilities={(1, 9)},
+    )
+
+    changed = graph.apply_edges(
+        dependencies={(1, 2), (3, 4)},
+        incompatibilities={(9, 1), (5, 6)},
+    )
+
+    # (2,3) removed, (3,4) added, (5,6) added; (9,1) is the same pair as (1,9)
+    assert changed == 3
+    assert graph.requires(1) == [2]
+    assert graph.requires(3) == [4]
+    assert graph.conflicts_of(1) == [9]
+    assert graph.conflicts_of(6) == [5]
@@ -0,0 +1,93 @@
+# tests/test_embedding_batcher.py
+import asyncio
+
+import pytest
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+def _recording_embed(calls):
+    async def embed(texts):
+        calls.append(list(texts))
+        await asyncio.sleep(0)
+        return [[float(len(text))] for text in texts]
+
+    return embed
+
+
+def test_concurrent_requests_share_one_call():
+    calls = []
+    batcher = EmbeddingBatcher(_recording_embed(calls), max_batch=16, max_wait=0.01)
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "ccc", "bb"]))
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0], [2.0]]
+    assert calls == [["a", "bb", "ccc"]]  # duplicate text embedded once
+    stats = batcher.stats()
+    assert (stats["requests"], stats["coalesced"], stats["batches"]) == (4, 1, 1)
+    assert stats["batch_size"]["max"] == 3
+    assert stats["wait"]["count"] == 4
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    calls = []
+    batcher = EmbeddingBatcher(_recording_embed(calls), max_batch=2, max_wait=10.0)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed(text) for text in ["a", "b", "c", "d"])), timeout=1.0
+        )
+
+    asyncio.run(run())
+    assert calls == [["a", "b"], ["c", "d"]]
+
+
+def test_failure_reaches_every_waiter_and_cancellation_does_not_spread():
+    async def failing(texts):
+        await asyncio.sleep(0)
+        raise RuntimeError("rate limited")
+
+    batcher = EmbeddingBatcher(failing, max_batch=8, max_wait=0.001)
+
+    async def run():
+        return await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+    assert [str(e) for e in asyncio.run(run())] == ["rate limited", "rate limited"]
+    assert batcher.failed_batches == 1
+
+    calls = []
+    batcher = EmbeddingBatcher(_recording_embed(calls), max_batch=8, max_wait=0.01)
+
+    async def cancel_one():
+        impatient = asyncio.ensure_future(batcher.embed("survival"))
+        patient = asyncio.ensure_future(batcher.embed("survival"))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(cancel_one()) == [8.0]
+
+
+def test_zero_window_disables_batching():
+    calls = []
+    batcher = EmbeddingBatcher(_recording_embed(calls), max_batch=8, max_wait=0)
+
+    async def run():
+        return await asyncio.gather(batcher.embed("a"), batcher.embed("b"))
+
+    assert asyncio.run(run()) == [[1.0], [1.0]]
+    assert calls == [["a"], ["b"]]
+    assert not batcher.enabled
+
+
+@pytest.mark.parametrize("max_wait", [0.0, 0.005])
+def test_results_match_inputs(max_wait):
+    calls = []
+    batcher = EmbeddingBatcher(_recording_embed(calls), max_batch=3, max_wait=max_wait)
+    texts = ["x" * n for n in range(1, 8)]
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(text) for text in texts))
+
+    assert asyncio.run(run()) == [[float(n)] for n in range(1, 8)]
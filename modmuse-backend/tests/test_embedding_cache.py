@@ -0,0 +1,75 @@
+# tests/test_embedding_cache.py
+import asyncio
+
+from app.core.cache import TTLCache, normalize_prompt
+from app.services import embedding_cache
+from app.services.embedding_cache import PromptEmbeddingCache
+
+
+def test_normalize_prompt_collapses_case_and_whitespace():
+    assert normalize_prompt("Hardcore survival  Skyrim ") == "hardcore survival skyrim"
+    assert normalize_prompt("hardcore\tsurvival\nskyrim") == "hardcore survival skyrim"
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_expires_entries():
+    now = [0.0]
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+
+    now[0] = 9.9
+    assert cache.get("a") == 1
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_prompt_embedding_cache_reuses_normalized_prompts(monkeypatch):
+    calls = []
+
+    async def fake_embed_text(text):
+        calls.append(text)
+        return [0.1, 0.2, 0.3]
+
+    monkeypatch.setattr(embedding_cache, "embed_text", fake_embed_text)
+    cache = PromptEmbeddingCache(maxsize=8, ttl=60, persistent=False)
+
+    first = asyncio.run(cache.get_or_embed("hardcore survival skyrim"))
+    second = asyncio.run(cache.get_or_embed("Hardcore survival  Skyrim"))
+
+    assert first == second == [0.1, 0.2, 0.3]
+    assert calls == ["hardcore survival skyrim"]
+    stats = cache.stats()
+    assert stats["memory"]["hits"] == 1
+    assert stats["embed_calls"] == 1
+
+
+def test_get_or_embed_many_embeds_misses_in_one_call(monkeypatch):
+    calls = []
+
+    async def fake_embed_texts(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    monkeypatch.setattr(embedding_cache, "embed_texts", fake_embed_texts)
+    cache = PromptEmbeddingCache(maxsize=8, ttl=60, persistent=False)
+    cache.memory.set(cache.key_for("cached prompt", embedding_cache.EMBEDDING_MODEL), [0.5])
+
+    result = asyncio.run(cache.get_or_embed_many(["cached prompt", "Dragons", "dragons ", "magic"]))
+
+    assert result == [[0.5], [7.0], [7.0], [5.0]]
+    assert calls == [["Dragons", "magic"]]
+    assert cache.stats()["embed_calls"] == 1
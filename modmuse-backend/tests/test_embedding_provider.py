@@ -0,0 +1,62 @@
+# tests/test_embedding_provider.py
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.embedding_service import (
+    HashingEmbeddingProvider,
+    OpenAIEmbeddingProvider,
+    create_embedding_provider,
+)
+
+
+def _cosine(a, b) -> float:
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def test_hashing_provider_is_deterministic_and_normalized():
+    provider = HashingEmbeddingProvider(dim=256)
+    first, again = asyncio.run(provider.embed(["Hardcore survival", "hardcore   SURVIVAL"]))
+
+    assert len(first) == 256
+    assert first == again  # normalized prompt text hashes the same
+    assert np.linalg.norm(first) == pytest.approx(1.0, abs=1e-6)
+    assert provider.model_id == "hashing-v1-256"
+
+
+def test_hashing_provider_scores_related_texts_higher():
+    provider = HashingEmbeddingProvider(dim=1536)
+    query = provider.embed_one("hardcore survival overhaul")
+
+    related = provider.embed_one("survival overhaul with hardcore needs")
+    unrelated = provider.embed_one("anime hairstyles for followers")
+    assert _cosine(query, related) > _cosine(query, unrelated)
+    # Character trigrams keep a typo close to the original
+    assert _cosine(query, provider.embed_one("hardcore survivl overhaul")) > 0.5
+
+
+def test_openai_provider_batches_and_keeps_input_order():
+    calls = []
+
+    async def create(model, input):
+        calls.append(list(input))
+        # The API may return items in any order; `index` ties them to inputs
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+    client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    provider = OpenAIEmbeddingProvider(client, "text-embedding-3-small", max_batch=2)
+
+    embeddings = asyncio.run(provider.embed(["a", "bb", "ccc"]))
+    assert embeddings == [[1.0], [2.0], [3.0]]
+    assert calls == [["a", "bb"], ["ccc"]]
+    assert provider.dim == 1536
+
+
+def test_unknown_provider_and_model_are_rejected():
+    with pytest.raises(ValueError):
+        create_embedding_provider("word2vec")
+    with pytest.raises(ValueError):
+        OpenAIEmbeddingProvider(client=None, model="not-a-model")
@@ -0,0 +1,70 @@
+# tests/test_embedding_registry.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.embedding_registry import EmbeddingRegistry, EmbeddingSpaceMismatch, StoredSpace
+from app.services.embedding_service import OpenAIEmbeddingProvider
+
+
+def test_mismatched_model_or_dimension_is_reported():
+    registry = EmbeddingRegistry("text-embedding-3-small@512", 512)
+
+    assert registry.mismatch(StoredSpace("text-embedding-3-small@512", 512, 512)) is None
+    # Nothing recorded yet (fresh database): only the column dimension counts
+    assert registry.mismatch(StoredSpace(None, None, 512)) is None
+
+    # Same dimension, different model: distances would silently be meaningless
+    assert "re-embed" in registry.mismatch(StoredSpace("hashing-v1-512", 512, 512))
+    assert "vector(1536)" in registry.mismatch(StoredSpace("text-embedding-3-small", 1536, 1536))
+
+
+def test_compatibility_is_checked_once_per_catalog_version(monkeypatch):
+    registry = EmbeddingRegistry("text-embedding-3-small", 1536)
+    stored = [StoredSpace("text-embedding-3-small", 1536, 1536)]
+
+    async def fake_read(session, column="mod.embedding"):
+        return stored[0]
+
+    monkeypatch.setattr(registry, "read", fake_read)
+
+    asyncio.run(registry.ensure_compatible())
+    asyncio.run(registry.ensure_compatible())
+    assert registry.checks == 1
+
+    # A re-embed swap to another space bumps the catalog version
+    stored[0] = StoredSpace("text-embedding-3-small@512", 512, 512)
+    registry.invalidate()
+    for _ in range(2):
+        with pytest.raises(EmbeddingSpaceMismatch):
+            asyncio.run(registry.ensure_compatible())
+    assert registry.checks == 2  # the failure is remembered too
+    assert registry.stats()["mismatch"] is not None
+
+
+def test_openai_provider_requests_shortened_embeddings():
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(data=[SimpleNamespace(index=0, embedding=[0.0] * 512)])
+
+    client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    provider = OpenAIEmbeddingProvider(client, "text-embedding-3-small", dimensions=512)
+    asyncio.run(provider.embed(["survival"]))
+
+    assert calls[0]["dimensions"] == 512
+    assert (provider.dim, provider.model_id) == (512, "text-embedding-3-small@512")
+
+    native = OpenAIEmbeddingProvider(client, "text-embedding-3-small", dimensions=1536)
+    assert native.model_id == "text-embedding-3-small"
+    asyncio.run(native.embed(["survival"]))
+    assert "dimensions" not in calls[1]
+
+
+def test_openai_provider_rejects_unsupported_dimensions():
+    with pytest.raises(ValueError):
+        OpenAIEmbeddingProvider(client=None, model="text-embedding-ada-002", dimensions=512)
+    with pytest.raises(ValueError):
+        OpenAIEmbeddingProvider(client=None, model="text-embedding-3-small", dimensions=3072)
@@ -0,0 +1,109 @@
+# tests/test_game_registry.py
+import asyncio
+import dataclasses
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import routes_games
+from app.main import app
+from app.models.domain import GameRead
+from app.services.game_registry import GameRegistry, UnknownGameError, build_snapshot
+from app.services.game_service import is_not_modified
+
+
+def _games(*game_ids):
+    return [GameRead(game_id=g, name=f"game {g}") for g in game_ids]
+
+
+def _registry_with(monkeypatch, snapshots):
+    registry = GameRegistry(ttl=float("inf"))
+
+    async def fake_refresh():
+        game_ids = snapshots[min(registry.loads, len(snapshots) - 1)]
+        snapshot = build_snapshot(_games(*game_ids), registry._snapshot)
+        # Old enough that a miss may trigger a reload
+        registry._snapshot = dataclasses.replace(snapshot, loaded_at=time.monotonic() - 10)
+        registry.loads += 1
+
+    monkeypatch.setattr(registry, "refresh", fake_refresh)
+    return registry
+
+
+def test_require_validates_against_cached_snapshot(monkeypatch):
+    registry = _registry_with(monkeypatch, [[2, 1]])
+
+    assert asyncio.run(registry.require(2)).name == "game 2"
+    assert [g.game_id for g in asyncio.run(registry.list_games())] == [1, 2]
+    assert registry.loads == 1
+
+
+def test_unknown_game_triggers_one_reload(monkeypatch):
+    # Second load picks up a game added after the first one
+    registry = _registry_with(monkeypatch, [[1], [1, 3]])
+
+    assert asyncio.run(registry.require(3)).game_id == 3
+    assert registry.loads == 2
+
+    registry._snapshot = dataclasses.replace(registry._snapshot, loaded_at=time.monotonic())
+    with pytest.raises(UnknownGameError):
+        asyncio.run(registry.require(99))
+    # Just reloaded: the miss does not query again
+    assert registry.loads == 2
+
+
+def test_snapshot_version_only_moves_when_content_changes():
+    first = build_snapshot(_games(1, 2))
+    same = build_snapshot(_games(2, 1), first)
+    changed = build_snapshot(_games(1, 2, 3), same)
+
+    assert (same.version, same.etag, same.last_modified) == (first.version, first.etag, first.last_modified)
+    assert changed.version == first.version + 1
+    assert changed.etag != first.etag
+    assert same.body == b'[{"game_id":1,"name":"game 1","genre":null,"engine":null,"platform":null},' \
+                        b'{"game_id":2,"name":"game 2","genre":null,"engine":null,"platform":null}]'
+
+
+def test_conditional_requests():
+    snapshot = build_snapshot(_games(1))
+
+    assert is_not_modified(snapshot, snapshot.etag, None)
+    assert is_not_modified(snapshot, f'"other", W/{snapshot.etag}', None)
+    assert is_not_modified(snapshot, "*", None)
+    assert not is_not_modified(snapshot, '"other"', None)
+    # If-None-Match wins over If-Modified-Since
+    assert not is_not_modified(snapshot, '"other"', "Fri, 01 Jan 2100 00:00:00 GMT")
+    assert is_not_modified(snapshot, None, "Fri, 01 Jan 2100 00:00:00 GMT")
+    assert not is_not_modified(snapshot, None, "Thu, 01 Jan 1970 00:00:00 GMT")
+    assert not is_not_modified(snapshot, None, "not a date")
+
+
+def test_if_modified_since_without_a_zone_is_utc():
+    snapshot = dataclasses.replace(
+        build_snapshot(_games(1)), last_modified=datetime(2026, 10, 18, 10, 0, tzinfo=timezone.utc)
+    )
+
+    assert is_not_modified(snapshot, None, "Sun, 18 Oct 2026 10:00:00 -0000")
+    assert not is_not_modified(snapshot, None, "Sun, 18 Oct 2026 09:59:59 -0000")
+    assert is_not_modified(snapshot, None, "Sun, 18 Oct 2026 10:00:00")
+
+
+def test_games_route_serves_snapshot_bytes_and_304(monkeypatch):
+    snapshot = build_snapshot(_games(1, 2))
+
+    async def fake_snapshot():
+        return snapshot
+
+    monkeypatch.setattr(routes_games, "games_snapshot", fake_snapshot)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/games/")
+    assert response.status_code == 200
+    assert response.content == snapshot.body
+    assert response.headers["etag"] == snapshot.etag
+
+    revalidated = client.get("/api/v1/games/", headers={"If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
@@ -0,0 +1,60 @@
+# tests/test_history_writer.py
+import asyncio
+from datetime import datetime
+
+from app.db.repositories import PromptHistoryEntry
+from app.services.history_writer import HistoryWriter
+
+
+def _entry(i):
+    return PromptHistoryEntry(
+        user_prompt=f"prompt {i}",
+        created_at=datetime(2025, 12, 10),
+        extracted_keywords=["survival"],
+        model_version="gpt-4o-mini",
+    )
+
+
+def test_entries_from_many_requests_are_flushed_in_batches():
+    flushed = []
+
+    async def fake_flush(batch):
+        flushed.append(len(batch))
+
+    async def scenario():
+        writer = HistoryWriter(max_queue=100, batch_size=4, flush_interval=0.05,
+                               enqueue_timeout=0.01, flush=fake_flush)
+        writer.start()
+        for i in range(10):
+            assert await writer.submit(_entry(i))
+        await writer.drain()
+        return writer
+
+    writer = asyncio.run(scenario())
+
+    assert sum(flushed) == 10
+    assert max(flushed) <= 4
+    assert len(flushed) < 10
+    assert writer.stats()["written"] == 10
+    assert writer.stats()["queue_depth"] == 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def slow_flush(batch):
+            await gate.wait()
+
+        writer = HistoryWriter(max_queue=2, batch_size=1, flush_interval=0.01,
+                               enqueue_timeout=0.01, flush=slow_flush)
+        writer.start()
+        results = [await writer.submit(_entry(i)) for i in range(6)]
+        gate.set()
+        await writer.drain()
+        return writer, results
+
+    writer, results = asyncio.run(scenario())
+
+    assert results.count(False) == writer.dropped > 0
+    assert writer.written == results.count(True)
@@ -0,0 +1,46 @@
+# tests/test_importer.py
+import json
+
+from app.db.importer import batched, parse_record, read_raw_records
+
+
+def test_parse_csv_style_record():
+    rec = parse_record({
+        "mod_id": "1", "game_id": "1", "name": "Frostfall",
+        "description": "", "source_url": "https://example.com", "version": "3.4.1",
+        "tags": "survival| immersion", "depends_on": "2", "incompatible_with": "",
+    })
+
+    assert rec.mod_id == 1 and rec.game_id == 1
+    assert rec.description is None
+    assert rec.tags == ["survival", "immersion"]
+    assert rec.depends_on == [2]
+    assert rec.incompatible_with == []
+
+
+def test_jsonl_records_stream_in_batches(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(1, 6):
+            f.write(json.dumps({"mod_id": i, "game_id": 1, "name": f"Mod {i}", "tags": ["ui"]}) + "\n")
+        f.write("\n")
+
+    records = (parse_record(raw) for raw in read_raw_records(path, "jsonl"))
+    sizes = [len(batch) for batch in batched(records, 2)]
+
+    assert sizes == [2, 2, 1]
+
+
+def test_csv_records_are_read(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text(
+        "mod_id,game_id,name,tags,depends_on\n"
+        "7,1,SkyUI,UI,\n"
+        "1,1,Frostfall,survival|immersion,2\n",
+        encoding="utf-8",
+    )
+
+    records = [parse_record(raw) for raw in read_raw_records(path, "csv")]
+
+    assert [r.name for r in records] == ["SkyUI", "Frostfall"]
+    assert records[1].tags == ["survival", "immersion"]
@@ -0,0 +1,88 @@
+# tests/test_keyword_extraction.py
+import asyncio
+
+import pytest
+
+from app.services import ai_services
+from app.services.pipeline import STAGE_FALLBACK, StageGraph
+
+
+def test_concurrent_identical_prompts_share_one_llm_call(monkeypatch):
+    calls = []
+
+    async def fake_request_keywords(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        return ["survival", "skyrim"]
+
+    monkeypatch.setattr(ai_services, "_request_keywords", fake_request_keywords)
+    ai_services.keyword_cache.clear()
+
+    async def burst():
+        return await asyncio.gather(
+            ai_services.extract_keywords("hardcore survival skyrim"),
+            ai_services.extract_keywords("Hardcore survival  Skyrim"),
+            ai_services.extract_keywords("hardcore survival skyrim"),
+        )
+
+    results = asyncio.run(burst())
+
+    assert results == [["survival", "skyrim"]] * 3
+    assert len(calls) == 1
+
+    # Memoized afterwards
+    assert asyncio.run(ai_services.extract_keywords("HARDCORE survival skyrim")) == ["survival", "skyrim"]
+    assert len(calls) == 1
+
+
+def test_failed_extraction_is_not_cached(monkeypatch):
+    attempts = []
+
+    async def flaky_request_keywords(prompt):
+        attempts.append(prompt)
+        if len(attempts) == 1:
+            raise RuntimeError("provider hiccup")
+        return ["magic"]
+
+    monkeypatch.setattr(ai_services, "_request_keywords", flaky_request_keywords)
+    ai_services.keyword_cache.clear()
+
+    try:
+        asyncio.run(ai_services.extract_keywords("magic overhaul"))
+    except RuntimeError:
+        pass
+
+    assert asyncio.run(ai_services.extract_keywords("magic overhaul")) == ["magic"]
+    assert len(attempts) == 2
+
+
+def test_fallback_keywords_keep_content_words_in_order():
+    assert ai_services.fallback_keywords("I want some Hardcore survival mods with survival needs for Skyrim") == [
+        "hardcore", "survival", "needs", "skyrim",
+    ]
+    assert ai_services.fallback_keywords("mods for my game") == []
+
+
+def test_guard_gives_up_before_its_stage_times_out(monkeypatch):
+    monkeypatch.setattr(ai_services.settings, "openai_deadline_margin_seconds", 0.05)
+    guard = ai_services.openai_guard("test", max_concurrency=4, stage_timeout=0.15)
+    assert guard.deadline == pytest.approx(0.1)
+
+    async def hang():
+        await asyncio.sleep(1)
+
+    graph = StageGraph()
+    graph.add(
+        "keywords",
+        lambda: guard.call(hang),
+        timeout=0.15,
+        default=[],
+        fallback=lambda error: ai_services.fallback_keywords("hardcore survival"),
+    )
+    result = asyncio.run(graph.run())
+
+    # The guard saw the timeout (and told its breaker) before the stage cancelled it
+    assert result.stages["keywords"].status == STAGE_FALLBACK
+    assert result["keywords"] == ["hardcore", "survival"]
+    assert guard.breaker.consecutive_failures >= 1
+    assert guard.failures == 1
@@ -0,0 +1,31 @@
+# tests/test_metrics.py
+from app.core.metrics import SIMILARITY_BUCKETS, Histogram
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram(buckets=[0.001, 0.01, 0.1])
+    for value in [0.0005] * 50 + [0.005] * 45 + [0.05] * 4 + [2.0]:
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["buckets"] == {"le_1ms": 50, "le_10ms": 95, "le_100ms": 99, "le_inf": 100}
+    # p50 sits at the top of the first bucket, p99 inside the third
+    assert histogram.quantile(0.5) <= 0.001
+    assert 0.01 < histogram.quantile(0.99) <= 0.1
+    assert snapshot["max_ms"] == 2000.0
+
+
+def test_empty_histogram_has_no_quantiles():
+    histogram = Histogram()
+    assert histogram.quantile(0.5) is None
+    assert histogram.snapshot()["p99_ms"] is None
+
+
+def test_unitless_snapshot_keys():
+    histogram = Histogram(SIMILARITY_BUCKETS)
+    histogram.observe(0.97)
+    snapshot = histogram.snapshot(scale=1.0, unit="")
+    assert snapshot["max"] == 0.97
+    assert snapshot["buckets"]["le_0.97"] == 1
+    assert snapshot["buckets"]["le_0.96"] == 0
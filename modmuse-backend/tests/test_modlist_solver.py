@@ -0,0 +1,62 @@
+# tests/test_modlist_solver.py
+import random
+
+from app.services.compatibility import CompatibilityGraph
+from app.services.modlist_solver import solve_mod_list
+
+
+def _solve(dependencies, incompatibilities, scores, **kwargs):
+    graph = CompatibilityGraph.from_edges(dependencies, incompatibilities)
+    return solve_mod_list(graph, scores, time_budget=1.0, **kwargs)
+
+
+def test_local_improvement_beats_greedy():
+    # Greedy takes A (best value per conflict); B + C together score more.
+    result = _solve(set(), {(1, 2), (1, 3)}, {1: 5.0, 2: 3.0, 3: 3.0})
+
+    assert result.greedy_score == 5.0
+    assert sorted(result.selected) == [2, 3]
+    assert result.total_score == 6.0
+    assert result.dropped == [1]
+    assert result.improvements >= 1
+
+
+def test_dependencies_are_pulled_in_or_make_candidate_infeasible():
+    deps = {(1, 10)}
+    conflicts = {(10, 2)}
+    scores = {1: 4.0, 2: 3.0, 5: 1.0}
+
+    result = _solve(deps, conflicts, scores)
+    assert result.selected == [1, 5]
+    assert result.dependencies_added == [10]
+    assert result.dropped == [2]
+
+    strict = _solve(deps, conflicts, scores, allow_extra_dependencies=False)
+    assert strict.selected == [2, 5]
+    assert strict.infeasible == [1]
+
+
+def test_self_conflicting_closure_is_infeasible():
+    result = _solve({(1, 2), (1, 3)}, {(2, 3)}, {1: 9.0, 4: 1.0})
+
+    assert result.infeasible == [1]
+    assert result.selected == [4]
+
+
+def test_random_graphs_always_yield_valid_mod_lists():
+    rng = random.Random(7)
+    for _ in range(25):
+        n = 30
+        deps = {(a, rng.randrange(a)) for a in range(1, n) if rng.random() < 0.3}
+        conflicts = {
+            (a, b) for a in range(n) for b in range(a + 1, n) if rng.random() < 0.08
+        }
+        scores = {mod_id: rng.random() for mod_id in range(n)}
+        graph = CompatibilityGraph.from_edges(deps, conflicts)
+
+        result = solve_mod_list(graph, scores, time_budget=1.0)
+
+        chosen = set(result.selected) | set(result.dependencies_added)
+        assert not any(a in chosen and b in chosen for a, b in conflicts)
+        assert all(dep in chosen for mod_id, dep in deps if mod_id in chosen)
+        assert result.total_score >= result.greedy_score - 1e-9
@@ -0,0 +1,85 @@
+# tests/test_pipeline.py
+import asyncio
+import time
+
+from app.services.pipeline import STAGE_FALLBACK, STAGE_OK, STAGE_SKIPPED, STAGE_TIMEOUT, StageGraph
+
+
+def test_independent_stages_run_concurrently():
+    async def slow(value):
+        await asyncio.sleep(0.05)
+        return value
+
+    graph = StageGraph()
+    graph.add("a", lambda: slow(1))
+    graph.add("b", lambda: slow(2))
+    graph.add("sum", lambda a, b: slow(a + b), deps=("a", "b"))
+
+    started = time.perf_counter()
+    result = asyncio.run(graph.run())
+    elapsed = time.perf_counter() - started
+
+    assert result["sum"] == 3
+    assert result.degraded == []
+    # Two levels of 50ms each, not three sequential sleeps.
+    assert elapsed < 0.14
+
+
+def test_missed_deadline_returns_default_and_skips_dependents():
+    async def hang():
+        await asyncio.sleep(1)
+        return "late"
+
+    async def fast():
+        return ["survival"]
+
+    async def search(embedding):
+        return ["should not run"]
+
+    graph = StageGraph()
+    graph.add("embedding", hang, timeout=0.01, default=None)
+    graph.add("keywords", fast, default=[])
+    graph.add("vector_search", search, deps=("embedding",), default=[])
+
+    result = asyncio.run(graph.run())
+
+    assert result["keywords"] == ["survival"]
+    assert result["vector_search"] == []
+    assert result.stages["embedding"].status == STAGE_TIMEOUT
+    assert result.stages["vector_search"].status == STAGE_SKIPPED
+    assert result.degraded == ["embedding", "vector_search"]
+
+
+def test_on_result_reports_stages_as_they_settle():
+    async def sleep_then(value, delay):
+        await asyncio.sleep(delay)
+        return value
+
+    graph = StageGraph()
+    graph.add("slow", lambda: sleep_then("slow", 0.05))
+    graph.add("fast", lambda: sleep_then("fast", 0.0))
+    graph.add("after_fast", lambda fast: sleep_then(fast + "!", 0.0), deps=("fast",))
+
+    reported = []
+    asyncio.run(graph.run(on_result=lambda res: reported.append(res.name)))
+
+    assert reported == ["fast", "after_fast", "slow"]
+
+
+def test_fallback_value_feeds_dependents_but_stays_degraded():
+    async def unavailable():
+        raise RuntimeError("circuit open")
+
+    async def search(keywords):
+        return [f"mods for {k}" for k in keywords]
+
+    graph = StageGraph()
+    graph.add("keywords", unavailable, default=[], fallback=lambda error: ["survival"])
+    graph.add("tag_search", search, deps=("keywords",), default=[])
+
+    result = asyncio.run(graph.run())
+
+    assert result.stages["keywords"].status == STAGE_FALLBACK
+    assert result["tag_search"] == ["mods for survival"]
+    assert result.stages["tag_search"].status == STAGE_OK
+    assert result.degraded == ["keywords"]
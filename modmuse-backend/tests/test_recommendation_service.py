@@ -0,0 +1,111 @@
+# tests/test_recommendation_service.py
+import asyncio
+from types import SimpleNamespace
+
+from app.models.domain import PromptCreate
+from app.services import recommendation_service as rs
+from app.services.pipeline import STAGE_OK, STAGE_TIMEOUT
+
+
+class FakeReuseCache:
+    def __init__(self, match=None):
+        self.match = match
+        self.lookups = []
+
+    def active(self, version):
+        return True
+
+    async def lookup(self, game_id, embedding, version):
+        self.lookups.append(embedding)
+        return self.match
+
+
+def _patch(monkeypatch, events, embed_seconds, keyword_seconds=0.01, match=None):
+    async def resolve_game_id(game_id):
+        return 1
+
+    async def no_cached_response(*args):
+        return None
+
+    async def embed(prompt):
+        events.append("embed")
+        await asyncio.sleep(embed_seconds)
+        events.append("embedded")
+        return [1.0, 0.0]
+
+    async def keywords(prompt):
+        events.append("keywords")
+        await asyncio.sleep(keyword_seconds)
+        events.append("extracted")
+        return ["survival"]
+
+    async def search(query, game_id):
+        return []
+
+    async def complete(user_prompt, game_id, stages, session, version, known_mods=None):
+        return stages
+
+    async def replay(cached, user_prompt, game_id, version, session):
+        return cached
+
+    monkeypatch.setattr(rs, "resolve_game_id", resolve_game_id)
+    monkeypatch.setattr(rs.response_cache, "get", no_cached_response)
+    monkeypatch.setattr(rs.catalog_version, "current", 3)
+    monkeypatch.setattr(rs, "semantic_prompt_cache", FakeReuseCache(match))
+    monkeypatch.setattr(rs, "_prompt_embedding", embed)
+    monkeypatch.setattr(rs, "extract_keywords", keywords)
+    monkeypatch.setattr(rs, "_semantic_search", search)
+    monkeypatch.setattr(rs, "_keyword_search", search)
+    monkeypatch.setattr(rs, "_complete", complete)
+    monkeypatch.setattr(rs, "_replay", replay)
+
+
+def test_reuse_lookup_overlaps_keyword_extraction(monkeypatch):
+    events = []
+    _patch(monkeypatch, events, embed_seconds=0.05)
+
+    stages = asyncio.run(rs.generate_recommendations(PromptCreate(user_prompt="frost survival"), session=None))
+
+    # Keywords were extracted while the prompt was still being embedded, and it was embedded once
+    assert events.index("extracted") < events.index("embedded")
+    assert events.count("embed") == 1
+    assert rs.semantic_prompt_cache.lookups == [[1.0, 0.0]]
+    assert stages.stages["embedding"].status == STAGE_OK
+
+
+def test_embedding_timeout_is_not_retried(monkeypatch):
+    events = []
+    _patch(monkeypatch, events, embed_seconds=1.0)
+    monkeypatch.setattr(rs.settings, "embedding_stage_timeout", 0.05)
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        stages = await rs.generate_recommendations(PromptCreate(user_prompt="frost survival"), session=None)
+        return stages, loop.time() - started
+
+    stages, elapsed = asyncio.run(timed())
+
+    assert stages.stages["embedding"].status == STAGE_TIMEOUT
+    assert events.count("embed") == 1
+    assert rs.semantic_prompt_cache.lookups == []
+    assert elapsed < 0.5
+
+
+def test_reused_answer_cancels_retrieval(monkeypatch):
+    events = []
+    reused = SimpleNamespace(prompt=SimpleNamespace(extracted_keywords=["survival"]))
+    _patch(monkeypatch, events, embed_seconds=0.01, keyword_seconds=1.0,
+           match=SimpleNamespace(prompt_id=7, similarity=0.99, response=reused))
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await rs.generate_recommendations(PromptCreate(user_prompt="frost survival"), session=None)
+        return result, loop.time() - started
+
+    result, elapsed = asyncio.run(timed())
+
+    assert result is reused
+    assert "extracted" not in events
+    assert elapsed < 0.5
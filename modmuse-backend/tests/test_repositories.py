@@ -0,0 +1,86 @@
+# tests/test_repositories.py
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.db.repositories import PromptHistoryEntry, PromptHistoryRepository, RecommendationRow
+
+
+def _entry(prompt, ranked_mods):
+    """ranked_mods: (mod_id, rank_order) pairs, in any order."""
+    return PromptHistoryEntry(
+        user_prompt=prompt,
+        created_at=datetime(2026, 10, 18),
+        extracted_keywords=["survival"],
+        model_version="gpt-4o-mini",
+        recommendations=[
+            RecommendationRow(mod_id=mod_id, relevance_score=1.0 / rank, rank_order=rank)
+            for mod_id, rank in ranked_mods
+        ],
+    )
+
+
+class FakeSession:
+    """Hands out ids like sequences; RETURNING rows come back in parameter order only when asked to."""
+
+    def __init__(self):
+        self.next_prompt_id = 1
+        self.next_rec_id = 100
+        self.inserted_recs = {}
+
+    def _new_rec(self, prompt_id, mod_id, rank_order):
+        rec_id, self.next_rec_id = self.next_rec_id, self.next_rec_id + 1
+        self.inserted_recs[rec_id] = (prompt_id, mod_id, rank_order)
+        return rec_id
+
+    async def execute(self, statement, params):
+        prompt_id, self.next_prompt_id = self.next_prompt_id, self.next_prompt_id + 1
+        rows = [
+            SimpleNamespace(prompt_id=prompt_id, rec_id=self._new_rec(prompt_id, mod_id, rank), rank_order=rank)
+            for mod_id, rank in zip(params["mod_ids"], params["ranks"])
+        ]
+        # ORDER BY new_recs.rank_order; a prompt without recommendations still yields one row
+        rows.sort(key=lambda row: row.rank_order)
+        rows = rows or [SimpleNamespace(prompt_id=prompt_id, rec_id=None, rank_order=None)]
+        return SimpleNamespace(all=lambda: rows)
+
+    async def scalars(self, statement, params):
+        if statement.table.name == "prompt":
+            ids = list(range(self.next_prompt_id, self.next_prompt_id + len(params)))
+            self.next_prompt_id += len(params)
+        else:
+            ids = [self._new_rec(p["prompt_id"], p["mod_id"], p["rank_order"]) for p in params]
+        if not statement._sort_by_parameter_order:
+            ids.reverse()
+        return SimpleNamespace(all=lambda: ids)
+
+
+def test_save_returns_rec_ids_in_recommendation_order():
+    session = FakeSession()
+    entry = _entry("frost survival", [(501, 2), (502, 1), (503, 3)])
+
+    saved = asyncio.run(PromptHistoryRepository(session).save(entry))
+
+    assert saved.prompt_id == 1
+    assert [session.inserted_recs[rec_id] for rec_id in saved.rec_ids] == [(1, 501, 2), (1, 502, 1), (1, 503, 3)]
+
+    empty = asyncio.run(PromptHistoryRepository(session).save(_entry("nothing found", [])))
+    assert (empty.prompt_id, empty.rec_ids) == (2, [])
+
+
+def test_save_many_keeps_input_order():
+    session = FakeSession()
+    entries = [
+        _entry("frost survival", [(501, 1), (502, 2)]),
+        _entry("nothing found", []),
+        _entry("better cities", [(601, 2), (602, 1), (603, 3)]),
+    ]
+
+    saved = asyncio.run(PromptHistoryRepository(session).save_many(entries))
+
+    assert [s.prompt_id for s in saved] == [1, 2, 3]
+    for entry, result in zip(entries, saved):
+        assert [session.inserted_recs[rec_id] for rec_id in result.rec_ids] == [
+            (result.prompt_id, r.mod_id, r.rank_order) for r in entry.recommendations
+        ]
+    assert asyncio.run(PromptHistoryRepository(session).save_many([])) == []
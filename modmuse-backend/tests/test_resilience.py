@@ -0,0 +1,142 @@
+# tests/test_resilience.py
+import asyncio
+
+import pytest
+
+from app.core.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderGuard,
+    ProviderOverloaded,
+)
+
+
+class Transient(Exception):
+    pass
+
+
+def _guard(breaker=None, **overrides):
+    options = dict(
+        max_concurrency=4,
+        deadline=1.0,
+        attempt_timeout=0.5,
+        max_attempts=3,
+        base_delay=0.001,
+        max_delay=0.01,
+        breaker=breaker or CircuitBreaker(failure_threshold=100, reset_timeout=60),
+        is_transient=lambda error: isinstance(error, Transient),
+    )
+    options.update(overrides)
+    return ProviderGuard("test", **options)
+
+
+def _flaky(failures, exc=Transient):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise exc("provider hiccup")
+        return "ok"
+
+    return fn, calls
+
+
+def test_transient_errors_are_retried():
+    guard = _guard()
+    fn, calls = _flaky(failures=2)
+
+    assert asyncio.run(guard.call(fn)) == "ok"
+    assert len(calls) == 3
+    assert guard.retries == 2
+
+
+def test_other_errors_and_exhausted_retries_are_raised():
+    guard = _guard()
+    fn, calls = _flaky(failures=1, exc=ValueError)
+    with pytest.raises(ValueError):
+        asyncio.run(guard.call(fn))
+    assert len(calls) == 1
+
+    fn, calls = _flaky(failures=10)
+    with pytest.raises(Transient):
+        asyncio.run(guard.call(fn))
+    assert len(calls) == 3
+
+
+def test_slow_attempts_time_out_within_the_deadline():
+    async def hang():
+        await asyncio.sleep(1)
+
+    guard = _guard(deadline=0.1, attempt_timeout=0.04)
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(asyncio.TimeoutError):
+            await guard.call(hang)
+        return loop.time() - started
+
+    # Never past the deadline, whatever the retry budget
+    assert asyncio.run(timed()) < 0.2
+    assert guard.attempts >= 2
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_probe():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+    guard = _guard(breaker=breaker, max_attempts=1)
+
+    fn, calls = _flaky(failures=2)
+    for _ in range(2):
+        with pytest.raises(Transient):
+            asyncio.run(guard.call(fn))
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(guard.call(fn))
+    assert len(calls) == 2  # the provider was not called
+
+    now[0] = 30.0
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() and not breaker.allow()  # a single probe
+    breaker.release_probe()
+
+    assert asyncio.run(guard.call(fn)) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_the_breaker():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 10.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+
+
+def test_callers_beyond_the_concurrency_limit_are_rejected_at_the_deadline():
+    guard = _guard(max_concurrency=1, deadline=0.05)
+
+    async def slow():
+        await asyncio.sleep(0.2)
+        return "done"
+
+    async def burst():
+        return await asyncio.gather(guard.call(slow, deadline=1.0), guard.call(slow), return_exceptions=True)
+
+    first, second = asyncio.run(burst())
+    assert first == "done"
+    assert isinstance(second, ProviderOverloaded)
+    assert guard.rejected_overload == 1
+
+
+def test_backoff_is_jittered_and_capped():
+    guard = _guard(base_delay=0.1, max_delay=0.5, rng=lambda: 1.0)
+    assert [guard.backoff(retry) for retry in (1, 2, 3, 4)] == [0.1, 0.2, 0.4, 0.5]
+    assert _guard(base_delay=0.1, max_delay=1.0, rng=lambda: 0.25).backoff(2) == pytest.approx(0.05)
@@ -0,0 +1,76 @@
+# tests/test_response_cache.py
+import asyncio
+from datetime import datetime
+
+from app.models.domain import PromptRead, RecommendationResponse
+from app.services.response_cache import (
+    InMemoryResponseBackend,
+    ResponseCache,
+    SharedResponseBackend,
+)
+
+
+class FakeSharedClient:
+    """Dict-backed stand-in for a redis-style client."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def _response(prompt: str) -> RecommendationResponse:
+    return RecommendationResponse(
+        prompt=PromptRead(
+            prompt_id=1,
+            user_prompt=prompt,
+            created_at=datetime(2024, 1, 1),
+            extracted_keywords=["magic"],
+            model_version="gpt-4o-mini",
+        ),
+        recommendations=[],
+    )
+
+
+def test_hit_after_set_and_normalized_prompt():
+    async def scenario():
+        cache = ResponseCache(InMemoryResponseBackend(maxsize=8, ttl=60), ttl=60)
+        assert await cache.get(1, "Magic mods", "m", 3) is None
+
+        await cache.set(1, "Magic mods", "m", 3, _response("Magic mods"))
+        hit = await cache.get(1, "  magic   MODS ", "m", 3)
+        assert hit is not None and hit.prompt.extracted_keywords == ["magic"]
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_catalog_version_change_misses():
+    async def scenario():
+        client = FakeSharedClient()
+        cache = ResponseCache(SharedResponseBackend(client), ttl=60)
+        await cache.set(1, "magic", "m", 3, _response("magic"))
+
+        assert await cache.get(1, "magic", "m", 4) is None
+        assert await cache.get(2, "magic", "m", 3) is None
+        assert await cache.get(1, "magic", "other-model", 3) is None
+        assert await cache.get(1, "magic", "m", 3) is not None
+
+    asyncio.run(scenario())
+
+
+def test_unknown_version_bypasses_cache():
+    async def scenario():
+        client = FakeSharedClient()
+        cache = ResponseCache(SharedResponseBackend(client), ttl=60)
+        await cache.set(1, "magic", "m", None, _response("magic"))
+
+        assert client.data == {}
+        assert await cache.get(1, "magic", "m", None) is None
+        assert cache.stats()["bypassed"] == 1
+
+    asyncio.run(scenario())
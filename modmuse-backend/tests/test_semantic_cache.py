@@ -0,0 +1,102 @@
+# tests/test_semantic_cache.py
+import asyncio
+from datetime import datetime
+
+import numpy as np
+
+from app.models.domain import PromptRead, RecommendationResponse
+from app.services.semantic_cache import SemanticPromptCache, _PromptPartition, _unit
+
+
+def _response(prompt_id: int) -> RecommendationResponse:
+    return RecommendationResponse(
+        prompt=PromptRead(
+            prompt_id=prompt_id,
+            user_prompt=f"prompt {prompt_id}",
+            created_at=datetime(2024, 1, 1),
+            extracted_keywords=["survival"],
+            model_version="gpt-4o-mini",
+        ),
+        recommendations=[],
+    )
+
+
+def _cache_with(game_id, version, stored, threshold=0.95):
+    """Cache whose partition for (game_id, version) is already loaded with (prompt_id, embedding) rows."""
+    cache = SemanticPromptCache(threshold=threshold, max_prompts=8)
+    partition = _PromptPartition(version, capacity=8)
+    for prompt_id, embedding in stored:
+        partition.add(np.asarray(embedding, dtype=np.float32), prompt_id, None)
+    cache._store(game_id, partition)
+    return cache
+
+
+def test_near_duplicate_prompt_is_reused_above_threshold():
+    cache = _cache_with(1, version=3, stored=[(10, [1, 0, 0]), (11, [0, 1, 0])])
+
+    match = asyncio.run(cache.lookup(1, [0.99, 0.05, 0], version=3))
+    assert match is not None and match.prompt_id == 10
+    assert match.similarity > 0.99
+    assert match.response is None  # rebuilt from stored rows by the caller
+
+    assert asyncio.run(cache.lookup(1, [0.7, 0.7, 0], version=3)) is None
+    assert (cache.hits, cache.misses, cache.lookups) == (1, 1, 2)
+    assert cache.stats()["best_similarity"]["count"] == 2
+
+
+def test_added_answers_are_returned_from_memory():
+    cache = _cache_with(1, version=3, stored=[])
+    response = _response(42)
+
+    cache.add(1, 3, [0, 0, 2], response)
+    # Other versions / unloaded games are left to the next load from the table
+    cache.add(1, 4, [0, 2, 0], _response(43))
+    cache.add(2, 3, [0, 2, 0], _response(44))
+
+    match = asyncio.run(cache.lookup(1, [0, 0, 1], version=3))
+    assert match.response is response
+    assert asyncio.run(cache.lookup(1, [0, 1, 0], version=3)) is None
+
+
+def test_remembered_response_survives_until_row_is_overwritten():
+    cache = _cache_with(1, version=3, stored=[(10, [1, 0, 0])])
+    match = asyncio.run(cache.lookup(1, [1, 0, 0], version=3))
+    match.response = _response(10)
+    cache.remember(match)
+
+    assert asyncio.run(cache.lookup(1, [1, 0, 0], version=3)).response is match.response
+
+
+def test_ring_buffer_keeps_most_recent_prompts():
+    partition = _PromptPartition(version=1, capacity=2)
+    for prompt_id, embedding in [(1, [1, 0]), (2, [0, 1]), (3, [-1, 0])]:
+        partition.add(np.asarray(embedding, dtype=np.float32), prompt_id, None)
+
+    assert partition.size == 2
+    assert sorted(partition.prompt_ids) == [2, 3]
+    row, _ = partition.best(np.array([-1, 0], dtype=np.float32))
+    assert partition.prompt_ids[row] == 3
+
+
+def test_buffer_grows_geometrically_up_to_capacity():
+    partition = _PromptPartition(version=1, capacity=200, initial_rows=4)
+    rows = [[float(n), 1.0] for n in range(300)]
+
+    for prompt_id, embedding in enumerate(rows[:5]):
+        partition.add(np.asarray(embedding, dtype=np.float32), prompt_id, None)
+    assert partition.matrix.shape == (8, 2)
+
+    for prompt_id, embedding in enumerate(rows[5:], start=5):
+        partition.add(np.asarray(embedding, dtype=np.float32), prompt_id, None)
+    assert partition.matrix.shape == (200, 2)
+    assert partition.size == 200
+    assert sorted(partition.prompt_ids) == list(range(100, 300))
+    row, _ = partition.best(_unit(np.array([5.0, 1.0], dtype=np.float32)))
+    assert partition.prompt_ids[row] in range(100, 300)
+
+
+def test_unknown_catalog_version_bypasses():
+    cache = SemanticPromptCache(threshold=0.9, max_prompts=8)
+    assert not cache.active(None)
+    assert cache.bypassed == 1
+    assert not SemanticPromptCache(threshold=0.9, max_prompts=8, enabled=False).active(5)
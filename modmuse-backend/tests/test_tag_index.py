@@ -0,0 +1,55 @@
+# tests/test_tag_index.py
+from app.services.tag_index import GameTagIndex, TagIndex, normalize_tag
+
+
+def _index():
+    rows = [
+        (1, "Survival", 10),
+        (1, "Survival", 11),
+        (2, "Armor", 11),
+        (2, "Armor", 12),
+        (3, "Magic Overhaul", 13),
+        (4, "Followers", 14),
+    ]
+    return GameTagIndex.from_rows(rows, min_similarity=0.4)
+
+
+def test_normalize_tag_casefolds_and_lemmatizes():
+    assert normalize_tag("  Survival-Mechanics ") == "survival mechanic"
+    assert normalize_tag("Bodies") == "body"
+    assert normalize_tag("Glass") == "glass"
+
+
+def test_exact_token_and_fuzzy_matches():
+    index = _index()
+
+    assert [m.tag_id for m in index.match("survival")] == [1]
+    assert index.match("SURVIVAL")[0].score == 1.0
+    # Keyword contains the whole tag / keyword is part of a multi-word tag
+    assert [m.tag_id for m in index.match("survival mechanics")] == [1]
+    assert [m.tag_id for m in index.match("magic")] == [3]
+    # Plural and spelling variants
+    assert [m.tag_id for m in index.match("follower")] == [4]
+    assert [m.tag_id for m in index.match("armour")] == [2]
+    assert index.match("dragons") == []
+
+
+def test_candidates_rank_by_summed_scores_from_postings():
+    index = _index()
+
+    ranked = index.candidates(["survival", "armor"])
+
+    # Mod 11 carries both matching tags
+    assert [mod_id for mod_id, _ in ranked] == [11, 10, 12]
+    assert index.candidates(["survival", "armor"], limit=1) == ranked[:1]
+
+
+def test_invalidate_drops_game_partitions():
+    tags = TagIndex(min_similarity=0.4)
+    tags._games[1] = _index()
+    tags._games[2] = _index()
+
+    tags.invalidate(1)
+    assert 1 not in tags and 2 in tags
+    tags.invalidate()
+    assert tags.stats()["games_loaded"] == 0
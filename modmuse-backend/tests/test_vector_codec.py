@@ -0,0 +1,54 @@
+# tests/test_vector_codec.py
+import struct
+
+import numpy as np
+import pytest
+
+from app.db.vector_codec import BinaryHalfVector, BinaryVector, decode_halfvec, decode_vector, encode_halfvec, encode_vector
+
+
+def test_encode_matches_pgvector_binary_format():
+    encoded = encode_vector([1.0, -2.5, 0.25])
+    assert bytes(encoded) == struct.pack(">HH3f", 3, 0, 1.0, -2.5, 0.25)
+
+
+def test_round_trip_accepts_lists_arrays_and_text():
+    values = np.random.default_rng(0).normal(size=16).astype(np.float32)
+    for source in (values, values.astype(np.float64), values.tolist()):
+        decoded = decode_vector(bytes(encode_vector(source)))
+        assert decoded.dtype == np.float32
+        np.testing.assert_array_equal(decoded, values)
+
+    np.testing.assert_allclose(decode_vector(bytes(encode_vector("[0.5,-1,2e-1]"))), [0.5, -1.0, 0.2])
+    # Pre-encoded elements pass through untouched
+    encoded = encode_vector(values)
+    assert encode_vector(encoded) is encoded
+
+
+def test_halfvec_uses_two_bytes_per_dimension_and_decodes_to_float32():
+    encoded = encode_halfvec([1.0, -2.5, 0.25])
+    assert bytes(encoded) == struct.pack(">HH3e", 3, 0, 1.0, -2.5, 0.25)
+
+    values = np.random.default_rng(1).normal(scale=0.05, size=1536).astype(np.float32)
+    decoded = decode_halfvec(bytes(encode_halfvec(values)))
+    assert decoded.dtype == np.float32
+    # float16 keeps ~3 significant digits: cosine to the original is ~1
+    cosine = decoded @ values / (np.linalg.norm(decoded) * np.linalg.norm(values))
+    assert cosine > 0.99999
+
+
+def test_decode_rejects_truncated_payload():
+    with pytest.raises(ValueError):
+        decode_vector(bytes(encode_vector([1.0, 2.0]))[:-1])
+    with pytest.raises(ValueError):
+        # A float32 payload is not a valid halfvec
+        decode_halfvec(bytes(encode_vector([1.0, 2.0])))
+
+
+def test_binary_column_types_pass_values_to_codec():
+    for column in (BinaryVector(3), BinaryHalfVector()):
+        assert column.bind_processor(None) is None
+        process = column.result_processor(None, None)
+        assert process(np.array([1, 2, 3], dtype=np.float32)) == [1.0, 2.0, 3.0]
+        assert process("[1,2,3]") == [1.0, 2.0, 3.0]
+        assert process(None) is None
@@ -0,0 +1,176 @@
+# tests/test_vector_index.py
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import vector_index
+from app.services.vector_index import (
+    NumpyVectorIndex,
+    PgVectorBackend,
+    _GamePartition,
+    parse_vector_text,
+    top_k,
+    top_k_rows,
+)
+
+
+def _index_with(game_id, ids, vectors):
+    index = NumpyVectorIndex()
+    index._partitions[game_id] = _GamePartition.from_rows(ids, np.asarray(vectors, dtype=np.float32))
+    return index
+
+
+def test_parse_vector_text():
+    np.testing.assert_allclose(parse_vector_text("[0.5,-1,2e-1]"), [0.5, -1.0, 0.2])
+
+
+def test_top_k_returns_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    assert top_k(scores, 2).tolist() == [1, 3]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 0]
+
+
+def test_top_k_rows_ranks_each_query():
+    scores = np.array([[0.1, 0.9, 0.5], [0.8, 0.2, 0.3]], dtype=np.float32)
+    assert top_k_rows(scores, 2).tolist() == [[1, 2], [0, 2]]
+    assert top_k_rows(scores, 5).tolist() == [[1, 2, 0], [0, 2, 1]]
+
+
+def test_search_many_matches_single_searches():
+    index = _index_with(1, [10, 11, 12], [[1, 0], [0, 1], [1, 1]])
+    queries = [[2, 0.1], [0, 1], [-1, -1]]
+
+    batched = asyncio.run(index.search_many(queries, game_id=1, k=2))
+
+    assert batched == [asyncio.run(index.search(q, game_id=1, k=2)) for q in queries]
+
+
+def test_search_ranks_by_cosine_similarity_within_game():
+    index = _index_with(1, [10, 11, 12], [[1, 0], [0, 1], [1, 1]])
+
+    results = asyncio.run(index.search([2, 0.1], game_id=1, k=2))
+
+    assert [mod_id for mod_id, _ in results] == [10, 12]
+    assert results[0][1] > 0.99
+    # Other games are partitioned away
+    assert index.search_loaded([1, 0], game_id=2, k=2) == []
+
+
+def test_incremental_upsert_and_remove():
+    index = _index_with(1, [10, 11], [[1, 0], [0, 1]])
+
+    # Re-embed mod 11 to point the other way, add a new mod 12
+    index.upsert(1, 11, [1, 0.05])
+    index.upsert(1, 12, [-1, 0])
+    assert [m for m, _ in index.search_loaded([1, 0], 1, k=3)] == [10, 11, 12]
+
+    index.remove(10)
+    assert [m for m, _ in index.search_loaded([1, 0], 1, k=3)] == [11, 12]
+    assert index.stats()["partitions"] == {1: 2}
+
+
+class _FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        return SimpleNamespace(all=lambda: [row for row in self.rows if row.mod_id in params["mod_ids"]])
+
+
+def _log_changes(monkeypatch, changes, current_rows=()):
+    async def read_changes(session, after_id, limit):
+        return [change for change in changes if change.change_id > after_id]
+
+    monkeypatch.setattr(vector_index, "read_vector_changes", read_changes)
+    monkeypatch.setattr(vector_index, "SessionLocal", lambda: _FakeSession(list(current_rows)))
+
+
+def test_logged_changes_are_applied_without_a_reload(monkeypatch):
+    index = _index_with(1, [10, 11, 12], [[1, 0], [0, 1], [0.5, 0.5]])
+    index._partitions[2] = _GamePartition.from_rows([20], np.ones((1, 2), dtype=np.float32))
+    # Mod 11 re-embedded, mod 20 moved to game 1, mod 12 lost its embedding
+    _log_changes(
+        monkeypatch,
+        [SimpleNamespace(change_id=7, mod_ids=[11, 12]), SimpleNamespace(change_id=8, mod_ids=[20])],
+        [
+            SimpleNamespace(mod_id=11, game_id=1, embedding=np.array([1, 0.05], dtype=np.float32)),
+            SimpleNamespace(mod_id=12, game_id=1, embedding=None),
+            SimpleNamespace(mod_id=20, game_id=1, embedding=np.array([0, 1], dtype=np.float32)),
+        ],
+    )
+
+    async def no_reload(game_id):
+        raise AssertionError("partition reloaded")
+
+    monkeypatch.setattr(index, "load_game", no_reload)
+    index.mark_changed()
+
+    assert [m for m, _ in asyncio.run(index.search([1, 0], 1, k=2))] == [10, 11]
+    assert sorted(int(m) for m in index._partitions[1].ids[: index._partitions[1].size]) == [10, 11, 20]
+    assert index.stats()["partitions"] == {1: 3, 2: 0}
+    assert index._partitions[1].change_cursor == 8
+    assert (index.syncs, index.mods_synced, index.sync_reloads) == (1, 3, 0)
+
+    # Already applied: the next catalog change finds nothing new
+    index.mark_changed()
+    asyncio.run(index.search([1, 0], 1, k=2))
+    assert index.syncs == 1
+
+
+def test_reset_entry_or_large_change_reloads_partitions(monkeypatch):
+    index = _index_with(1, [10], [[1, 0]])
+    _log_changes(monkeypatch, [SimpleNamespace(change_id=3, mod_ids=None)])
+    index.mark_changed()
+    asyncio.run(index.sync_changes())
+    assert 1 not in index and index.sync_reloads == 1
+
+    index = NumpyVectorIndex(max_incremental_mods=2)
+    index._partitions[1] = _GamePartition.from_rows([10], np.ones((1, 2), dtype=np.float32))
+    _log_changes(monkeypatch, [SimpleNamespace(change_id=4, mod_ids=[10, 11, 12])])
+    index.mark_changed()
+    asyncio.run(index.sync_changes())
+    assert 1 not in index and index.sync_reloads == 1
+
+
+def test_partition_grows_past_initial_capacity():
+    rng = np.random.default_rng(0)
+    index = _index_with(1, [0], rng.normal(size=(1, 8)))
+    for mod_id in range(1, 200):
+        index.upsert(1, mod_id, rng.normal(size=8))
+
+    target = rng.normal(size=8)
+    index.upsert(1, 500, target)
+    assert index.search_loaded(target, 1, k=1)[0][0] == 500
+
+
+def test_least_recently_searched_partition_is_evicted(monkeypatch):
+    index = NumpyVectorIndex(max_games=2)
+
+    async def fake_load_game(game_id):
+        index._store(game_id, _GamePartition.from_rows([game_id], np.ones((1, 2), dtype=np.float32)))
+
+    monkeypatch.setattr(index, "load_game", fake_load_game)
+    for game_id in (1, 2, 1, 3):
+        asyncio.run(index.search([1, 0], game_id, k=1))
+
+    assert list(index._partitions) == [1, 3]
+    assert index.stats()["evictions"] == 1
+
+
+def test_quantized_pgvector_search_rescores_a_pool_of_at_least_k():
+    backend = PgVectorBackend(quantization="binary", rescore_pool=64)
+    assert backend.quantized
+    assert backend._pool_size(8) == 64
+    assert backend._pool_size(100) == 100
+    assert not PgVectorBackend().quantized
+
+    with pytest.raises(ValueError):
+        PgVectorBackend(quantization="int4")